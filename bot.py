@@ -4,25 +4,35 @@
 from __future__ import annotations
 import os
 import sys
-import json
 import asyncio
 import re
 import logging
 import base64
-import copy
 import signal
 from pathlib import Path
 from datetime import datetime, UTC
-from typing import Dict, Optional, List, Any, Literal
+from typing import TYPE_CHECKING, Dict, Optional, List, Any, Literal
 
 # --- Third-Party Imports ---
 import discord
 from discord.ext import commands, tasks
 from dotenv import load_dotenv
-import aiofiles
 import aiohttp
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 
+# --- Local Imports ---
+from utils.snipe_store import SnipeRecord, SnipeStore
+from utils.cache_profiles import MemberDirectory, cache_profile_from_env
+from utils.permission_index import PermissionIndex
+from utils.startup_profiler import StartupProfiler
+from utils.cog_loader import CogDependencyError, build_cog_graph, critical_path
+from utils.cluster_ipc import ClusterClient, local_guilds, local_stats
+from utils.outbound import OutboundScheduler
+from utils.automod import AutomodEngine
+
+if TYPE_CHECKING:
+    from utils.guild_config import GuildConfigView
+
 # --- .env Setup ---
 load_dotenv()
 
@@ -103,7 +113,7 @@ def decrypt_secret(enc_secret: str) -> str:
 
 # --- Default Guild Configuration ---
 def get_default_config() -> Dict[str, Any]:
-    """Returns a deep copy of the default configuration for a guild."""
+    """Returns a fresh copy of the default configuration for a guild."""
     return {
         "prefix": DEFAULT_PREFIX,
         "welcome": {"enabled": False, "channel_id": None, "message": "Welcome {user.mention} to {guild.name}!", "embed": {"enabled": True, "title": "New Member!", "description": "We're glad to have you."}},
@@ -113,7 +123,7 @@ def get_default_config() -> Dict[str, Any]:
         "automod": {"enabled": True, "anti_link": False, "anti_invite": False, "anti_spam": False, "bad_words_enabled": False, "bad_words_list": []},
         "leveling": {"enabled": True, "levelup_message": "🎉 Congrats {user.mention}, you reached **Level {level}**!", "xp_per_message_min": 15, "xp_per_message_max": 25, "xp_cooldown_seconds": 60},
         "economy": {"enabled": True, "start_balance": 100, "currency_symbol": "🪙", "currency_name": "Maxy Coin"},
-        "tickets": {"enabled": False, "category_id": None, "support_role_id": None, "transcript_channel_id": None, "panel_channel_id": None},
+        "tickets": {"enabled": False, "category_id": None, "support_role_id": None, "transcript_channel_id": None, "panel_channel_id": None, "transcript_gzip": False},
         "autorole": {"enabled": False, "human_role_id": None, "bot_role_id": None},
         "starboard": {"enabled": False, "channel_id": None, "star_count": 5},
         "autoresponder": {"enabled": True},
@@ -187,20 +197,35 @@ class MaxyBot(commands.Bot):
     The main bot class for MaxyBot, handles event listeners,
     command processing, and state management.
     """
-    def __init__(self):
-        intents = discord.Intents.all()
+    def __init__(self, *, cluster_id: Optional[int] = None, ipc_path: Optional[Path] = None, **options: Any):
+        """
+        Args:
+            cluster_id: This process's cluster number when started by `cluster.py`.
+            ipc_path: The launcher's IPC socket, used for cluster-wide stats.
+            **options: Passed on to the client (e.g. `shard_ids` and `shard_count`).
+        """
+        # Intents and member caching come from MAXY_CACHE_PROFILE (full / lean / minimal).
+        self.cache_profile = cache_profile_from_env()
         super().__init__(
             command_prefix=self.get_prefix_wrapper,
-            intents=intents,
+            intents=self.cache_profile.intents,
+            member_cache_flags=self.cache_profile.member_cache_flags,
+            chunk_guilds_at_startup=self.cache_profile.chunk_guilds_at_startup,
             case_insensitive=True,
             owner_ids=OWNER_IDS,
-            help_command=None
+            help_command=None,
+            **options
         )
+        self.cluster_id = cluster_id
+        self.ipc_path = ipc_path
+        self.cluster: Optional[ClusterClient] = None
+        self.member_directory = MemberDirectory(self)
+        self.permission_index = PermissionIndex(self)
+        self.outbound = OutboundScheduler()  # Rate-limited, prioritized channel sends for automated messages
+        self.automod = AutomodEngine(self)
         self.start_time = datetime.now(UTC)
-        self.config_cache: Dict[int, Dict[str, Any]] = {}
-        self.snipe_data: Dict[int, Dict[str, Any]] = {}
-        self.editsnipe_data: Dict[int, Dict[str, Any]] = {}
-        self.xp_cooldowns: Dict[int, Dict[int, datetime]] = {}
+        self.snipes = SnipeStore()
+        self.edit_snipes = SnipeStore()
         self.logger = logger
         self.http_session: aiohttp.ClientSession
         
@@ -208,40 +233,118 @@ class MaxyBot(commands.Bot):
         self.root_path = Path.cwd()
         self.data_path = self.root_path / "data"
         self.data_path.mkdir(exist_ok=True)
-        self.config_path = self.data_path / "config.json"
+        self.config_path = self.data_path / "config.json"  # Legacy file, imported into the database once
         
         # --- Database ---
         from utils.database import DatabaseManager  # Local import to avoid circular dependency issues
+        from utils.guild_config import GuildConfigStore
         self.db = DatabaseManager(self.data_path / "maxy.db")
+        self.guild_configs = GuildConfigStore(self.db, get_default_config())
+
+        # --- Cooldowns ---
+        from utils.cooldowns import CooldownService
+        self.cooldowns = CooldownService(self.db)  # Command and XP cooldowns; long ones survive restarts
+
+        # --- Leaderboards ---
+        from utils.leaderboards import ECONOMY, LEVELS, Leaderboard
+        self.level_board = Leaderboard(self.db, LEVELS)
+        self.economy_board = Leaderboard(self.db, ECONOMY)
+
+        # --- Command Routing ---
+        from utils.command_router import CommandRouter
+        self.router = CommandRouter(self, DEFAULT_PREFIX)
+
+        # --- Event Loop Monitoring ---
+        from utils.loop_monitor import LoopLagMonitor
+        self.loop_monitor = LoopLagMonitor()
 
     async def setup_hook(self):
         """Initializes async resources, loads extensions (cogs), and syncs commands."""
         self.logger.info("Running setup_hook...")
+        self.startup_profile = StartupProfiler()
         
-        self.http_session = aiohttp.ClientSession()
-        await self.load_config()
-        await self._load_all_cogs()
+        with self.startup_profile.phase("setup_hook"):
+            self.http_session = aiohttp.ClientSession()
+            self.loop_monitor.start()
+            if self.ipc_path is not None:
+                await self._connect_cluster()
+            with self.startup_profile.phase("load_config"):
+                await self.load_config()
+            await self.cooldowns.purge()
+            await self._load_all_cogs()
         
+        self.logger.info(self.startup_profile.report())
         # Removed automatic dev sync from here to give owner full control via command
-        self.logger.info("setup_hook completed successfully. Use the 'sync' command to manage slash commands.")
+        self.logger.info(f"setup_hook completed successfully in {self.startup_profile.phases['setup_hook']:.2f}s. Use the 'sync' command to manage slash commands.")
+
+    async def _connect_cluster(self):
+        """Connects to the launcher's IPC hub and publishes this process's stats and guilds."""
+        self.cluster = ClusterClient(self.cluster_id or 0, self.ipc_path)
+        self.cluster.provide("stats", lambda: local_stats(self))
+        self.cluster.provide("guilds", lambda: local_guilds(self))
+        try:
+            await self.cluster.connect()
+            self.logger.info(f"Cluster {self.cluster_id} connected to the IPC hub at {self.ipc_path}.")
+        except OSError as e:
+            # Not fatal: cluster-wide commands fall back to this process's numbers.
+            self.logger.error(f"Could not connect to the cluster IPC hub at {self.ipc_path}: {e}")
+
+    @property
+    def is_primary_cluster(self) -> bool:
+        """True for the process that runs global (not guild-scoped) background jobs."""
+        return not self.cluster_id
+
+    def owns_guild(self, guild_id: int) -> bool:
+        """True if the guild is on one of this process's shards (always true when not sharded)."""
+        shard_count = self.shard_count
+        if not shard_count:
+            return True
+        shard_ids = getattr(self, "shard_ids", None)
+        if shard_ids is None:  # Every shard runs in this process
+            return True
+        return (int(guild_id) >> 22) % shard_count in shard_ids
 
     async def _load_all_cogs(self):
-        """Loads all cogs from the 'cogs' directory."""
+        """
+        Loads all cogs from the 'cogs' directory.
+
+        Cogs declare the extensions they need with a module-level `COG_DEPENDENCIES`
+        tuple. Every cog starts loading as soon as its dependencies are loaded, so
+        independent cogs load concurrently. A dependency cycle aborts startup.
+        """
         self.logger.info("--- Loading Cogs ---")
-        cog_dir = self.root_path / 'cogs'
+        try:
+            graph = build_cog_graph(self.root_path / 'cogs')
+        except CogDependencyError as e:
+            self.logger.critical(f"❌ Cannot load cogs: {e}")
+            raise
         loaded_cogs, failed_cogs = [], []
+        done = {cog_name: asyncio.Event() for cog_name in graph}
 
-        for filename in sorted(os.listdir(cog_dir)):
-            if filename.endswith('.py') and not filename.startswith('_'):
-                cog_name = f'cogs.{filename[:-3]}'
+        async def load(cog_name: str):
+            try:
+                for dep in graph[cog_name]:
+                    await done[dep].wait()
+                    if dep not in loaded_cogs:
+                        failed_cogs.append(cog_name)
+                        self.logger.error(f"❌ Skipped Cog: {cog_name} | Dependency {dep} failed to load.")
+                        return
                 try:
-                    await self.load_extension(cog_name)
+                    with self.startup_profile.cog(cog_name):
+                        await self.load_extension(cog_name)
                     loaded_cogs.append(cog_name)
                 except Exception as e:
                     failed_cogs.append(cog_name)
                     self.logger.error(f"❌ Failed to load Cog: {cog_name} | Error: {e}", exc_info=True)
+            finally:
+                done[cog_name].set()
+
+        with self.startup_profile.track_imports(), self.startup_profile.phase("load_cogs"):
+            await asyncio.gather(*(load(cog_name) for cog_name in graph))
         
-        self.logger.info(f"✅ Loaded {len(loaded_cogs)} cogs.")
+        chain_time, chain = critical_path(graph, self.startup_profile.cogs)
+        self.logger.info(f"✅ Loaded {len(loaded_cogs)} cogs in {self.startup_profile.phases['load_cogs'] * 1000:.0f} ms "
+                         f"(longest dependency chain: {' -> '.join(chain)}, {chain_time * 1000:.0f} ms).")
         if failed_cogs:
             self.logger.warning(f"❌ Failed to load {len(failed_cogs)} cogs: {failed_cogs}")
         self.logger.info("--------------------")
@@ -251,6 +354,10 @@ class MaxyBot(commands.Bot):
         self.logger.info("Closing bot resources...")
         if self.auto_save_config.is_running():
             self.auto_save_config.cancel()
+        self.loop_monitor.stop()
+        await self.outbound.close()
+        if self.cluster is not None:
+            await self.cluster.close()
         await self.save_config()
         await self.http_session.close()
         await self.db.close()
@@ -258,65 +365,41 @@ class MaxyBot(commands.Bot):
         self.logger.info("Bot has been shut down.")
 
     async def load_config(self):
-        """Loads the main configuration file."""
-        try:
-            async with aiofiles.open(self.config_path, 'r', encoding='utf-8') as f:
-                content = await f.read()
-                # Store only guild settings, assuming root is {"guild_settings": {...}}
-                self.config_cache_from_file = json.loads(content).get("guild_settings", {})
-        except (FileNotFoundError, json.JSONDecodeError):
-            self.logger.warning("config.json not found or invalid. Starting with an empty config.")
-            self.config_cache_from_file = {}
-
-    async def save_config(self):
-        """Saves the current configuration to a file atomically."""
+        """Loads all guild settings from the database, importing a legacy config.json first if present."""
+        await self.guild_configs.import_json(self.config_path)
+        await self.guild_configs.load()
+
+    async def save_config(self) -> int:
+        """Persists the settings of guilds changed since the last save. Returns how many were written."""
         try:
-            full_config = {"guild_settings": self.config_cache_from_file}
-            temp_path = self.config_path.with_suffix(f"{self.config_path.suffix}.tmp")
-            async with aiofiles.open(temp_path, 'w', encoding='utf-8') as f:
-                await f.write(json.dumps(full_config, indent=4, ensure_ascii=False))
-            os.replace(temp_path, self.config_path)
+            return await self.guild_configs.flush()
         except Exception as e:
-            self.logger.error(f"Failed to save config.json: {e}")
+            self.logger.error(f"Failed to save guild settings: {e}")
+            return 0
 
-    def get_guild_config(self, guild_id: int) -> dict:
+    def get_guild_config(self, guild_id: int) -> GuildConfigView:
         """
-        Retrieves the config for a guild, merging defaults with saved settings.
-        Uses a cache for performance.
+        Retrieves the config for a guild. Reads fall through to the shared defaults;
+        values assigned through the returned view are saved on the next auto-save.
         """
-        if guild_id in self.config_cache:
-            return self.config_cache[guild_id]
-
-        guild_id_str = str(guild_id)
-        # Start with a fresh copy of the defaults
-        final_config = copy.deepcopy(get_default_config())
-        saved_settings = self.config_cache_from_file.get(guild_id_str, {})
-
-        def _recursive_update(d, u):
-            for k, v in u.items():
-                if isinstance(v, dict):
-                    d[k] = _recursive_update(d.get(k, {}), v)
-                else:
-                    d[k] = v
-            return d
-
-        final_config = _recursive_update(final_config, saved_settings)
-        self.config_cache[guild_id] = final_config
-        return final_config
+        return self.guild_configs.get(guild_id)
+
+    def update_guild_config(self, guild_id: int) -> None:
+        """Marks a guild's config for saving. Assignments through the config view already do this."""
+        self.guild_configs.mark_dirty(guild_id)
 
     async def get_prefix_wrapper(self, bot, message: discord.Message):
-        """Dynamically gets the command prefix for a guild."""
-        if not message.guild:
-            return commands.when_mentioned_or(DEFAULT_PREFIX)(bot, message)
-        conf = self.get_guild_config(message.guild.id)
-        prefix = conf.get("prefix", DEFAULT_PREFIX)
-        return commands.when_mentioned_or(prefix)(bot, message)
+        """Dynamically gets the command prefix for a guild (including the mention forms)."""
+        return self.router.prefixes(message.guild)
 
     async def on_ready(self):
         """Called when the bot is fully connected and ready."""
         self.logger.info("=" * 40)
         self.logger.info(f"Bot Logged In as: {self.user.name} | {self.user.id}")
         self.logger.info(f"Discord.py Version: {discord.__version__}")
+        self.logger.info(f"Cache Profile: {self.cache_profile.name}")
+        if self.shard_count:
+            self.logger.info(f"Cluster {self.cluster_id} | Shards {getattr(self, 'shard_ids', None) or 'all'} of {self.shard_count}")
         self.logger.info(f"Serving {len(self.guilds)} guilds.")
         self.logger.info("Maxy Bot is online and operational.")
         self.logger.info("=" * 40)
@@ -339,13 +422,38 @@ class MaxyBot(commands.Bot):
         if message.author.bot or not message.guild:
             return
 
+        is_command = self.router.is_command(message)
+        # Commands are left to their own checks; anything else goes through automod first
+        if not is_command and await self.automod.handle(message):
+            return
+
         if (autoresponder_cog := self.get_cog('AutoResponder')):
             if await autoresponder_cog.handle_responses(message):
                 return
         
+        # Most messages are chat; skip building a context unless a prefix matches.
+        if not is_command:
+            return
+
         # Await command processing first to prevent automod on valid commands
         await self.process_commands(message)
 
+    async def on_message_delete(self, message: discord.Message):
+        if message.author.bot or not message.guild:
+            return
+        self.snipes.push(message.channel.id, SnipeRecord.from_message(message))
+        logging_cog = self.get_cog("Logging")
+        if logging_cog:
+            await logging_cog.log_message_delete(message)
+
+    async def on_message_edit(self, before: discord.Message, after: discord.Message):
+        if before.author.bot or not before.guild or before.content == after.content:
+            return
+        self.edit_snipes.push(before.channel.id, SnipeRecord.from_message(before, after))
+        logging_cog = self.get_cog("Logging")
+        if logging_cog:
+            await logging_cog.log_message_edit(before, after)
+
     async def on_command_error(self, ctx: commands.Context, error: commands.CommandError):
         """Global prefix command error handler."""
         if isinstance(error, commands.CommandNotFound):
@@ -397,16 +505,20 @@ class MaxyBot(commands.Bot):
             self.logger.error(f"An unexpected error occurred while sending status message: {e}", exc_info=True)
     
     # --- Background Tasks ---
-    @tasks.loop(minutes=5)
+    @tasks.loop(seconds=30)
     async def auto_save_config(self):
-        """Periodically saves the bot's configuration."""
-        await self.save_config()
-        self.logger.info("Configuration auto-saved successfully.")
+        """Periodically saves the settings of guilds that changed."""
+        if saved := await self.save_config():
+            self.logger.info(f"Configuration auto-saved for {saved} guild(s).")
 
     @auto_save_config.before_loop
     async def before_auto_save(self):
         await self.wait_until_ready()
 
+class MaxyShardedBot(MaxyBot, commands.AutoShardedBot):
+    """MaxyBot over several shards in one process. `cluster.py` runs one per worker, each over a shard range."""
+
+
 # --- Owner-Only Cog (could be moved to a file in /cogs) ---
 class OwnerCog(commands.Cog, name="Owner"):
     def __init__(self, bot: MaxyBot):
@@ -523,14 +635,19 @@ class OwnerCog(commands.Cog, name="Owner"):
             await ctx.send(f"❌ Failed to reload cog `{cog_name}`: `{e}`")
 
 # --- Bot Execution ---
-async def main():
-    """The main entry point for running the bot."""
+async def main(**cluster_options: Any) -> int:
+    """
+    The main entry point for running the bot. Returns 0 after a clean shutdown, 1 after an error.
+
+    Without arguments a single `MaxyBot` runs every shard. `cluster.py` passes
+    `shard_ids`, `shard_count`, `cluster_id` and `ipc_path` to run one worker.
+    """
     TOKEN = os.getenv("DISCORD_BOT_TOKEN")
     if not TOKEN:
         logger.critical("FATAL: DISCORD_BOT_TOKEN is not set in the .env file!")
-        return
+        return 1
 
-    bot = MaxyBot()
+    bot = MaxyShardedBot(**cluster_options) if cluster_options.get("shard_ids") is not None else MaxyBot()
     
     async def shutdown_handler(sig: signal.Signals):
         logger.warning(f"Received shutdown signal ({sig.name}). Initiating graceful shutdown...")
@@ -546,10 +663,13 @@ async def main():
         await bot.add_cog(OwnerCog(bot))
         await bot.db.init()
         await bot.start(TOKEN)
+        return 0
     except discord.errors.LoginFailure:
         logger.critical("Login Error: The DISCORD_BOT_TOKEN is invalid.")
+        return 1
     except Exception as e:
         logger.critical(f"An unexpected error occurred while running the bot: {e}", exc_info=True)
+        return 1
     finally:
         if not bot.is_closed():
             await bot.send_status_message(
@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+"""
+Cluster launcher: runs MaxyBot as several worker processes, each over a range of shards.
+
+    python cluster.py                       # MAXY_CLUSTERS workers (default: one per CPU, at most the shard count)
+    MAXY_CLUSTERS=4 MAXY_SHARD_COUNT=16 python cluster.py
+
+Each worker is a `MaxyShardedBot` with its own gateway connections, caches and event
+loop. The launcher hosts a small IPC hub on a Unix socket (`data/cluster.sock`) that
+`/stats`, `own-botstatus` and `own-guilds list` use to add up numbers from every worker.
+Workers that crash are restarted with backoff; a worker that exits cleanly (the owner
+`shutdown` command) is not.
+
+All workers share `data/maxy.db`; see `DatabaseManager` for how SQLite is used safely
+from several processes. Every guild lives on exactly one shard, so per-guild caches
+stay coherent as long as a guild's data is only written by the worker that owns it.
+Jobs that are not tied to a guild (reminders) run on cluster 0 only.
+"""
+
+# --- Standard Library Imports ---
+import os
+import sys
+import math
+import time
+import signal
+import asyncio
+import logging
+import multiprocessing
+from pathlib import Path
+from typing import Callable, List, Optional, Sequence, Tuple
+
+# --- Third-Party Imports ---
+import aiohttp
+from dotenv import load_dotenv
+
+# --- Local Imports ---
+from utils.cluster_ipc import ClusterHub
+
+load_dotenv()
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - [%(name)s] %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+logger = logging.getLogger('MaxyCluster')
+
+IPC_PATH = Path.cwd() / "data" / "cluster.sock"
+IDENTIFY_INTERVAL = 5.0  # Discord allows `max_concurrency` identifies per 5 seconds
+MAX_RESTART_BACKOFF = 60.0
+
+
+def split_shards(shard_count: int, clusters: int) -> List[List[int]]:
+    """Splits shard ids 0..shard_count-1 into `clusters` contiguous, near-equal ranges."""
+    clusters = max(1, min(clusters, shard_count))
+    size, extra = divmod(shard_count, clusters)
+    ranges, start = [], 0
+    for i in range(clusters):
+        end = start + size + (1 if i < extra else 0)
+        ranges.append(list(range(start, end)))
+        start = end
+    return ranges
+
+
+async def fetch_gateway_info(token: str) -> Tuple[int, int]:
+    """Returns Discord's recommended `(shard_count, max_concurrency)` for the bot."""
+    headers = {"Authorization": f"Bot {token}"}
+    async with aiohttp.ClientSession() as session:
+        async with session.get("https://discord.com/api/v10/gateway/bot", headers=headers) as resp:
+            resp.raise_for_status()
+            data = await resp.json()
+    return data["shards"], data.get("session_start_limit", {}).get("max_concurrency", 1)
+
+
+def run_worker(cluster_id: int, shard_ids: Sequence[int], shard_count: int, ipc_path: str) -> None:
+    """Worker process entry point: runs one MaxyShardedBot over `shard_ids`."""
+    import bot  # Imported in the child so the launcher itself stays light
+
+    # Ctrl+C reaches the whole process group; let the launcher decide when workers stop.
+    # SIGTERM from the launcher becomes KeyboardInterrupt, which runs bot.close().
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    try:
+        # A non-zero exit code tells the launcher to restart this worker.
+        sys.exit(asyncio.run(bot.main(cluster_id=cluster_id, shard_ids=list(shard_ids), shard_count=shard_count, ipc_path=Path(ipc_path))))
+    except KeyboardInterrupt:
+        pass
+
+
+class _Worker:
+    def __init__(self, cluster_id: int, shard_ids: List[int]):
+        self.cluster_id = cluster_id
+        self.shard_ids = shard_ids
+        self.process: Optional[multiprocessing.Process] = None
+        self.started_at = 0.0
+        self.backoff = 1.0
+        self.restart_at: Optional[float] = None
+
+
+class ClusterLauncher:
+    """
+    Starts and supervises the worker processes and hosts the IPC hub.
+
+    `worker_target` is the function each process runs with
+    `(cluster_id, shard_ids, shard_count, ipc_path)`; it defaults to `run_worker`
+    and can be replaced by a stub that never connects to the gateway.
+    """
+
+    def __init__(self, shard_count: int, clusters: int, ipc_path: Path = IPC_PATH, max_concurrency: int = 1,
+                 worker_target: Callable[..., None] = run_worker):
+        self.shard_count = shard_count
+        self.ipc_path = Path(ipc_path)
+        self.max_concurrency = max(1, max_concurrency)
+        self.worker_target = worker_target
+        self.workers = [_Worker(i, shards) for i, shards in enumerate(split_shards(shard_count, clusters))]
+        self.hub = ClusterHub(self.ipc_path)
+        self._context = multiprocessing.get_context("spawn")  # Fresh interpreters; no forked event loops or sockets
+        self._stopping = asyncio.Event()
+
+    def _spawn(self, worker: _Worker) -> None:
+        worker.process = self._context.Process(
+            target=self.worker_target,
+            args=(worker.cluster_id, worker.shard_ids, self.shard_count, str(self.ipc_path)),
+            name=f"maxy-cluster-{worker.cluster_id}",
+        )
+        worker.process.start()
+        worker.started_at = time.monotonic()
+        worker.restart_at = None
+        logger.info(f"Started cluster {worker.cluster_id} (pid {worker.process.pid}) with shards {worker.shard_ids[0]}-{worker.shard_ids[-1]}.")
+
+    def _identify_delay(self, worker: _Worker) -> float:
+        # Give the worker's shards time to identify before the next worker starts its own.
+        return math.ceil(len(worker.shard_ids) / self.max_concurrency) * IDENTIFY_INTERVAL
+
+    async def start(self, stagger: bool = True) -> None:
+        """Starts the IPC hub and every worker, one after another."""
+        await self.hub.start()
+        for worker in self.workers:
+            if self._stopping.is_set():
+                return
+            self._spawn(worker)
+            if stagger and worker is not self.workers[-1]:
+                await asyncio.sleep(self._identify_delay(worker))
+
+    async def supervise(self, interval: float = 2.0) -> None:
+        """Restarts crashed workers until `stop()` is called or every worker exited cleanly."""
+        while not self._stopping.is_set():
+            now = time.monotonic()
+            for worker in self.workers:
+                process = worker.process
+                if process is None or process.is_alive():
+                    continue
+                if process.exitcode == 0:
+                    continue  # Shut down on purpose
+                if worker.restart_at is None:
+                    if now - worker.started_at > MAX_RESTART_BACKOFF:
+                        worker.backoff = 1.0  # It ran fine for a while; this is a fresh failure
+                    worker.restart_at = now + worker.backoff
+                    logger.error(f"Cluster {worker.cluster_id} exited with code {process.exitcode}; restarting in {worker.backoff:.0f}s.")
+                    worker.backoff = min(worker.backoff * 2, MAX_RESTART_BACKOFF)
+                elif now >= worker.restart_at:
+                    self._spawn(worker)
+            if all(w.process is not None and w.process.exitcode == 0 for w in self.workers):
+                logger.info("Every cluster shut down cleanly.")
+                break
+            try:
+                await asyncio.wait_for(self._stopping.wait(), interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def stop(self, timeout: float = 20.0) -> None:
+        """Asks every worker to shut down gracefully (SIGTERM), then kills stragglers."""
+        self._stopping.set()
+        for worker in self.workers:
+            if worker.process is not None and worker.process.is_alive():
+                worker.process.terminate()
+        deadline = time.monotonic() + timeout
+        for worker in self.workers:
+            if worker.process is None:
+                continue
+            await asyncio.to_thread(worker.process.join, max(0.0, deadline - time.monotonic()))
+            if worker.process.is_alive():
+                logger.warning(f"Cluster {worker.cluster_id} did not stop in time; killing it.")
+                worker.process.kill()
+        await self.hub.close()
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, self._stopping.set)
+        await self.start()
+        await self.supervise()
+        await self.stop()
+
+
+async def main() -> int:
+    token = os.getenv("DISCORD_BOT_TOKEN")
+    if not token:
+        logger.critical("FATAL: DISCORD_BOT_TOKEN is not set in the .env file!")
+        return 1
+
+    # Make sure the shared ENCRYPTION_KEY exists before several workers race to create it.
+    import bot  # noqa: F401
+
+    recommended, max_concurrency = await fetch_gateway_info(token)
+    shard_count = int(os.getenv("MAXY_SHARD_COUNT") or recommended)
+    clusters = int(os.getenv("MAXY_CLUSTERS") or min(os.cpu_count() or 1, shard_count))
+    logger.info(f"Launching {min(clusters, shard_count)} cluster(s) over {shard_count} shard(s) (Discord recommends {recommended}).")
+
+    await ClusterLauncher(shard_count, clusters, max_concurrency=max_concurrency).run()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
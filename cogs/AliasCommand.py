@@ -12,7 +12,9 @@ class AliasCommand(commands.Cog):
 
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.bot.loop.create_task(self.setup_db())
+
+    async def cog_load(self):
+        await self.setup_db()
 
     async def setup_db(self):
         DB_PATH.parent.mkdir(exist_ok=True)
@@ -26,6 +28,9 @@ class AliasCommand(commands.Cog):
                 )
             """)
             await db.commit()
+            # Aliases are resolved from memory by the bot's router, not per message from the DB.
+            cursor = await db.execute("SELECT guild_id, alias, command_name FROM aliases")
+            self.bot.router.load_aliases(await cursor.fetchall())
 
     async def check_admin(self, interaction: discord.Interaction):
         if not interaction.user.guild_permissions.administrator:
@@ -45,6 +50,7 @@ class AliasCommand(commands.Cog):
                 (str(interaction.guild.id), alias.lower(), command.lstrip("/"))
             )
             await db.commit()
+        self.bot.router.add_alias(interaction.guild.id, alias, command.lstrip("/"))
         await interaction.response.send_message(f"✅ Alias `{alias}` created for command `{command}`!", ephemeral=True)
 
     @app_commands.command(name="removealias", description="Remove an alias")
@@ -61,6 +67,7 @@ class AliasCommand(commands.Cog):
             if cursor.rowcount == 0:
                 await interaction.response.send_message(f"❌ Alias `{alias}` not found!", ephemeral=True)
             else:
+                self.bot.router.remove_alias(interaction.guild.id, alias)
                 await interaction.response.send_message(f"✅ Alias `{alias}` removed!", ephemeral=True)
 
     @app_commands.command(name="showaliases", description="Show all aliases for this server")
@@ -82,15 +89,8 @@ class AliasCommand(commands.Cog):
         if message.author.bot or not message.guild:
             return
 
-        async with aiosqlite.connect(DB_PATH) as db:
-            cursor = await db.execute(
-                "SELECT command_name FROM aliases WHERE guild_id = ? AND alias = ?",
-                (str(message.guild.id), message.content.split()[0].lower())
-            )
-            row = await cursor.fetchone()
-
-        if row:
-            command_name = row[0]
+        command_name = self.bot.router.resolve_alias(message)
+        if command_name:
             ctx = await self.bot.get_context(message)
             cmd = self.bot.get_command(command_name)
             if cmd:
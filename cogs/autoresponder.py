@@ -16,6 +16,7 @@ if typing.TYPE_CHECKING:
 
 # استيراد معالج الأخطاء (إذا كان موجوداً في ملف آخر)
 from .utils import cog_command_error
+from utils.outbound import Priority
 
 # كلاس مخصص لتخزين بيانات الردود لتسهيل التعامل معها
 class AutoResponse:
@@ -82,7 +83,7 @@ class AutoResponder(commands.Cog, name="AutoResponder"):
 
         # متغيرات متقدمة
         if '{random.user}' in text:
-            random_user = random.choice(message.guild.members)
+            random_user = random.choice(await self.bot.member_directory.members(message.guild))
             text = text.replace('{random.user}', random_user.mention)
         
         # متغير رقم عشوائي (e.g., {random.number(1,100)})
@@ -133,10 +134,11 @@ class AutoResponder(commands.Cog, name="AutoResponder"):
                 final_response = await self._parse_placeholders(resp.response, message)
                 
                 try:
+                    # الرسائل تمر عبر المُجدول كرسائل منخفضة الأولوية (قد تُسقط تحت الضغط)
                     if resp.response_type == 'message':
-                        await message.channel.send(final_response)
+                        self.bot.outbound.submit(message.channel, Priority.CHATTER, content=final_response)
                     elif resp.response_type == 'reply':
-                        await message.reply(final_response, mention_author=True) # ميزة الرد
+                        self.bot.outbound.submit(message.channel, Priority.CHATTER, content=final_response, reference=message, mention_author=True) # ميزة الرد
                     elif resp.response_type == 'react':
                         await message.add_reaction(final_response) # ميزة التفاعل بإيموجي
                 except (discord.HTTPException, discord.Forbidden) as e:
@@ -7,19 +7,12 @@ from discord.ext import commands, tasks
 import datetime
 from datetime import datetime as dt, UTC
 import random
-import aiohttp
 import os
 import re
-import humanize
-import psutil
 import time
 import asyncio
 import json
 import math
-import difflib
-import yt_dlp
-from PIL import Image, ImageDraw, ImageFont, ImageOps
-import google.generativeai as genai
 
 if TYPE_CHECKING:
     from ..bot import MaxyBot
@@ -41,9 +34,7 @@ class Configuration(commands.Cog, name="Configuration"):
             return await interaction.response.send_message("Prefix cannot be longer than 5 characters.", ephemeral=True)
         conf = self.bot.get_guild_config(interaction.guild.id)
         conf['prefix'] = prefix
-        self.bot.config_data[str(interaction.guild.id)] = conf
-        await self.bot.save_config()
-        self.bot.config_cache.pop(interaction.guild.id, None)
+        self.bot.update_guild_config(interaction.guild.id)
         await interaction.response.send_message(f"✅ My prefix has been updated to `{prefix}`.", ephemeral=True)
 
     @app_commands.command(name="setup-welcome", description="[Admin] Configures the welcome message system.")
@@ -54,9 +45,7 @@ class Configuration(commands.Cog, name="Configuration"):
         conf['welcome']['channel_id'] = channel.id
         conf['welcome']['message'] = message
         conf['welcome']['enabled'] = True
-        self.bot.config_data[str(interaction.guild.id)] = conf
-        await self.bot.save_config()
-        self.bot.config_cache.pop(interaction.guild.id, None)
+        self.bot.update_guild_config(interaction.guild.id)
         await interaction.response.send_message(f"✅ Welcome messages will now be sent to {channel.mention}.", ephemeral=True)
 
     @app_commands.command(name="setup-logs", description="[Admin] Configures the server logging system.")
@@ -66,11 +55,20 @@ class Configuration(commands.Cog, name="Configuration"):
         conf = self.bot.get_guild_config(interaction.guild.id)
         conf['logging']['channel_id'] = channel.id
         conf['logging']['enabled'] = True
-        self.bot.config_data[str(interaction.guild.id)] = conf
-        await self.bot.save_config()
-        self.bot.config_cache.pop(interaction.guild.id, None)
+        self.bot.update_guild_config(interaction.guild.id)
         await interaction.response.send_message(f"✅ Server events will now be logged in {channel.mention}.", ephemeral=True)
 
+    @app_commands.command(name="setup-starboard", description="[Admin] Configures the starboard.")
+    @app_commands.describe(channel="The channel starred messages are reposted to.", stars="How many ⭐ reactions a message needs.")
+    @app_commands.checks.has_permissions(administrator=True)
+    async def setup_starboard(self, interaction: discord.Interaction, channel: discord.TextChannel, stars: app_commands.Range[int, 1, 100] = 5):
+        conf = self.bot.get_guild_config(interaction.guild.id)
+        conf['starboard']['channel_id'] = channel.id
+        conf['starboard']['star_count'] = stars
+        conf['starboard']['enabled'] = True
+        self.bot.update_guild_config(interaction.guild.id)
+        await interaction.response.send_message(f"✅ Messages with {stars} ⭐ will now be reposted to {channel.mention}.", ephemeral=True)
+
     @app_commands.command(name="autorole-human", description="[Admin] Sets a role to be automatically given to new human members.")
     @app_commands.describe(role="The role to assign.")
     @app_commands.checks.has_permissions(administrator=True)
@@ -83,10 +81,17 @@ class Configuration(commands.Cog, name="Configuration"):
         conf['autorole']['enabled'] = True
         message = f"✅ New human members will now automatically receive the {role.mention} role."
 
-        self.bot.config_data[str(interaction.guild.id)] = conf
-        await self.bot.save_config()
-        self.bot.config_cache.pop(interaction.guild.id, None)
+        self.bot.update_guild_config(interaction.guild.id)
         await interaction.response.send_message(message, ephemeral=True)
 
+    @app_commands.command(name="transcript-gzip", description="[Admin] Compresses ticket transcripts with gzip.")
+    @app_commands.describe(enabled="Whether new ticket transcripts are gzipped.")
+    @app_commands.checks.has_permissions(administrator=True)
+    async def transcript_gzip(self, interaction: discord.Interaction, enabled: bool):
+        conf = self.bot.get_guild_config(interaction.guild.id)
+        conf['tickets']['transcript_gzip'] = enabled
+        self.bot.update_guild_config(interaction.guild.id)
+        await interaction.response.send_message(f"✅ Ticket transcripts will {'now' if enabled else 'no longer'} be gzipped.", ephemeral=True)
+
 async def setup(bot: MaxyBot):
     await bot.add_cog(Configuration(bot))
\ No newline at end of file
@@ -7,23 +7,55 @@ from discord.ext import commands, tasks
 import datetime
 from datetime import datetime as dt, UTC
 import random
-import aiohttp
 import os
 import re
-import humanize
-import psutil
 import time
 import asyncio
 import json
 import math
-import difflib
-import yt_dlp
-from PIL import Image, ImageDraw, ImageFont, ImageOps
+import aiosqlite
 
 if TYPE_CHECKING:
     from ..bot import MaxyBot
 
-from .utils import cog_command_error
+from .utils import cog_command_error, lazy_import
+from utils.leaderboards import send_leaderboard
+from utils.economy_ledger import Change, EconomyLedger, InsufficientFunds
+from utils.cooldowns import cooldown
+
+# Heavy libraries are only imported the first time they are used.
+humanize = lazy_import("humanize")
+Image = lazy_import("PIL.Image")
+ImageDraw = lazy_import("PIL.ImageDraw")
+ImageFont = lazy_import("PIL.ImageFont")
+
+# --- Payout Rules ---
+# Kept at module level so `python -m utils.economy_sim` simulates exactly what the commands pay.
+DAILY_REWARD = (500, 1500)          # Uniform range, inclusive
+WORK_REWARD = (100, 400)
+SLOT_SYMBOLS = ["🍒", "🍇", "🍊", "🍋", "🔔", "💎", "🍀"]
+SLOTS_TRIPLE_PAYOUT = 10            # Payouts are multiples of the bet, including the bet itself
+SLOTS_PAIR_PAYOUT = 3               # Two equal neighbouring reels
+FLIP_PAYOUT = 2
+BLACKJACK_PAYOUT = 2
+BLACKJACK_NATURAL_PAYOUT = 2.5
+DEALER_STANDS_AT = 17
+ROB_MIN_WALLET = 250
+ROB_TARGET_MIN_WALLET = 100
+ROB_MAX_SHARE = 0.4                 # Of the target's wallet
+ROB_FINE = (50, 250)
+ROB_ODDS = 3                        # 1 in 3 succeed
+ROB_MASK_ODDS = 2                   # 1 in 2 with a Robber's Mask
+
+
+def slots_payout(reels: List[str]) -> int:
+    """The payout multiple for three reels."""
+    if reels[0] == reels[1] == reels[2]:
+        return SLOTS_TRIPLE_PAYOUT
+    if reels[0] == reels[1] or reels[1] == reels[2]:
+        return SLOTS_PAIR_PAYOUT
+    return 0
+
 
 # --- Blackjack Game Logic ---
 class BlackjackGame:
@@ -128,7 +160,7 @@ class BlackjackView(discord.ui.View):
             item.disabled = True
         
         if winnings > 0:
-            await self.cog.update_balance(self.interaction.guild.id, self.interaction.user.id, wallet_change=winnings)
+            await self.cog.update_balance(self.interaction.guild.id, self.interaction.user.id, wallet_change=winnings, reason="blackjack")
             
         await self._update_embed(game_over=True, result_message=result)
         self.stop()
@@ -151,16 +183,16 @@ class BlackjackView(discord.ui.View):
         player_score = self.game._calculate_value(self.game.player_hand)
         dealer_score = self.game._calculate_value(self.game.dealer_hand)
 
-        while dealer_score < 17:
+        while dealer_score < DEALER_STANDS_AT:
             self.game.hit(self.game.dealer_hand)
             dealer_score = self.game._calculate_value(self.game.dealer_hand)
 
         if dealer_score > 21:
-            await self._end_game(f"🎉 Dealer busts! You win {int(self.bet * 2):,} coins!", self.bet * 2)
+            await self._end_game(f"🎉 Dealer busts! You win {self.bet * BLACKJACK_PAYOUT:,} coins!", self.bet * BLACKJACK_PAYOUT)
         elif dealer_score > player_score:
             await self._end_game(f"😭 Dealer wins! You lose {self.bet:,} coins.", 0)
         elif player_score > dealer_score:
-            await self._end_game(f"🎉 You win! You get {int(self.bet * 2):,} coins!", self.bet * 2)
+            await self._end_game(f"🎉 You win! You get {self.bet * BLACKJACK_PAYOUT:,} coins!", self.bet * BLACKJACK_PAYOUT)
         else:
             await self._end_game(f"😐 It's a push! Your bet of {self.bet:,} coins is returned.", self.bet)
 
@@ -169,6 +201,12 @@ class Economy(commands.Cog, name="Economy"):
     def __init__(self, bot: MaxyBot):
         self.bot = bot
         self.http_session = bot.http_session
+        # All balance changes go through the ledger: one guarded transaction per command.
+        # MAXY_ECONOMY_JOURNAL=1 also records every change in the economy_ledger table.
+        self.ledger = EconomyLedger(
+            bot.db, self._start_balance, board=bot.economy_board,
+            journal=os.getenv("MAXY_ECONOMY_JOURNAL", "0").lower() in ("1", "true", "yes")
+        )
         self.shop_items = {}
         self.font_path = str(self.bot.root_path / "assets" / "fonts" / "font.ttf")
         self.bg_path = self.bot.root_path / "assets" / "images" / "profile_backgrounds"
@@ -195,20 +233,17 @@ class Economy(commands.Cog, name="Economy"):
             await cog_command_error(interaction, error)
 
     # --- Database Helper Methods ---
+    def _start_balance(self, guild_id: int) -> int:
+        return self.bot.get_guild_config(guild_id)['economy'].get('start_balance', 100)
+
     async def get_balance(self, guild_id: int, user_id: int) -> dict:
-        """Fetches a user's balance, creating an entry if it doesn't exist."""
-        data = await self.bot.db.fetchone("SELECT wallet, bank FROM economy WHERE guild_id = ? AND user_id = ?", (guild_id, user_id))
-        if not data:
-            conf = self.bot.get_guild_config(guild_id)
-            start_balance = conf['economy'].get('start_balance', 100)
-            await self.bot.db.execute("INSERT INTO economy (guild_id, user_id, wallet) VALUES (?, ?, ?)", (guild_id, user_id, start_balance))
-            return {'wallet': start_balance, 'bank': 0}
-        return {'wallet': data['wallet'], 'bank': data['bank']}
-
-    async def update_balance(self, guild_id: int, user_id: int, wallet_change: int = 0, bank_change: int = 0):
-        """Updates a user's balance in the database."""
-        await self.bot.db.execute(f"INSERT OR IGNORE INTO economy (guild_id, user_id) VALUES (?, ?)", (guild_id, user_id))
-        await self.bot.db.execute(f"UPDATE economy SET wallet = wallet + ?, bank = bank + ? WHERE guild_id = ? AND user_id = ?", (wallet_change, bank_change, guild_id, user_id))
+        """Fetches a user's balance (usually from the ledger's cache), creating an entry if it doesn't exist."""
+        balance = await self.ledger.balance(guild_id, user_id)
+        return {'wallet': balance.wallet, 'bank': balance.bank}
+
+    async def update_balance(self, guild_id: int, user_id: int, wallet_change: int = 0, bank_change: int = 0, reason: str = "update"):
+        """Changes one user's balance. Raises InsufficientFunds instead of going negative."""
+        await self.ledger.apply(guild_id, [Change(user_id, wallet=wallet_change, bank=bank_change)], reason)
 
     async def has_item(self, guild_id: int, user_id: int, item_id: str) -> bool:
         """Checks if a user has a specific item in their inventory."""
@@ -278,13 +313,7 @@ class Economy(commands.Cog, name="Economy"):
 
         level_data = await self.bot.db.fetchone("SELECT level, xp FROM leveling WHERE guild_id = ? AND user_id = ?", (interaction.guild.id, target.id))
         eco_data = await self.get_balance(interaction.guild.id, target.id)
-        leaderboard = await self.bot.db.fetchall("SELECT user_id FROM leveling WHERE guild_id = ? ORDER BY level DESC, xp DESC", (interaction.guild.id,))
-
-        rank = "N/A"
-        for i, entry in enumerate(leaderboard):
-            if entry['user_id'] == target.id:
-                rank = i + 1
-                break
+        rank = await self.bot.level_board.rank(interaction.guild.id, target.id) or "N/A"
 
         level = level_data['level'] if level_data else 0
         xp = level_data['xp'] if level_data else 0
@@ -334,13 +363,11 @@ class Economy(commands.Cog, name="Economy"):
         if user.bot:
             return await interaction.response.send_message("You can't pay bots!", ephemeral=True)
             
-        bal = await self.get_balance(interaction.guild.id, interaction.user.id)
-        if bal['wallet'] < amount:
+        try:
+            await self.ledger.transfer(interaction.guild.id, interaction.user.id, user.id, amount, reason="pay")
+        except InsufficientFunds:
             return await interaction.response.send_message("You don't have enough money in your wallet for this transaction.", ephemeral=True)
 
-        await self.update_balance(interaction.guild.id, interaction.user.id, wallet_change=-amount)
-        await self.update_balance(interaction.guild.id, user.id, wallet_change=amount)
-
         conf = self.bot.get_guild_config(interaction.guild.id)
         currency_symbol = conf['economy']['currency_symbol']
         await interaction.response.send_message(f"💸 You have successfully sent **{currency_symbol} {amount:,}** to {user.mention}!")
@@ -361,10 +388,10 @@ class Economy(commands.Cog, name="Economy"):
 
         if dep_amount <= 0:
             return await interaction.response.send_message("You must deposit a positive amount.", ephemeral=True)
-        if dep_amount > wallet_bal:
+        try:
+            await self.update_balance(interaction.guild.id, interaction.user.id, wallet_change=-dep_amount, bank_change=dep_amount, reason="deposit")
+        except InsufficientFunds:
             return await interaction.response.send_message("You don't have that much money in your wallet.", ephemeral=True)
-
-        await self.update_balance(interaction.guild.id, interaction.user.id, wallet_change=-dep_amount, bank_change=dep_amount)
         conf = self.bot.get_guild_config(interaction.guild.id)
         currency_symbol = conf['economy']['currency_symbol']
         await interaction.response.send_message(f"🏦 You have deposited **{currency_symbol} {dep_amount:,}** into your bank.")
@@ -384,10 +411,10 @@ class Economy(commands.Cog, name="Economy"):
 
         if wit_amount <= 0:
             return await interaction.response.send_message("You must withdraw a positive amount.", ephemeral=True)
-        if wit_amount > bank_bal:
+        try:
+            await self.update_balance(interaction.guild.id, interaction.user.id, wallet_change=wit_amount, bank_change=-wit_amount, reason="withdraw")
+        except InsufficientFunds:
             return await interaction.response.send_message("You don't have that much money in your bank.", ephemeral=True)
-
-        await self.update_balance(interaction.guild.id, interaction.user.id, wallet_change=wit_amount, bank_change=-wit_amount)
         conf = self.bot.get_guild_config(interaction.guild.id)
         currency_symbol = conf['economy']['currency_symbol']
         await interaction.response.send_message(f"💸 You have withdrawn **{currency_symbol} {wit_amount:,}** from your bank.")
@@ -395,38 +422,38 @@ class Economy(commands.Cog, name="Economy"):
     @app_commands.command(name="leaderboard-eco", description="Shows the server's economy leaderboard.")
     async def leaderboard_eco(self, interaction: discord.Interaction):
         await interaction.response.defer()
-        query = "SELECT user_id, wallet, bank FROM economy WHERE guild_id = ? ORDER BY (wallet + bank) DESC LIMIT 10"
-        results = await self.bot.db.fetchall(query, (interaction.guild.id,))
-        if not results:
-            return await interaction.followup.send("There is no one on the leaderboard yet!")
-
-        conf = self.bot.get_guild_config(interaction.guild.id)
+        guild = interaction.guild
+        conf = self.bot.get_guild_config(guild.id)
         currency_symbol = conf['economy']['currency_symbol']
-        embed = discord.Embed(title=f"🏆 Economy Leaderboard for {interaction.guild.name}", color=discord.Color.gold())
-        description = []
-        for i, row in enumerate(results):
-            user = interaction.guild.get_member(row['user_id'])
-            username = user.display_name if user else f"User ID: {row['user_id']}"
-            total = row['wallet'] + row['bank']
-            description.append(f"**{i+1}.** {username} - **{currency_symbol} {total:,}**")
-        embed.description = "\n".join(description)
-        await interaction.followup.send(embed=embed)
+
+        def render(rows, start: int) -> discord.Embed:
+            embed = discord.Embed(title=f"🏆 Economy Leaderboard for {guild.name}", color=discord.Color.gold())
+            description = []
+            for i, row in enumerate(rows, start + 1):
+                user = guild.get_member(int(row['user_id']))
+                username = user.display_name if user else f"User ID: {row['user_id']}"
+                description.append(f"**{i}.** {username} - **{currency_symbol} {row['net_worth']:,}**")
+            embed.description = "\n".join(description)
+            return embed
+
+        if not await send_leaderboard(interaction, self.bot.economy_board, render):
+            await interaction.followup.send("There is no one on the leaderboard yet!")
         
     # --- Earning Commands ---
     @app_commands.command(name="daily", description="Claim your daily coins.")
-    @app_commands.checks.cooldown(1, 86400, key=lambda i: (i.guild_id, i.user.id))
+    @cooldown(1, 86400)
     async def daily(self, interaction: discord.Interaction):
-        amount = random.randint(500, 1500) # Increased daily amount
-        await self.update_balance(interaction.guild.id, interaction.user.id, wallet_change=amount)
+        amount = random.randint(*DAILY_REWARD)
+        await self.update_balance(interaction.guild.id, interaction.user.id, wallet_change=amount, reason="daily")
         conf = self.bot.get_guild_config(interaction.guild.id)
         currency_symbol = conf['economy']['currency_symbol']
         await interaction.response.send_message(f"🎉 You claimed your daily bonus of **{currency_symbol} {amount:,}**!")
 
     @app_commands.command(name="work", description="Work to earn some coins.")
-    @app_commands.checks.cooldown(1, 3600, key=lambda i: (i.guild_id, i.user.id))
+    @cooldown(1, 3600)
     async def work(self, interaction: discord.Interaction):
-        amount = random.randint(100, 400) # Increased work amount
-        await self.update_balance(interaction.guild.id, interaction.user.id, wallet_change=amount)
+        amount = random.randint(*WORK_REWARD)
+        await self.update_balance(interaction.guild.id, interaction.user.id, wallet_change=amount, reason="work")
         conf = self.bot.get_guild_config(interaction.guild.id)
         currency_symbol = conf['economy']['currency_symbol']
         response_template = random.choice(self.work_responses)
@@ -506,17 +533,40 @@ class Economy(commands.Cog, name="Economy"):
             if role in interaction.user.roles:
                  return await interaction.response.send_message("You already have this role!", ephemeral=True)
 
-            await self.update_balance(interaction.guild.id, interaction.user.id, wallet_change=-target_item['price'])
-            await interaction.user.add_roles(role, reason=f"Purchased from shop by {interaction.user}")
-            # Add to inventory to prevent re-buying
-            await self.bot.db.execute("INSERT INTO user_inventory (user_id, guild_id, item_id, item_type, quantity) VALUES (?, ?, ?, ?, ?)", (interaction.user.id, interaction.guild.id, item_id, 'role', 1))
+            # Payment and inventory entry (which prevents re-buying) are one transaction
+            if not await self._purchase(interaction, item_id, 'role', target_item['price']):
+                return
+            try:
+                await interaction.user.add_roles(role, reason=f"Purchased from shop by {interaction.user}")
+            except discord.HTTPException:
+                await self.ledger.apply(
+                    interaction.guild.id, [Change(interaction.user.id, wallet=target_item['price'])], "refund",
+                    [("DELETE FROM user_inventory WHERE user_id = ? AND guild_id = ? AND item_id = ?", (interaction.user.id, interaction.guild.id, item_id))]
+                )
+                return await interaction.response.send_message("I couldn't give you that role, so your coins were refunded. Please contact a server admin.", ephemeral=True)
             await interaction.response.send_message(f"👑 You have successfully purchased the **{target_item['name']}** role!")
         else: # Handle backgrounds and special items
             item_type = 'profile_background' if item_category == 'profile_backgrounds' else 'special_item'
-            await self.update_balance(interaction.guild.id, interaction.user.id, wallet_change=-target_item['price'])
-            await self.bot.db.execute("INSERT INTO user_inventory (user_id, guild_id, item_id, item_type, quantity) VALUES (?, ?, ?, ?, ?)", (interaction.user.id, interaction.guild.id, item_id, item_type, 1))
+            if not await self._purchase(interaction, item_id, item_type, target_item['price']):
+                return
             await interaction.response.send_message(f"🛍️ You have successfully purchased **{target_item['name']}**!")
 
+    async def _purchase(self, interaction: discord.Interaction, item_id: str, item_type: str, price: int) -> bool:
+        """Charges the user and adds the item to their inventory atomically. Responds and returns False on failure."""
+        try:
+            await self.ledger.apply(
+                interaction.guild.id, [Change(interaction.user.id, wallet=-price)], f"buy:{item_id}",
+                [("INSERT INTO user_inventory (user_id, guild_id, item_id, item_type, quantity) VALUES (?, ?, ?, ?, ?)",
+                  (interaction.user.id, interaction.guild.id, item_id, item_type, 1))]
+            )
+        except InsufficientFunds:
+            await interaction.response.send_message("You don't have enough money in your wallet to buy this.", ephemeral=True)
+            return False
+        except aiosqlite.IntegrityError:  # Bought concurrently by another command
+            await interaction.response.send_message("You already own this item!", ephemeral=True)
+            return False
+        return True
+
     @app_commands.command(name="inventory", description="View your purchased items.")
     async def inventory(self, interaction: discord.Interaction):
         items = await self.bot.db.fetchall("SELECT item_id, item_type, is_active FROM user_inventory WHERE user_id = ? AND guild_id = ?", (interaction.user.id, interaction.guild.id))
@@ -574,76 +624,67 @@ class Economy(commands.Cog, name="Economy"):
         
     # --- Gambling Commands ---
     @app_commands.command(name="slots", description="Play the slot machine.")
-    @app_commands.checks.cooldown(1, 5, key=lambda i: (i.guild_id, i.user.id))
+    @cooldown(1, 5)
     @app_commands.describe(bet="The amount you want to bet.")
     async def slots(self, interaction: discord.Interaction, bet: app_commands.Range[int, 1, 10000]):
-        bal = await self.get_balance(interaction.guild.id, interaction.user.id)
-        if bet > bal['wallet']:
-            return await interaction.response.send_message("You don't have enough money in your wallet to place that bet.", ephemeral=True)
-
-        await self.update_balance(interaction.guild.id, interaction.user.id, wallet_change=-bet)
-
-        emojis = ["🍒", "🍇", "🍊", "🍋", "🔔", "💎", "🍀"]
-        reels = [random.choice(emojis) for _ in range(3)]
+        reels = [random.choice(SLOT_SYMBOLS) for _ in range(3)]
         result_str = " | ".join(reels)
-
-        winnings = 0
-        if reels[0] == reels[1] == reels[2]:
-            winnings = bet * 10
-        elif reels[0] == reels[1] or reels[1] == reels[2]:
-            winnings = bet * 3
+        winnings = bet * slots_payout(reels)
 
         embed = discord.Embed(title="🎰 Slot Machine 🎰", color=discord.Color.gold())
         embed.add_field(name="Result", value=f"**[ {result_str} ]**", inline=False)
 
+        # The bet and the payout are settled in one change that requires the bet in the wallet
+        try:
+            result = await self.ledger.apply(interaction.guild.id, [Change(interaction.user.id, wallet=winnings - bet, requires=bet)], "slots")
+        except InsufficientFunds:
+            return await interaction.response.send_message("You don't have enough money in your wallet to place that bet.", ephemeral=True)
+
         if winnings > 0:
-            await self.update_balance(interaction.guild.id, interaction.user.id, wallet_change=winnings)
             embed.description = f"🎉 Congratulations! You won **{winnings:,}** coins!"
             embed.color = discord.Color.green()
         else:
             embed.description = "Better luck next time!"
             embed.color = discord.Color.red()
 
-        new_bal = await self.get_balance(interaction.guild.id, interaction.user.id)
-        embed.set_footer(text=f"Your new balance: {new_bal['wallet']:,}")
+        embed.set_footer(text=f"Your new balance: {result[interaction.user.id].wallet:,}")
         await interaction.response.send_message(embed=embed)
 
     @app_commands.command(name="flip", description="Bet on a coin flip.")
-    @app_commands.checks.cooldown(1, 5, key=lambda i: (i.guild_id, i.user.id))
+    @cooldown(1, 5)
     @app_commands.describe(bet="The amount to bet.", choice="Your choice: heads or tails.")
     @app_commands.choices(choice=[
         app_commands.Choice(name="Heads", value="heads"),
         app_commands.Choice(name="Tails", value="tails")
     ])
     async def flip(self, interaction: discord.Interaction, bet: app_commands.Range[int, 1, 25000], choice: app_commands.Choice[str]):
-        bal = await self.get_balance(interaction.guild.id, interaction.user.id)
-        if bet > bal['wallet']:
+        result = random.choice(["heads", "tails"])
+        won = result == choice.value
+        try:
+            # Win bet back + winnings, or lose the bet; either way the bet must be in the wallet
+            await self.ledger.apply(interaction.guild.id, [Change(interaction.user.id, wallet=bet * (FLIP_PAYOUT - 1) if won else -bet, requires=bet)], "flip")
+        except InsufficientFunds:
             return await interaction.response.send_message("You don't have enough money in your wallet for that bet.", ephemeral=True)
 
-        result = random.choice(["heads", "tails"])
-        
-        if result == choice.value:
-            winnings = bet * 2
-            await self.update_balance(interaction.guild.id, interaction.user.id, wallet_change=bet) # Win bet back + winnings
-            await interaction.response.send_message(f"🪙 The coin landed on **{result.title()}**. You won **{bet:,}** coins!")
+        if won:
+            await interaction.response.send_message(f"🪙 The coin landed on **{result.title()}**. You won **{bet * (FLIP_PAYOUT - 1):,}** coins!")
         else:
-            await self.update_balance(interaction.guild.id, interaction.user.id, wallet_change=-bet)
             await interaction.response.send_message(f"🪙 The coin landed on **{result.title()}**. You lost **{bet:,}** coins.")
 
     @app_commands.command(name="blackjack", description="Play a game of blackjack.")
-    @app_commands.checks.cooldown(1, 15, key=lambda i: (i.guild_id, i.user.id))
+    @cooldown(1, 15)
     @app_commands.describe(bet="The amount you want to bet.")
     async def blackjack(self, interaction: discord.Interaction, bet: app_commands.Range[int, 10, 50000]):
-        bal = await self.get_balance(interaction.guild.id, interaction.user.id)
-        if bet > bal['wallet']:
-            return await interaction.response.send_message("You don't have enough money in your wallet for that bet.", ephemeral=True)
-            
-        await self.update_balance(interaction.guild.id, interaction.user.id, wallet_change=-bet)
-        
         game = BlackjackGame()
         game.deal_initial()
         
         player_score = game._calculate_value(game.player_hand)
+        # A natural blackjack is settled at once; otherwise the bet is taken now and the view pays out
+        payout = int(bet * BLACKJACK_NATURAL_PAYOUT) if player_score == 21 else 0
+        try:
+            await self.ledger.apply(interaction.guild.id, [Change(interaction.user.id, wallet=payout - bet, requires=bet)], "blackjack")
+        except InsufficientFunds:
+            return await interaction.response.send_message("You don't have enough money in your wallet for that bet.", ephemeral=True)
 
         view = BlackjackView(game, self, interaction, bet)
 
@@ -652,9 +693,7 @@ class Economy(commands.Cog, name="Economy"):
         embed.add_field(name=f"Dealer's Hand ({game._calculate_value([game.dealer_hand[0]])})", value=game.hand_to_string(game.dealer_hand, hide_dealer_card=True), inline=False)
 
         if player_score == 21: # Natural Blackjack
-            winnings = int(bet * 2.5)
-            await self.update_balance(interaction.guild.id, interaction.user.id, wallet_change=winnings)
-            embed.description = f"BLACKJACK! You won **{winnings:,}** coins!"
+            embed.description = f"BLACKJACK! You won **{payout:,}** coins!"
             embed.color=discord.Color.gold()
             return await interaction.response.send_message(embed=embed)
             
@@ -662,7 +701,7 @@ class Economy(commands.Cog, name="Economy"):
 
 
     @app_commands.command(name="rob", description="Attempt to rob another user.")
-    @app_commands.checks.cooldown(1, 3600, key=lambda i: (i.guild_id, i.user.id))
+    @cooldown(1, 3600)
     @app_commands.describe(user="The user you want to rob.")
     async def rob(self, interaction: discord.Interaction, user: discord.Member):
         if user.id == interaction.user.id:
@@ -671,32 +710,41 @@ class Economy(commands.Cog, name="Economy"):
             return await interaction.response.send_message("You can't rob bots, they have nothing to steal!", ephemeral=True)
 
         robber_bal = await self.get_balance(interaction.guild.id, interaction.user.id)
-        if robber_bal['wallet'] < 250:
-            return await interaction.response.send_message("You need at least 250 coins in your wallet to attempt a robbery.", ephemeral=True)
+        if robber_bal['wallet'] < ROB_MIN_WALLET:
+            return await interaction.response.send_message(f"You need at least {ROB_MIN_WALLET} coins in your wallet to attempt a robbery.", ephemeral=True)
 
         target_bal = await self.get_balance(interaction.guild.id, user.id)
-        if target_bal['wallet'] < 100:
+        if target_bal['wallet'] < ROB_TARGET_MIN_WALLET:
             return await interaction.response.send_message(f"{user.display_name} is too poor to rob.", ephemeral=True)
         
         # Check for Robber's Mask
-        success_chance = 3 # 1 in 3 chance
+        success_chance = ROB_ODDS
         has_mask = await self.has_item(interaction.guild.id, interaction.user.id, 'robbers_mask')
+        # The mask breaks in the same transaction that settles the outcome
+        break_mask = [("DELETE FROM user_inventory WHERE user_id = ? AND guild_id = ? AND item_id = ?", (interaction.user.id, interaction.guild.id, 'robbers_mask'))] if has_mask else []
         if has_mask:
-            success_chance = 2 # 1 in 2 chance (50%)
-            await self.bot.db.execute("DELETE FROM user_inventory WHERE user_id = ? AND guild_id = ? AND item_id = ?", (interaction.user.id, interaction.guild.id, 'robbers_mask'))
+            success_chance = ROB_MASK_ODDS
             
         if random.randint(1, success_chance) == 1:
-            amount_stolen = random.randint(1, int(target_bal['wallet'] * 0.4)) # Can steal up to 40%
-            await self.update_balance(interaction.guild.id, interaction.user.id, wallet_change=amount_stolen)
-            await self.update_balance(interaction.guild.id, user.id, wallet_change=-amount_stolen)
+            amount_stolen = random.randint(1, int(target_bal['wallet'] * ROB_MAX_SHARE))
+            try:
+                await self.ledger.apply(
+                    interaction.guild.id, [Change(user.id, wallet=-amount_stolen), Change(interaction.user.id, wallet=amount_stolen)], "rob", break_mask
+                )
+            except InsufficientFunds:  # The target spent it in the meantime
+                return await interaction.response.send_message(f"{user.display_name} is too poor to rob.", ephemeral=True)
             msg = f"💰 Success! You robbed **{amount_stolen:,}** coins from {user.mention}!"
             if has_mask:
                 msg += "\n*Your Robber's Mask broke in the process.*"
             await interaction.response.send_message(msg)
         else:
-            fine = random.randint(50, 250)
+            fine = random.randint(*ROB_FINE)
             fine = min(fine, robber_bal['wallet']) # Can't pay more than you have
-            await self.update_balance(interaction.guild.id, interaction.user.id, wallet_change=-fine)
+            try:
+                await self.ledger.apply(interaction.guild.id, [Change(interaction.user.id, wallet=-fine)], "rob-fine", break_mask)
+            except InsufficientFunds:  # The wallet shrank since it was read; take what is left
+                fine = (await self.get_balance(interaction.guild.id, interaction.user.id))['wallet']
+                await self.ledger.apply(interaction.guild.id, [Change(interaction.user.id, wallet=-fine)], "rob-fine", break_mask)
             msg = f"👮‍♂️ You were caught! You paid a fine of **{fine:,}** coins."
             if has_mask:
                 msg += "\n*Your Robber's Mask broke in the process.*"
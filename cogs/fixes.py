@@ -17,6 +17,7 @@ LOG_CHANNEL_ID = 123456789012345678
 # --- ثوابت لمراقبة الأداء ---
 CPU_THRESHOLD = 85.0  # نسبة المعالج التي يتم التحذير عندها
 RAM_THRESHOLD = 85.0  # نسبة الذاكرة التي يتم التحذير عندها
+LOOP_LAG_THRESHOLD = 0.25  # تأخير حلقة الأحداث (بالثواني) الذي يتم التحذير عنده
 
 # --- إعداد مسجل الأخطاء (Logger) ---
 logger = logging.getLogger('discord') # استخدام الـ logger الخاص بـ discord.py لتوحيد المصدر
@@ -62,6 +63,16 @@ class Fixes(commands.Cog):
             logger.warning(warning_message)
             await self.log_to_channel(warning_message, "warning")
 
+        # تأخير حلقة الأحداث يكشف الأكواد التي تحجب البوت (I/O متزامن مثلاً)
+        if (loop_monitor := getattr(self.bot, 'loop_monitor', None)):
+            lag = loop_monitor.snapshot()
+            if lag['p99_lag'] > LOOP_LAG_THRESHOLD:
+                warning_message = f"⚠️ **تحذير: حلقة الأحداث متأخرة!**\n> p99: **{lag['p99_lag'] * 1000:.0f} ms** | الأقصى: **{lag['max_lag'] * 1000:.0f} ms**"
+                if lag['last_stall_location']:
+                    warning_message += f"\n> آخر استدعاء حاجب:\n```{lag['last_stall_location'][:900]}```"
+                logger.warning(warning_message)
+                await self.log_to_channel(warning_message, "warning")
+
     @monitor_system.before_loop
     async def before_monitor(self):
         """الانتظار حتى يصبح البوت جاهزاً قبل بدء المهمة"""
@@ -7,41 +7,44 @@ from discord.ext import commands, tasks
 import datetime
 from datetime import datetime as dt, UTC
 import random
-import aiohttp
 import os
 import re
-import humanize
-import psutil
 import time
 import asyncio
 import json
 import math
-import difflib
-import yt_dlp
-from PIL import Image, ImageDraw, ImageFont, ImageOps
-import google.generativeai as genai
 
 if TYPE_CHECKING:
     from ..bot import MaxyBot
 
 from .utils import cog_command_error
+from utils.content_pool import ContentPool, reddit_fetcher, tenor_fetcher
+
+MEME_SUBREDDITS = ["memes", "dankmemes", "wholesomememes", "me_irl"]
+GIF_QUERIES = ["anime slap", "anime hug"]  # Used by /slap and /hug, so prefetched on load
 
 class Fun(commands.Cog, name="Fun"):
     def __init__(self, bot: MaxyBot):
         self.bot = bot
         self.http_session = bot.http_session
+        api_key = os.getenv("TENOR_API_KEY")
+        self.gifs: Optional[ContentPool[str]] = ContentPool(tenor_fetcher(self.http_session, api_key)) if api_key else None
+        self.memes = ContentPool(reddit_fetcher(self.http_session))
+
+    async def cog_load(self):
+        if self.gifs is not None:
+            self.gifs.warm(GIF_QUERIES)
+        self.memes.warm(MEME_SUBREDDITS)
+
+    async def cog_unload(self):
+        if self.gifs is not None:
+            self.gifs.close()
+        self.memes.close()
 
     async def get_tenor_gif(self, query: str) -> Optional[str]:
-        api_key = os.getenv("TENOR_API_KEY")
-        if not api_key:
+        if self.gifs is None:
             return None
-        url = f"https://tenor.googleapis.com/v2/search?q={query}&key={api_key}&limit=20&media_filter=minimal"
-        async with self.http_session.get(url) as response:
-            if response.status == 200:
-                data = await response.json()
-                if data['results']:
-                    return random.choice(data['results'])['media_formats']['gif']['url']
-        return None
+        return await self.gifs.take(" ".join(query.lower().split()))
 
     async def cog_app_command_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
         await cog_command_error(interaction, error)
@@ -69,19 +72,13 @@ class Fun(commands.Cog, name="Fun"):
     @app_commands.command(name="meme", description="Gets a random meme from Reddit.")
     async def meme(self, interaction: discord.Interaction):
         await interaction.response.defer()
-        subreddits = ["memes", "dankmemes", "wholesomememes", "me_irl"]
-        try:
-            async with self.http_session.get(f"https://www.reddit.com/r/{random.choice(subreddits)}/random.json") as resp:
-                if resp.status != 200:
-                    return await interaction.followup.send("Could not fetch a meme, Reddit might be down.")
-                data = await resp.json()
-                post = data[0]['data']['children'][0]['data']
-                embed = discord.Embed(title=post['title'], url=f"https://reddit.com{post['permalink']}", color=discord.Color.orange())
-                embed.set_image(url=post['url'])
-                embed.set_footer(text=f"👍 {post['ups']} | 💬 {post['num_comments']} | r/{post['subreddit']}")
-                await interaction.followup.send(embed=embed)
-        except Exception as e:
-            await interaction.followup.send(f"An error occurred: {e}")
+        post = await self.memes.take(random.choice(MEME_SUBREDDITS))
+        if post is None:
+            return await interaction.followup.send("Could not fetch a meme, Reddit might be down.")
+        embed = discord.Embed(title=post['title'], url=f"https://reddit.com{post['permalink']}", color=discord.Color.orange())
+        embed.set_image(url=post['url'])
+        embed.set_footer(text=f"👍 {post['ups']} | 💬 {post['num_comments']} | r/{post['subreddit']}")
+        await interaction.followup.send(embed=embed)
 
     @app_commands.command(name="gif", description="Searches for a GIF on Tenor.")
     @app_commands.describe(query="What to search for.")
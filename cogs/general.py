@@ -7,24 +7,22 @@ from discord.ext import commands, tasks
 import datetime
 from datetime import datetime as dt, UTC
 import random
-import aiohttp
 import os
 import re
-import humanize
-import psutil
 import time
 import asyncio
 import json
 import math
-import difflib
-import yt_dlp
-from PIL import Image, ImageDraw, ImageFont, ImageOps
-import google.generativeai as genai
 
 if TYPE_CHECKING:
     from ..bot import MaxyBot
 
-from .utils import cog_command_error
+from .utils import cog_command_error, lazy_import
+from utils.cluster_ipc import cluster_gather, local_stats
+
+# Heavy libraries are only imported the first time they are used.
+humanize = lazy_import("humanize")
+psutil = lazy_import("psutil")
 
 class General(commands.Cog, name="General"):
     def __init__(self, bot: MaxyBot):
@@ -42,19 +40,23 @@ class General(commands.Cog, name="General"):
 
     @app_commands.command(name="stats", description="Displays detailed statistics about the bot.")
     async def stats(self, interaction: discord.Interaction):
-        process = psutil.Process(os.getpid())
-        mem_usage = process.memory_info().rss
+        await interaction.response.defer()
+        # Totals across every cluster process; just this process when not clustered.
+        clusters = list((await cluster_gather(self.bot, "stats", local_stats)).values())
+        mem_usage = sum(c["memory"] for c in clusters)
         uptime_delta = dt.now(UTC) - self.bot.start_time
         uptime_str = humanize.naturaldelta(uptime_delta)
         embed = discord.Embed(title=f"{self.bot.user.name} Statistics", color=discord.Color.blurple())
         embed.set_thumbnail(url=self.bot.user.avatar.url)
-        embed.add_field(name="📊 Servers", value=f"`{len(self.bot.guilds)}`", inline=True)
-        embed.add_field(name="👥 Users", value=f"`{len(self.bot.users)}`", inline=True)
+        embed.add_field(name="📊 Servers", value=f"`{sum(c['guilds'] for c in clusters)}`", inline=True)
+        embed.add_field(name="👥 Users", value=f"`{sum(c['users'] for c in clusters)}`", inline=True)
         embed.add_field(name="💻 CPU Usage", value=f"`{psutil.cpu_percent()}%`", inline=True)
         embed.add_field(name="🧠 Memory", value=f"`{humanize.naturalsize(mem_usage)}`", inline=True)
         embed.add_field(name="⬆️ Uptime", value=f"`{uptime_str}`", inline=True)
-        embed.add_field(name="🏓 Ping", value=f"`{round(self.bot.latency * 1000)}ms`", inline=True)
-        await interaction.response.send_message(embed=embed)
+        embed.add_field(name="🏓 Ping", value=f"`{round(sum(c['latency'] for c in clusters) / len(clusters) * 1000)}ms`", inline=True)
+        if self.bot.shard_count:
+            embed.add_field(name="🧩 Shards", value=f"`{self.bot.shard_count}` in `{len(clusters)}` cluster(s)", inline=True)
+        await interaction.followup.send(embed=embed)
 
     @app_commands.command(name="userinfo", description="Shows detailed information about a user.")
     @app_commands.describe(user="The user to get info about. Defaults to you.")
@@ -75,16 +77,20 @@ class General(commands.Cog, name="General"):
     @app_commands.command(name="serverinfo", description="Shows detailed information about the current server.")
     async def serverinfo(self, interaction: discord.Interaction):
         guild = interaction.guild
+        # The member cache may be partial (see utils/cache_profiles.py), so counts come from the directory
+        await interaction.response.defer()
+        members = await self.bot.member_directory.members(guild)
+        bots = sum(1 for m in members if m.bot)
         embed = discord.Embed(title=f"Server Info: {guild.name}", color=discord.Color.blue())
         if guild.icon:
             embed.set_thumbnail(url=guild.icon.url)
-        embed.add_field(name="Owner", value=guild.owner.mention, inline=True)
+        embed.add_field(name="Owner", value=f"<@{guild.owner_id}>", inline=True)
         embed.add_field(name="Server ID", value=f"`{guild.id}`", inline=True)
         embed.add_field(name="Created On", value=discord.utils.format_dt(guild.created_at, style='D'), inline=True)
-        embed.add_field(name="Members", value=f"**Total:** {guild.member_count}\n**Humans:** {len([m for m in guild.members if not m.bot])}\n**Bots:** {len([m for m in guild.members if m.bot])}", inline=True)
+        embed.add_field(name="Members", value=f"**Total:** {guild.member_count}\n**Humans:** {len(members) - bots}\n**Bots:** {bots}", inline=True)
         embed.add_field(name="Channels", value=f"**Text:** {len(guild.text_channels)}\n**Voice:** {len(guild.voice_channels)}", inline=True)
         embed.add_field(name="Roles", value=str(len(guild.roles)), inline=True)
-        await interaction.response.send_message(embed=embed)
+        await interaction.followup.send(embed=embed)
 
     @app_commands.command(name="avatar", description="Displays a user's avatar in high resolution.")
     @app_commands.describe(user="The user whose avatar to show.")
@@ -94,26 +100,39 @@ class General(commands.Cog, name="General"):
         embed.set_image(url=target.display_avatar.url)
         await interaction.response.send_message(embed=embed)
 
-    @app_commands.command(name="snipe", description="Shows the most recently deleted message in the channel.")
-    async def snipe(self, interaction: discord.Interaction):
-        snipe_data = self.bot.snipe_data.get(interaction.channel.id)
-        if not snipe_data:
+    def _snipe_author(self, interaction: discord.Interaction, author_id: int, author_name: str, embed: discord.Embed):
+        """Fills in the embed author from the member cache, falling back to the stored name."""
+        member = interaction.guild.get_member(author_id)
+        if member:
+            embed.color = member.color
+            embed.set_author(name=member.display_name, icon_url=member.display_avatar.url)
+        else:
+            embed.set_author(name=author_name)
+
+    @app_commands.command(name="snipe", description="Shows a recently deleted message in the channel.")
+    @app_commands.describe(index="1 is the most recent deletion, 2 the one before it, and so on.")
+    async def snipe(self, interaction: discord.Interaction, index: app_commands.Range[int, 1, 10] = 1):
+        record = self.bot.snipes.get(interaction.channel.id, index)
+        if not record:
             return await interaction.response.send_message("There's nothing to snipe!", ephemeral=True)
-        embed = discord.Embed(description=snipe_data['content'], color=snipe_data['author'].color, timestamp=snipe_data['timestamp'])
-        embed.set_author(name=snipe_data['author'].display_name, icon_url=snipe_data['author'].avatar.url)
-        if snipe_data['attachments']:
-            embed.set_image(url=snipe_data['attachments'][0])
+        embed = discord.Embed(description=record.content, timestamp=dt.fromtimestamp(record.created_at, UTC))
+        self._snipe_author(interaction, record.author_id, record.author_name, embed)
+        if record.attachments:
+            embed.set_image(url=record.attachments[0])
+        embed.set_footer(text=f"{index}/{self.bot.snipes.count(interaction.channel.id)}")
         await interaction.response.send_message(embed=embed)
 
-    @app_commands.command(name="editsnipe", description="Shows the original content of the most recently edited message.")
-    async def editsnipe(self, interaction: discord.Interaction):
-        snipe_data = self.bot.editsnipe_data.get(interaction.channel.id)
-        if not snipe_data:
+    @app_commands.command(name="editsnipe", description="Shows the original content of a recently edited message.")
+    @app_commands.describe(index="1 is the most recent edit, 2 the one before it, and so on.")
+    async def editsnipe(self, interaction: discord.Interaction, index: app_commands.Range[int, 1, 10] = 1):
+        record = self.bot.edit_snipes.get(interaction.channel.id, index)
+        if not record:
             return await interaction.response.send_message("There's no edited message to snipe!", ephemeral=True)
-        embed = discord.Embed(color=snipe_data['author'].color, timestamp=snipe_data['timestamp'])
-        embed.set_author(name=snipe_data['author'].display_name, icon_url=snipe_data['author'].avatar.url)
-        embed.add_field(name="Before", value=snipe_data['before_content'], inline=False)
-        embed.add_field(name="After", value=snipe_data['after_content'], inline=False)
+        embed = discord.Embed(timestamp=dt.fromtimestamp(record.created_at, UTC))
+        self._snipe_author(interaction, record.author_id, record.author_name, embed)
+        embed.add_field(name="Before", value=record.content[:1024] or "*empty*", inline=False)
+        embed.add_field(name="After", value=record.after_content[:1024] or "*empty*", inline=False)
+        embed.set_footer(text=f"{index}/{self.bot.edit_snipes.count(interaction.channel.id)}")
         await interaction.response.send_message(embed=embed)
 
     @app_commands.command(name="help", description="Shows a list of all available commands.")
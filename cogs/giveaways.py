@@ -7,19 +7,12 @@ from discord.ext import commands, tasks
 import datetime
 from datetime import datetime as dt, UTC
 import random
-import aiohttp
 import os
 import re
-import humanize
-import psutil
 import time
 import asyncio
 import json
 import math
-import difflib
-import yt_dlp
-from PIL import Image, ImageDraw, ImageFont, ImageOps
-import google.generativeai as genai
 
 if TYPE_CHECKING:
     from ..bot import MaxyBot
@@ -90,6 +83,8 @@ class Giveaways(commands.Cog, name="Giveaways"):
     async def check_giveaways(self):
         giveaways = await self.bot.db.fetchall("SELECT * FROM giveaways WHERE is_ended = 0 AND end_timestamp < ?", (dt.now(UTC).timestamp(),))
         for g in giveaways:
+            if not self.bot.owns_guild(g['guild_id']):
+                continue  # Another cluster process ends this one
             channel = self.bot.get_channel(g['channel_id'])
             if not channel:
                 await self.bot.db.execute("UPDATE giveaways SET is_ended = 1 WHERE message_id = ?", (g['message_id'],))
@@ -16,6 +16,8 @@ import datetime
 import sys
 import asyncio
 
+from utils.cluster_ipc import cluster_gather, local_guilds, local_stats
+
 # This allows for type hinting the bot class without circular imports
 if TYPE_CHECKING:
     from ..bot import MaxyBot
@@ -210,10 +212,29 @@ class HighAdmins(commands.Cog, name="👑 Root Administration"):
         embed.add_field(name="💾 Memory Usage", value=f"{mem_usage:.2f} MB", inline=True)
         embed.add_field(name="🧵 Threads", value=str(process.num_threads()), inline=True)
         
-        # Discord Info
-        embed.add_field(name="🌐 Servers", value=str(len(self.bot.guilds)), inline=True)
-        embed.add_field(name="👥 Users", value=f"{len(self.bot.users):,}", inline=True)
-        embed.add_field(name="\u200b", value="\u200b", inline=True) # Spacer
+        # Event Loop Info
+        lag = self.bot.loop_monitor.snapshot()
+        embed.add_field(name="🐢 Loop Lag", value=f"now {lag['last_lag'] * 1000:.1f} ms\np99 {lag['p99_lag'] * 1000:.1f} ms\nmax {lag['max_lag'] * 1000:.1f} ms", inline=True)
+        embed.add_field(name="🧱 Loop Stalls", value=str(lag['stall_count']), inline=True)
+        if lag['last_stall_location']:
+            stalled_at = datetime.datetime.fromtimestamp(lag['last_stall_at'], datetime.timezone.utc)
+            embed.add_field(name="📍 Last Blocking Call", value=f"{discord.utils.format_dt(stalled_at, 'R')}\n```{lag['last_stall_location'][:900]}```", inline=False)
+        else:
+            embed.add_field(name="\u200b", value="\u200b", inline=True) # Spacer
+
+        # Discord Info (whole cluster)
+        clusters = await cluster_gather(self.bot, "stats", local_stats)
+        embed.add_field(name="🌐 Servers", value=str(sum(c['guilds'] for c in clusters.values())), inline=True)
+        embed.add_field(name="👥 Users", value=f"{sum(c['users'] for c in clusters.values()):,}", inline=True)
+        if len(clusters) > 1:
+            lines = [
+                f"#{cid} · shards {c['shard_ids'][0]}-{c['shard_ids'][-1]} · {c['guilds']} guilds · {c['latency'] * 1000:.0f} ms · {c['memory'] / 1024**2:.0f} MB · p99 lag {c['p99_lag'] * 1000:.0f} ms"
+                if c['shard_ids'] else f"#{cid} · {c['guilds']} guilds"
+                for cid, c in sorted(clusters.items())
+            ]
+            embed.add_field(name=f"🧩 Clusters ({len(clusters)})", value="\n".join(lines)[:1024], inline=False)
+        else:
+            embed.add_field(name="\u200b", value="\u200b", inline=True) # Spacer
 
         # Software Info
         embed.add_field(name="🐍 Python", value=f"{sys.version_info.major}.{sys.version_info.minor}.{sys.version_info.micro}", inline=True)
@@ -297,6 +318,45 @@ class HighAdmins(commands.Cog, name="👑 Root Administration"):
         except Exception as e:
             await interaction.followup.send(f"🔥 | An SQL error occurred:\n```\n{e}\n```")
 
+    @is_bot_owner()
+    @app_commands.command(name="own-sql-profile", description="يعرض أبطأ استعلامات قاعدة البيانات حسب الوقت الكلي أو p99.")
+    @app_commands.describe(sort_by="ترتيب النتائج", limit="عدد الاستعلامات المعروضة", reset="مسح الإحصائيات بعد العرض")
+    @app_commands.choices(sort_by=[
+        app_commands.Choice(name="Total time", value="total"),
+        app_commands.Choice(name="p99 latency", value="p99"),
+    ])
+    async def sql_profile(self, interaction: discord.Interaction, sort_by: str = "total", limit: app_commands.Range[int, 1, 25] = 10, reset: bool = False):
+        await interaction.response.defer(ephemeral=True)
+        if not hasattr(self.bot, 'db'):
+            return await interaction.followup.send("❌ | Database connection not found.")
+
+        profiler = self.bot.db.profiler
+        top_queries = profiler.top(by=sort_by, limit=limit)
+        if not top_queries:
+            return await interaction.followup.send("🗃️ | No queries have been recorded yet.")
+
+        since = datetime.datetime.fromtimestamp(profiler.started_at, datetime.timezone.utc)
+        lines = [f"Top {len(top_queries)} queries by {sort_by} | tracking {len(profiler)} queries since {since:%Y-%m-%d %H:%M:%S} UTC", ""]
+        for i, stats in enumerate(top_queries, start=1):
+            lines.append(
+                f"#{i} calls={stats.calls:,} total={stats.total_time * 1000:,.1f}ms avg={stats.avg_time * 1000:.2f}ms "
+                f"p99={stats.percentile(99) * 1000:.2f}ms max={stats.max_time * 1000:.2f}ms "
+                f"rows={stats.total_rows:,} lock_wait={stats.total_lock_wait * 1000:,.1f}ms"
+            )
+            lines.append(f"    {stats.query}")
+
+        if reset:
+            profiler.reset()
+            lines.append("")
+            lines.append("Statistics have been reset.")
+
+        report = "\n".join(lines)
+        output = f"```\n{report}\n```"
+        if len(output) > 2000:
+            await interaction.followup.send("Report too long, sent as file.", file=discord.File(io.BytesIO(report.encode('utf-8')), "sql_profile.txt"))
+        else:
+            await interaction.followup.send(output)
+
     # =======================================================================================
     # SECTION: Bot Interaction Commands
     # =======================================================================================
@@ -452,8 +512,10 @@ class HighAdmins(commands.Cog, name="👑 Root Administration"):
     @guilds_group.command(name="list", description="عرض قائمة بكل السيرفرات التي يتواجد بها البوت.")
     async def guild_list(self, interaction: discord.Interaction):
         await interaction.response.defer(ephemeral=True, thinking=True)
-        guilds = sorted(self.bot.guilds, key=lambda g: g.member_count, reverse=True)
-        guild_list_str = "\n".join([f"- {g.name} (ID: {g.id}) | Members: {g.member_count}" for g in guilds])
+        # [id, name, member_count] from every cluster process
+        clusters = await cluster_gather(self.bot, "guilds", local_guilds, timeout=5.0)
+        guilds = sorted((g for gs in clusters.values() for g in gs), key=lambda g: g[2], reverse=True)
+        guild_list_str = "\n".join([f"- {name} (ID: {gid}) | Members: {members}" for gid, name, members in guilds])
         
         if len(guild_list_str) > 1900:
             await interaction.followup.send("القائمة طويلة جدًا، تم إرسالها كملف.", file=discord.File(io.BytesIO(guild_list_str.encode('utf-8')), "guilds.txt"))
@@ -77,7 +77,7 @@ class HighLogs(commands.Cog):
     # 🏠 Server Join logging
     @commands.Cog.listener()
     async def on_guild_join(self, guild: discord.Guild):
-        owner = guild.owner
+        owner = guild.owner or "Unknown"  # Not cached under the lean cache profile
         created_at = guild.created_at.strftime("%Y-%m-%d %H:%M:%S UTC")
         roles_count = len(guild.roles) - 1  # طرح @everyone
 
@@ -85,7 +85,7 @@ class HighLogs(commands.Cog):
             f"Bot joined new server!\n"
             f" ├─ Server Name: {guild.name}\n"
             f" ├─ Server ID: {guild.id}\n"
-            f" ├─ Owner: {owner} (ID: {owner.id if owner else 'Unknown'})\n"
+            f" ├─ Owner: {owner} (ID: {guild.owner_id})\n"
             f" ├─ Members: {guild.member_count}\n"
             f" ├─ Roles: {roles_count}\n"
             f" ├─ Text Channels: {len(guild.text_channels)}\n"
@@ -98,7 +98,7 @@ class HighLogs(commands.Cog):
     # ❌ Server Leave logging
     @commands.Cog.listener()
     async def on_guild_remove(self, guild: discord.Guild):
-        owner = guild.owner
+        owner = guild.owner or "Unknown"  # Not cached under the lean cache profile
         created_at = guild.created_at.strftime("%Y-%m-%d %H:%M:%S UTC")
         roles_count = len(guild.roles) - 1
 
@@ -109,7 +109,7 @@ class HighLogs(commands.Cog):
             f"Bot removed from server!\n"
             f" ├─ Server Name: {guild.name}\n"
             f" ├─ Server ID: {guild.id}\n"
-            f" ├─ Owner: {owner} (ID: {owner.id if owner else 'Unknown'})\n"
+            f" ├─ Owner: {owner} (ID: {guild.owner_id})\n"
             f" ├─ Members: {guild.member_count}\n"
             f" ├─ Roles: {roles_count}\n"
             f" ├─ Text Channels: {len(guild.text_channels)}\n"
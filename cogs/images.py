@@ -7,24 +7,21 @@ from discord.ext import commands, tasks
 import datetime
 from datetime import datetime as dt, UTC
 import random
-import aiohttp
 import os
 import re
-import humanize
-import psutil
 import time
 import asyncio
 import json
 import math
-import difflib
-import yt_dlp
-from PIL import Image, ImageDraw, ImageFont, ImageOps
-import google.generativeai as genai
 
 if TYPE_CHECKING:
     from ..bot import MaxyBot
 
-from .utils import cog_command_error
+from .utils import cog_command_error, lazy_import
+
+# Heavy libraries are only imported the first time they are used.
+Image = lazy_import("PIL.Image")
+ImageOps = lazy_import("PIL.ImageOps")
 
 class Images(commands.Cog, name="Images"):
     def __init__(self, bot: MaxyBot):
@@ -5,19 +5,17 @@ import discord
 from discord import app_commands
 from discord.ext import commands
 import random
-import time
 
 if TYPE_CHECKING:
     from ..bot import MaxyBot
 
 from .utils import cog_command_error
+from utils.outbound import Priority
+from utils.leaderboards import send_leaderboard
 
 class Leveling(commands.Cog, name="Leveling"):
     def __init__(self, bot: MaxyBot):
         self.bot = bot
-        # قاموس لتخزين أوقات آخر رسالة لكل مستخدم لمنع الإسبام
-        # Structure: {guild_id: {user_id: last_message_timestamp}}
-        self.cooldowns = {}
 
     async def cog_app_command_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
         await cog_command_error(interaction, error)
@@ -35,18 +33,10 @@ class Leveling(commands.Cog, name="Leveling"):
 
         guild_id = message.guild.id
         user_id = message.author.id
-        current_time = time.time()
 
-        # تطبيق نظام الكول داون (Cooldown)
-        if guild_id not in self.cooldowns:
-            self.cooldowns[guild_id] = {}
-
-        # 60 ثانية كول داون بين الرسائل التي تمنح XP
-        if user_id in self.cooldowns[guild_id] and current_time - self.cooldowns[guild_id][user_id] < 60:
+        # كول داون بين الرسائل التي تمنح XP (60 ثانية افتراضياً)
+        if self.bot.cooldowns.hit("xp", (guild_id, user_id), 1, conf['leveling'].get('xp_cooldown_seconds', 60)):
             return
-        
-        # تحديث وقت آخر رسالة للمستخدم
-        self.cooldowns[guild_id][user_id] = current_time
 
         # منح كمية عشوائية من XP (مثلاً بين 15 و 25)
         xp_to_add = random.randint(15, 25)
@@ -70,19 +60,23 @@ class Leveling(commands.Cog, name="Leveling"):
             await self.bot.db.execute("UPDATE leveling SET xp = ? WHERE guild_id = ? AND user_id = ?", (current_xp, guild_id, user_id))
 
         xp_needed_for_next_level = self.get_xp_for_level(current_level)
+        if current_xp < xp_needed_for_next_level:
+            self.bot.level_board.note_score(guild_id, user_id, (current_level, current_xp))
 
         if current_xp >= xp_needed_for_next_level:
             new_level = current_level + 1
             # احتساب الـ XP المتبقي بعد الترقية
             remaining_xp = current_xp - xp_needed_for_next_level
             await self.bot.db.execute("UPDATE leveling SET level = ?, xp = ? WHERE guild_id = ? AND user_id = ?", (new_level, remaining_xp, guild_id, user_id))
+            self.bot.level_board.note_score(guild_id, user_id, (new_level, remaining_xp))
 
             conf = self.bot.get_guild_config(guild_id)
             levelup_msg = conf['leveling'].get('levelup_message', "🎉 Congrats {user.mention}, you reached **Level {level}**!")
-            try:
-                await channel.send(levelup_msg.format(user=user, level=new_level), allowed_mentions=discord.AllowedMentions(users=True))
-            except discord.Forbidden:
-                pass
+            # Chatter: coalesced per member, so a burst of level-ups announces only the latest level
+            self.bot.outbound.submit(
+                channel, Priority.CHATTER, ("levelup", guild_id, user_id),
+                content=levelup_msg.format(user=user, level=new_level), allowed_mentions=discord.AllowedMentions(users=True)
+            )
 
             reward = await self.bot.db.fetchone("SELECT role_id FROM level_rewards WHERE guild_id = ? AND level = ?", (guild_id, new_level))
             if reward:
@@ -90,7 +84,7 @@ class Leveling(commands.Cog, name="Leveling"):
                     role = user.guild.get_role(reward['role_id'])
                     if role:
                         await user.add_roles(role, reason=f"Level {new_level} reward")
-                        await channel.send(f"🌟 As a reward, you've received the **{role.name}** role!")
+                        self.bot.outbound.submit(channel, Priority.CHATTER, content=f"🌟 As a reward, you've received the **{role.name}** role!")
                 except Exception as e:
                     self.bot.logger.error(f"Failed to grant level reward role in guild {guild_id}: {e}")
 
@@ -107,12 +101,7 @@ class Leveling(commands.Cog, name="Leveling"):
         xp = data['xp'] if data else 0
         xp_for_next_level = self.get_xp_for_level(level)
 
-        leaderboard = await self.bot.db.fetchall("SELECT user_id FROM leveling WHERE guild_id = ? ORDER BY level DESC, xp DESC", (interaction.guild.id,))
-        rank = 0
-        for i, entry in enumerate(leaderboard):
-            if entry['user_id'] == target.id:
-                rank = i + 1
-                break
+        rank = await self.bot.level_board.rank(interaction.guild.id, target.id) or 0
 
         embed = discord.Embed(title=f"Rank for {target.display_name}", color=target.color)
         embed.set_thumbnail(url=target.display_avatar.url)
@@ -124,20 +113,20 @@ class Leveling(commands.Cog, name="Leveling"):
     @app_commands.command(name="leaderboard-levels", description="Shows the server's leveling leaderboard.")
     async def leaderboard_levels(self, interaction: discord.Interaction):
         await interaction.response.defer()
-        query = "SELECT user_id, level, xp FROM leveling WHERE guild_id = ? ORDER BY level DESC, xp DESC LIMIT 10"
-        results = await self.bot.db.fetchall(query, (interaction.guild.id,))
-
-        if not results:
-            return await interaction.followup.send("There is no one on the leaderboard yet!")
-
-        embed = discord.Embed(title=f"🏆 Level Leaderboard for {interaction.guild.name}", color=discord.Color.gold())
-        description = []
-        for i, row in enumerate(results):
-            user = interaction.guild.get_member(row['user_id'])
-            username = user.display_name if user else f"User ID: {row['user_id']}"
-            description.append(f"**{i+1}.** {username} - **Level {row['level']}** ({row['xp']} XP)")
-        embed.description = "\n".join(description)
-        await interaction.followup.send(embed=embed)
+        guild = interaction.guild
+
+        def render(rows, start: int) -> discord.Embed:
+            embed = discord.Embed(title=f"🏆 Level Leaderboard for {guild.name}", color=discord.Color.gold())
+            description = []
+            for i, row in enumerate(rows, start + 1):
+                user = guild.get_member(int(row['user_id']))
+                username = user.display_name if user else f"User ID: {row['user_id']}"
+                description.append(f"**{i}.** {username} - **Level {row['level']}** ({row['xp']} XP)")
+            embed.description = "\n".join(description)
+            return embed
+
+        if not await send_leaderboard(interaction, self.bot.level_board, render):
+            await interaction.followup.send("There is no one on the leaderboard yet!")
 
     @app_commands.command(name="level-reward-add", description="[Admin] Set a role to be given at a certain level.")
     @app_commands.describe(level="The level to grant the role at.", role="The role to grant.")
@@ -7,24 +7,18 @@ from discord.ext import commands, tasks
 import datetime
 from datetime import datetime as dt, UTC
 import random
-import aiohttp
 import os
 import re
-import humanize
-import psutil
 import time
 import asyncio
 import json
 import math
-import difflib
-import yt_dlp
-from PIL import Image, ImageDraw, ImageFont, ImageOps
-import google.generativeai as genai
 
 if TYPE_CHECKING:
     from ..bot import MaxyBot
 
 from .utils import cog_command_error
+from utils.outbound import Priority
 
 class Logging(commands.Cog, name="Logging"):
     def __init__(self, bot: MaxyBot):
@@ -59,7 +53,7 @@ class Logging(commands.Cog, name="Logging"):
         content = message.content if message.content else "No message content (might be an embed or image)."
         embed.add_field(name="Content", value=f"```{content[:1020]}```", inline=False)
         embed.set_footer(text=f"Author ID: {message.author.id} | Message ID: {message.id}")
-        await log_channel.send(embed=embed)
+        self.bot.outbound.submit(log_channel, Priority.MODERATION, embed=embed)
 
     async def log_message_edit(self, before: discord.Message, after: discord.Message):
         if not before.guild: return
@@ -72,7 +66,7 @@ class Logging(commands.Cog, name="Logging"):
         embed.add_field(name="Before", value=f"```{before_content[:1020]}```", inline=False)
         embed.add_field(name="After", value=f"```{after_content[:1020]}```", inline=False)
         embed.set_footer(text=f"Author ID: {before.author.id} | Message ID: {before.id}")
-        await log_channel.send(embed=embed)
+        self.bot.outbound.submit(log_channel, Priority.MODERATION, embed=embed)
 
     async def log_member_update(self, before: discord.Member, after: discord.Member):
         log_channel = await self.get_log_channel(before.guild.id)
@@ -84,7 +78,7 @@ class Logging(commands.Cog, name="Logging"):
             embed.title = "Nickname Changed"
             embed.add_field(name="Before", value=f"`{before.nick}`", inline=True)
             embed.add_field(name="After", value=f"`{after.nick}`", inline=True)
-            await log_channel.send(embed=embed)
+            self.bot.outbound.submit(log_channel, Priority.MODERATION, embed=embed)
 
         if before.roles != after.roles:
             embed = discord.Embed(color=discord.Color.blue(), timestamp=dt.now(UTC))
@@ -99,19 +93,19 @@ class Logging(commands.Cog, name="Logging"):
                 embed.add_field(name="Removed Roles", value=", ".join(removed_roles), inline=False)
 
             if added_roles or removed_roles:
-                await log_channel.send(embed=embed)
+                self.bot.outbound.submit(log_channel, Priority.MODERATION, embed=embed)
 
     async def log_role_create(self, role: discord.Role):
         log_channel = await self.get_log_channel(role.guild.id)
         if not log_channel: return
         embed = discord.Embed(title="Role Created", description=f"Role {role.mention} (`{role.name}`) was created.", color=discord.Color.green(), timestamp=dt.now(UTC))
-        await log_channel.send(embed=embed)
+        self.bot.outbound.submit(log_channel, Priority.MODERATION, embed=embed)
 
     async def log_role_delete(self, role: discord.Role):
         log_channel = await self.get_log_channel(role.guild.id)
         if not log_channel: return
         embed = discord.Embed(title="Role Deleted", description=f"Role `{role.name}` was deleted.", color=discord.Color.red(), timestamp=dt.now(UTC))
-        await log_channel.send(embed=embed)
+        self.bot.outbound.submit(log_channel, Priority.MODERATION, embed=embed)
 
     async def log_role_update(self, before: discord.Role, after: discord.Role):
         log_channel = await self.get_log_channel(before.guild.id)
@@ -126,19 +120,19 @@ class Logging(commands.Cog, name="Logging"):
             embed.add_field(name="Color Change", value=f"`{before.color}` -> `{after.color}`", inline=False)
         if before.permissions != after.permissions:
             embed.add_field(name="Permissions Changed", value="Use audit log for details.", inline=False)
-        await log_channel.send(embed=embed)
+        self.bot.outbound.submit(log_channel, Priority.MODERATION, embed=embed)
 
     async def log_channel_create(self, channel: discord.abc.GuildChannel):
         log_channel = await self.get_log_channel(channel.guild.id)
         if not log_channel: return
         embed = discord.Embed(title="Channel Created", description=f"Channel {channel.mention} (`{channel.name}`) was created.", color=discord.Color.green(), timestamp=dt.now(UTC))
-        await log_channel.send(embed=embed)
+        self.bot.outbound.submit(log_channel, Priority.MODERATION, embed=embed)
 
     async def log_channel_delete(self, channel: discord.abc.GuildChannel):
         log_channel = await self.get_log_channel(channel.guild.id)
         if not log_channel: return
         embed = discord.Embed(title="Channel Deleted", description=f"Channel `{channel.name}` was deleted.", color=discord.Color.red(), timestamp=dt.now(UTC))
-        await log_channel.send(embed=embed)
+        self.bot.outbound.submit(log_channel, Priority.MODERATION, embed=embed)
 
     async def log_channel_update(self, before: discord.abc.GuildChannel, after: discord.abc.GuildChannel):
         log_channel = await self.get_log_channel(before.guild.id)
@@ -149,7 +143,7 @@ class Logging(commands.Cog, name="Logging"):
         if isinstance(before, discord.TextChannel) and isinstance(after, discord.TextChannel) and before.topic != after.topic:
             embed.add_field(name="Topic Change", value="Topic was updated.", inline=False)
         if len(embed.fields) > 0:
-            await log_channel.send(embed=embed)
+            self.bot.outbound.submit(log_channel, Priority.MODERATION, embed=embed)
 
     async def log_voice_state_update(self, member: discord.Member, before: discord.VoiceState, after: discord.VoiceState):
         log_channel = await self.get_log_channel(member.guild.id)
@@ -160,17 +154,17 @@ class Logging(commands.Cog, name="Logging"):
             embed.title = "Member Joined Voice"
             embed.description = f"{member.mention} joined voice channel {after.channel.mention}"
             embed.color = discord.Color.green()
-            await log_channel.send(embed=embed)
+            self.bot.outbound.submit(log_channel, Priority.MODERATION, embed=embed)
         elif before.channel and not after.channel:
             embed.title = "Member Left Voice"
             embed.description = f"{member.mention} left voice channel {before.channel.mention}"
             embed.color = discord.Color.red()
-            await log_channel.send(embed=embed)
+            self.bot.outbound.submit(log_channel, Priority.MODERATION, embed=embed)
         elif before.channel and after.channel and before.channel != after.channel:
             embed.title = "Member Moved Voice"
             embed.description = f"{member.mention} moved from {before.channel.mention} to {after.channel.mention}"
             embed.color = discord.Color.blue()
-            await log_channel.send(embed=embed)
+            self.bot.outbound.submit(log_channel, Priority.MODERATION, embed=embed)
 
 async def setup(bot: MaxyBot):
     await bot.add_cog(Logging(bot))
\ No newline at end of file
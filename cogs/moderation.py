@@ -1,5 +1,5 @@
 from __future__ import annotations
-from typing import TYPE_CHECKING, Optional, List, Union
+from typing import TYPE_CHECKING, Optional, Dict, List, Union
 import io
 import discord
 from discord import app_commands
@@ -7,28 +7,75 @@ from discord.ext import commands, tasks
 import datetime
 from datetime import datetime as dt, UTC
 import random
-import aiohttp
 import os
 import re
-import humanize
-import psutil
 import time
 import asyncio
 import json
 import math
-import difflib
-import yt_dlp
-from PIL import Image, ImageDraw, ImageFont, ImageOps
-import google.generativeai as genai
 
 if TYPE_CHECKING:
     from ..bot import MaxyBot
 
-from .utils import cog_command_error
+from .utils import cog_command_error, lazy_import
+from utils.bulk_moderation import BulkModerationExecutor, ModerationJob
+
+# Heavy libraries are only imported the first time they are used.
+humanize = lazy_import("humanize")
+
+DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+MAX_TIMEOUT = 2419200  # 28 days
+# The permission a bulk job needs, both to start it and to cancel it
+BULK_PERMISSIONS = {"ban": "ban_members", "kick": "kick_members", "timeout": "moderate_members", "purge": "manage_messages"}
+
+
+def parse_seconds(duration: str) -> int:
+    """Parses durations like `10m` or `1h30m`; returns 0 if there is nothing to parse."""
+    return sum(int(value) * DURATION_UNITS[unit] for value, unit in re.findall(r"(\d+)([smhdw])", duration.lower()))
+
+
+class BulkConfirmView(discord.ui.View):
+    """Asks the moderator to confirm a bulk action before it starts."""
+    def __init__(self, author_id: int):
+        super().__init__(timeout=60.0)
+        self.value: Optional[bool] = None
+        self.author_id = author_id
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.author_id:
+            await interaction.response.send_message("This confirmation is not for you.", ephemeral=True)
+            return False
+        return True
+
+    @discord.ui.button(label="Confirm", style=discord.ButtonStyle.danger)
+    async def confirm(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.value = True
+        await interaction.response.defer()
+        self.stop()
+
+    @discord.ui.button(label="Cancel", style=discord.ButtonStyle.secondary)
+    async def cancel(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.value = False
+        await interaction.response.defer()
+        self.stop()
+
 
 class Moderation(commands.Cog, name="Moderation"):
     def __init__(self, bot: MaxyBot):
         self.bot = bot
+        self.bulk = BulkModerationExecutor(bot, bot.db)
+
+    async def cog_load(self):
+        # Jobs interrupted by a restart continue, reporting progress in the channel they were started in
+        for job in await self.bulk.load():
+            if not self.bot.owns_guild(job.guild_id):
+                self.bulk.jobs.pop(job.job_id, None)
+                continue  # Another cluster process resumes this one
+            self.bulk.start(job, self._channel_progress(job))
+            self.bot.logger.info(f"Resumed bulk {job.action} job {job.job_id} at {job.cursor}/{len(job.targets)}.")
+
+    async def cog_unload(self):
+        self.bulk.close()
 
     async def cog_app_command_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
         await cog_command_error(interaction, error)
@@ -57,7 +104,7 @@ class Moderation(commands.Cog, name="Moderation"):
     async def kick(self, interaction: discord.Interaction, member: discord.Member, reason: Optional[str] = "No reason provided."):
         if member.id == interaction.user.id:
             return await interaction.response.send_message("You cannot kick yourself.", ephemeral=True)
-        if member.top_role >= interaction.user.top_role and interaction.guild.owner.id != interaction.user.id:
+        if member.top_role >= interaction.user.top_role and interaction.guild.owner_id != interaction.user.id:
             return await interaction.response.send_message("You cannot kick a member with a higher or equal role.", ephemeral=True)
 
         try:
@@ -72,7 +119,7 @@ class Moderation(commands.Cog, name="Moderation"):
     async def ban(self, interaction: discord.Interaction, member: discord.Member, reason: Optional[str] = "No reason provided."):
         if member.id == interaction.user.id:
             return await interaction.response.send_message("You cannot ban yourself.", ephemeral=True)
-        if member.top_role >= interaction.user.top_role and interaction.guild.owner.id != interaction.user.id:
+        if member.top_role >= interaction.user.top_role and interaction.guild.owner_id != interaction.user.id:
             return await interaction.response.send_message("You cannot ban a member with a higher or equal role.", ephemeral=True)
 
         try:
@@ -85,16 +132,11 @@ class Moderation(commands.Cog, name="Moderation"):
     @app_commands.describe(member="The member to mute.", duration="Duration (e.g. 5m, 1h, 2d, 1w). Max 28 days.", reason="The reason for the mute.")
     @app_commands.checks.has_permissions(moderate_members=True)
     async def timeout(self, interaction: discord.Interaction, member: discord.Member, duration: str, reason: Optional[str] = "No reason provided."):
-        units = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
-        seconds = 0
-        match = re.findall(r"(\d+)([smhdw])", duration.lower())
-        if not match:
+        if not re.search(r"\d+[smhdw]", duration.lower()):
             return await interaction.response.send_message("Invalid duration format. Use `10s`, `5m`, `2h`, `3d`, `1w`.", ephemeral=True)
 
-        for value, unit in match:
-            seconds += int(value) * units[unit]
-
-        if seconds <= 0 or seconds > 2419200:
+        seconds = parse_seconds(duration)
+        if seconds <= 0 or seconds > MAX_TIMEOUT:
             return await interaction.response.send_message("Invalid duration. Duration must be between 1 second and 28 days.", ephemeral=True)
 
         delta = datetime.timedelta(seconds=seconds)
@@ -191,5 +233,142 @@ class Moderation(commands.Cog, name="Moderation"):
         else:
             await interaction.response.send_message(f"Slowmode has been set to {seconds} seconds.")
 
+    # --- Bulk Moderation ---
+    mass = app_commands.Group(name="mass", description="Bulk moderation for cleaning up after raids.", guild_only=True)
+
+    async def _resolve_members(self, interaction: discord.Interaction, members: Optional[str], joined_within: Optional[str],
+                               allow_non_members: bool = False) -> List[int]:
+        """
+        Member ids from mentions/ids in `members` plus everyone who joined within the given duration.
+        Every target is resolved to a Member for the role check, since the member cache may be partial;
+        ids that are not members are kept only if `allow_non_members` (bans), and failed lookups are dropped.
+        """
+        guild = interaction.guild
+        listed = {int(match) for match in re.findall(r"\d{15,20}", members or "")}
+        resolved: Dict[int, discord.Member] = {}
+        if joined_within and (seconds := parse_seconds(joined_within)):
+            since = dt.now(UTC) - datetime.timedelta(seconds=seconds)
+            resolved.update((m.id, m) for m in await self.bot.member_directory.members(guild) if m.joined_at and m.joined_at >= since)
+
+        # Never the moderator, the bot or the owner, nor anyone the moderator could not act on one by one
+        protected = {interaction.user.id, self.bot.user.id, guild.owner_id}
+        is_owner = interaction.user.id == guild.owner_id
+        targets = []
+        for member_id in sorted((listed | resolved.keys()) - protected):
+            member = resolved.get(member_id) or guild.get_member(member_id)
+            if member is None:
+                try:
+                    member = await guild.fetch_member(member_id)
+                except discord.NotFound:
+                    if allow_non_members:
+                        targets.append(member_id)  # Not in the guild, so there is no role to outrank
+                    continue
+                except discord.HTTPException:
+                    continue
+            if is_owner or member.top_role < interaction.user.top_role:
+                targets.append(member_id)
+        return targets
+
+    def _channel_progress(self, job: ModerationJob):
+        """Reports progress in one message in the job's channel, sent on the first report."""
+        message: Optional[discord.Message] = None
+
+        async def progress(job: ModerationJob):
+            nonlocal message
+            if message is None:
+                channel = self.bot.get_channel(job.channel_id) or self.bot.get_partial_messageable(job.channel_id)
+                message = await channel.send(f"🛠️ {job.progress()}")
+            else:
+                await message.edit(content=f"🛠️ {job.progress()}")
+        return progress
+
+    async def _run_bulk(self, interaction: discord.Interaction, action: str, targets: List[int], reason: str, params: dict, summary: str):
+        """
+        Confirms a bulk action, starts it and keeps the command's response updated with its progress.
+        The command must have deferred ephemerally: resolving targets can take longer than Discord's 3 seconds.
+        """
+        if not targets:
+            return await interaction.edit_original_response(content="No matching targets.")
+        view = BulkConfirmView(interaction.user.id)
+        await interaction.edit_original_response(content=f"⚠️ {summary} Continue?", view=view)
+        await view.wait()
+        if not view.value:
+            return await interaction.edit_original_response(content="Cancelled.", view=None)
+
+        job = await self.bulk.create(interaction.guild.id, interaction.user.id, interaction.channel_id, action, targets,
+                                     f"{reason} (Bulk {action} by {interaction.user})", params)
+
+        async def progress(job: ModerationJob):
+            await interaction.edit_original_response(content=f"🛠️ {job.progress()}", view=None)
+        await progress(job)
+        self.bulk.start(job, progress)
+
+    @mass.command(name="ban", description="Bans many members at once (listed, or who joined recently).")
+    @app_commands.describe(members="Mentions or IDs, separated by spaces.", joined_within="Also everyone who joined within this time (e.g. 10m, 1h).",
+                           delete_days="Days of their messages to delete (0-7).", reason="The reason for the bans.")
+    @app_commands.checks.has_permissions(ban_members=True)
+    async def mass_ban(self, interaction: discord.Interaction, members: Optional[str] = None, joined_within: Optional[str] = None,
+                       delete_days: app_commands.Range[int, 0, 7] = 0, reason: Optional[str] = "Raid cleanup"):
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        targets = await self._resolve_members(interaction, members, joined_within, allow_non_members=True)
+        await self._run_bulk(interaction, "ban", targets, reason, {"delete_seconds": delete_days * 86400}, f"This will ban **{len(targets)}** members.")
+
+    @mass.command(name="kick", description="Kicks many members at once (listed, or who joined recently).")
+    @app_commands.describe(members="Mentions or IDs, separated by spaces.", joined_within="Also everyone who joined within this time (e.g. 10m, 1h).",
+                           reason="The reason for the kicks.")
+    @app_commands.checks.has_permissions(kick_members=True)
+    async def mass_kick(self, interaction: discord.Interaction, members: Optional[str] = None, joined_within: Optional[str] = None,
+                        reason: Optional[str] = "Raid cleanup"):
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        targets = await self._resolve_members(interaction, members, joined_within)
+        await self._run_bulk(interaction, "kick", targets, reason, {}, f"This will kick **{len(targets)}** members.")
+
+    @mass.command(name="timeout", description="Times out many members at once (listed, or who joined recently).")
+    @app_commands.describe(duration="Duration (e.g. 5m, 1h, 2d, 1w). Max 28 days.", members="Mentions or IDs, separated by spaces.",
+                           joined_within="Also everyone who joined within this time (e.g. 10m, 1h).", reason="The reason for the timeouts.")
+    @app_commands.checks.has_permissions(moderate_members=True)
+    async def mass_timeout(self, interaction: discord.Interaction, duration: str, members: Optional[str] = None,
+                           joined_within: Optional[str] = None, reason: Optional[str] = "Raid cleanup"):
+        seconds = parse_seconds(duration)
+        if seconds <= 0 or seconds > MAX_TIMEOUT:
+            return await interaction.response.send_message("Invalid duration. Duration must be between 1 second and 28 days.", ephemeral=True)
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        targets = await self._resolve_members(interaction, members, joined_within)
+        await self._run_bulk(interaction, "timeout", targets, reason, {"seconds": seconds},
+                             f"This will time out **{len(targets)}** members for {humanize.naturaldelta(datetime.timedelta(seconds=seconds))}.")
+
+    @mass.command(name="purge", description="Deletes a user's messages from the last 14 days in every channel.")
+    @app_commands.describe(user="The user whose messages to delete.", reason="The reason for the purge.")
+    @app_commands.checks.has_permissions(manage_messages=True)
+    async def mass_purge(self, interaction: discord.Interaction, user: discord.User, reason: Optional[str] = "Raid cleanup"):
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        me = interaction.guild.me
+        channels = [c.id for c in interaction.guild.text_channels
+                    if (perms := c.permissions_for(me)).read_message_history and perms.manage_messages]
+        await self._run_bulk(interaction, "purge", channels, reason, {"user_id": user.id},
+                             f"This will delete {user.mention}'s messages from the last 14 days in **{len(channels)}** channels.")
+
+    @mass.command(name="jobs", description="Shows the bulk moderation jobs of this server.")
+    @app_commands.checks.has_permissions(moderate_members=True)
+    async def mass_jobs(self, interaction: discord.Interaction):
+        jobs = [job for job in self.bulk.jobs.values() if job.guild_id == interaction.guild.id]
+        if not jobs:
+            return await interaction.response.send_message("There are no bulk jobs since the bot started.", ephemeral=True)
+        lines = [job.progress() for job in sorted(jobs, key=lambda job: job.job_id, reverse=True)[:10]]
+        await interaction.response.send_message("\n".join(lines), ephemeral=True)
+
+    @mass.command(name="cancel", description="Stops a running bulk moderation job.")
+    @app_commands.describe(job_id="The job number shown in its progress message.")
+    async def mass_cancel(self, interaction: discord.Interaction, job_id: int):
+        job = self.bulk.jobs.get(job_id)
+        if job is None or job.guild_id != interaction.guild.id or job.status != "running":
+            return await interaction.response.send_message("No running job with that number in this server.", ephemeral=True)
+        permission = BULK_PERMISSIONS[job.action]
+        if not getattr(interaction.permissions, permission):
+            # Checked here rather than with a decorator: the permission depends on the job
+            return await interaction.response.send_message(f"You need the `{permission}` permission to cancel a bulk {job.action}.", ephemeral=True)
+        await self.bulk.cancel(job)
+        await interaction.response.send_message(f"⏹️ {job.progress()}", ephemeral=True)
+
 async def setup(bot: MaxyBot):
     await bot.add_cog(Moderation(bot))
\ No newline at end of file
@@ -7,38 +7,39 @@ from discord.ext import commands, tasks
 import datetime
 from datetime import datetime as dt, UTC
 import random
-import aiohttp
 import os
 import re
-import humanize
-import psutil
 import time
 import asyncio
+import functools
 import json
 import math
-import difflib
-import yt_dlp
-from PIL import Image, ImageDraw, ImageFont, ImageOps
-import google.generativeai as genai
 
 if TYPE_CHECKING:
     from ..bot import MaxyBot
 
-from .utils import cog_command_error
+from .utils import cog_command_error, lazy_import
+
+# Heavy libraries are only imported the first time they are used.
+yt_dlp = lazy_import("yt_dlp")
 
 class Music(commands.Cog, name="Music"):
     def __init__(self, bot: MaxyBot):
         self.bot = bot
         self.FFMPEG_OPTIONS = {'before_options': '-reconnect 1 -reconnect_streamed 1 -reconnect_delay_max 5', 'options': '-vn'}
-        self.ytdl = yt_dlp.YoutubeDL({
+        self.queues = {}
+        self.current_song = {}
+        self.loop_states = {}
+
+    @functools.cached_property
+    def ytdl(self):
+        # Created on first use so that loading the cog doesn't pay for importing yt_dlp.
+        return yt_dlp.YoutubeDL({
             'format': 'bestaudio/best', 'outtmpl': '%(extractor)s-%(id)s-%(title)s.%(ext)s',
             'restrictfilenames': True, 'noplaylist': True, 'nocheckcertificate': True,
             'ignoreerrors': False, 'logtostderr': False, 'quiet': True, 'no_warnings': True,
             'default_search': 'auto', 'source_address': '0.0.0.0'
         })
-        self.queues = {}
-        self.current_song = {}
-        self.loop_states = {}
 
     async def cog_app_command_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
         await cog_command_error(interaction, error)
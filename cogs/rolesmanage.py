@@ -10,6 +10,9 @@ import discord
 from discord import app_commands
 from discord.ext import commands
 
+# __init__ looks up the Utils cog, so it has to be loaded first.
+COG_DEPENDENCIES = ("cogs.utils",)
+
 class RolesManage(commands.Cog):
     """Cog كامل لإدارة الرتب متوافق مع MaxyBot وUtils Cog"""
 
@@ -65,7 +68,8 @@ class RolesManage(commands.Cog):
         embed = discord.Embed(title=f"معلومات الرتبة: {role.name}", colour=role.colour)
         embed.add_field(name="ID", value=role.id)
         embed.add_field(name="Position", value=role.position)
-        embed.add_field(name="الأعضاء", value=len(role.members))
+        members = await self.bot.member_directory.members(interaction.guild)
+        embed.add_field(name="الأعضاء", value=sum(1 for member in members if member.get_role(role.id)))
         embed.set_footer(text=f"تم الإنشاء بتاريخ: {role.created_at.strftime('%Y-%m-%d')}")
         await self.utils.safe_send(interaction.channel, embed=embed)
 
@@ -116,7 +120,7 @@ class RolesManage(commands.Cog):
     @app_commands.default_permissions(manage_roles=True)
     async def giveall(self, interaction: discord.Interaction, role: discord.Role):
         try:
-            for member in interaction.guild.members:
+            for member in await self.bot.member_directory.members(interaction.guild):
                 if role not in member.roles:
                     await member.add_roles(role)
             await self.utils.safe_send(interaction.channel, f"✅ تم إعطاء رتبة {role.name} لكل الأعضاء")
@@ -127,7 +131,7 @@ class RolesManage(commands.Cog):
     @app_commands.default_permissions(manage_roles=True)
     async def removeall(self, interaction: discord.Interaction, role: discord.Role):
         try:
-            for member in interaction.guild.members:
+            for member in await self.bot.member_directory.members(interaction.guild):
                 if role in member.roles:
                     await member.remove_roles(role)
             await self.utils.safe_send(interaction.channel, f"✅ تم إزالة رتبة {role.name} من كل الأعضاء")
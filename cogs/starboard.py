@@ -0,0 +1,58 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+
+import discord
+from discord.ext import commands
+
+if TYPE_CHECKING:
+    from ..bot import MaxyBot
+
+from utils.starboard import STAR, StarboardEngine
+
+
+class Starboard(commands.Cog, name="Starboard"):
+    """Reposts messages that reach the guild's star threshold; configured with /setup-starboard."""
+
+    def __init__(self, bot: MaxyBot):
+        self.bot = bot
+        self.engine = StarboardEngine(bot, bot.db)
+
+    async def cog_load(self):
+        posts = await self.engine.load()
+        self.bot.logger.info(f"Starboard loaded with {posts} existing posts.")
+
+    async def cog_unload(self):
+        self.engine.close()
+
+    def _watched(self, payload) -> bool:
+        """True for star reactions on guild messages outside the starboard channel itself."""
+        if payload.guild_id is None:
+            return False
+        if getattr(payload, "emoji", None) is not None and str(payload.emoji) != STAR:
+            return False
+        conf = self.bot.get_guild_config(payload.guild_id)['starboard']
+        return bool(conf.get('enabled')) and payload.channel_id != conf.get('channel_id')
+
+    @commands.Cog.listener()
+    async def on_raw_reaction_add(self, payload: discord.RawReactionActionEvent):
+        if self._watched(payload):
+            self.engine.react(payload.guild_id, payload.channel_id, payload.message_id, +1)
+
+    @commands.Cog.listener()
+    async def on_raw_reaction_remove(self, payload: discord.RawReactionActionEvent):
+        if self._watched(payload):
+            self.engine.react(payload.guild_id, payload.channel_id, payload.message_id, -1)
+
+    @commands.Cog.listener()
+    async def on_raw_reaction_clear(self, payload: discord.RawReactionClearEvent):
+        if self._watched(payload):
+            self.engine.clear(payload.guild_id, payload.channel_id, payload.message_id)
+
+    @commands.Cog.listener()
+    async def on_raw_reaction_clear_emoji(self, payload: discord.RawReactionClearEmojiEvent):
+        if self._watched(payload):
+            self.engine.clear(payload.guild_id, payload.channel_id, payload.message_id)
+
+
+async def setup(bot: MaxyBot):
+    await bot.add_cog(Starboard(bot))
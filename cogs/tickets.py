@@ -3,18 +3,33 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 import asyncio
-import os
-import aiofiles
+import re
 from datetime import datetime
+from typing import Optional
 
-TRANSCRIPTS_DIR = "transcripts"
+from utils.ticket_store import TicketRecord, TicketStore
+from utils.transcripts import TranscriptExporter
 
-if not os.path.exists(TRANSCRIPTS_DIR):
-    os.makedirs(TRANSCRIPTS_DIR)
+LEGACY_TOPIC_OWNER = re.compile(r"ticket_user_(\d+)")
 
 class Tickets(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        self.tickets = TicketStore(bot.db)
+        self.transcripts = TranscriptExporter(bot.db, bot.data_path / "transcripts")
+
+    async def cog_load(self):
+        await self.tickets.load()
+
+    async def _ticket_for(self, channel: discord.abc.GuildChannel) -> Optional[TicketRecord]:
+        """Returns the ticket a channel belongs to, adopting tickets opened before ticket state was stored."""
+        record = self.tickets.get(channel.id)
+        if record is None and isinstance(channel, discord.TextChannel) and channel.topic:
+            if match := LEGACY_TOPIC_OWNER.search(channel.topic):
+                record = await self.tickets.add(channel.id, channel.guild.id, int(match.group(1)))
+                if channel.name.startswith("closed-"):
+                    await self.tickets.close(record)
+        return record
 
     # -----------------------------
     # Views
@@ -51,6 +66,11 @@ class Tickets(commands.Cog):
     # -----------------------------
     # Listeners
     # -----------------------------
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel: discord.abc.GuildChannel):
+        if self.tickets.get(channel.id):
+            await self.tickets.remove(channel.id)
+
     @commands.Cog.listener()
     async def on_interaction(self, interaction: discord.Interaction):
         if not interaction.data or not (custom_id := interaction.data.get("custom_id")):
@@ -74,16 +94,19 @@ class Tickets(commands.Cog):
     # -----------------------------
     async def create_ticket(self, interaction: discord.Interaction, custom_id: str):
         await interaction.response.defer(ephemeral=True, thinking=True)
-        _, ticket_type, cat_id_str, *staff_ids = custom_id.split('_')
+        _, _, ticket_type, cat_id_str, *staff_ids = custom_id.split('_')  # ticket_create_<type>_<category>_<roles...>
         guild = interaction.guild
-        
+
+        # Held until the ticket is recorded, so a double click cannot open two tickets
+        async with self.tickets.lock(guild.id, interaction.user.id):
+            await self._create_ticket_locked(interaction, guild, ticket_type, cat_id_str, staff_ids)
+
+    async def _create_ticket_locked(self, interaction: discord.Interaction, guild: discord.Guild, ticket_type: str, cat_id_str: str, staff_ids: list[str]):
         # منع التذاكر المكررة
-        existing_ticket = discord.utils.find(
-            lambda c: c.topic and f"ticket_user_{interaction.user.id}" in c.topic,
-            guild.text_channels
-        )
-        if existing_ticket:
-            return await interaction.followup.send(f"❌ You already have a ticket open: {existing_ticket.mention}", ephemeral=True)
+        if (existing_id := self.tickets.open_ticket_of(guild.id, interaction.user.id)) is not None:
+            if existing_ticket := guild.get_channel(existing_id):
+                return await interaction.followup.send(f"❌ You already have a ticket open: {existing_ticket.mention}", ephemeral=True)
+            await self.tickets.remove(existing_id)  # The channel is gone
 
         staff_roles = [guild.get_role(int(rid)) for rid in staff_ids if guild.get_role(int(rid))]
         category = guild.get_channel(int(cat_id_str))
@@ -102,6 +125,7 @@ class Tickets(commands.Cog):
             overwrites=overwrites,
             topic=f"Ticket for {interaction.user.name} | User ID: ticket_user_{interaction.user.id} | Type: {ticket_type}"
         )
+        await self.tickets.add(channel.id, guild.id, interaction.user.id)
 
         await interaction.followup.send(f"✅ Ticket created! {channel.mention}", ephemeral=True)
 
@@ -114,36 +138,41 @@ class Tickets(commands.Cog):
         await channel.send(embed=embed, view=self.TicketActionView())
 
     async def claim_ticket(self, interaction: discord.Interaction):
-        if "ticket-" not in interaction.channel.name: 
+        record = await self._ticket_for(interaction.channel)
+        if record is None or not record.is_open:
             return
+        if not await self.tickets.claim(record, interaction.user.id):
+            return await interaction.response.send_message(f"This ticket is already claimed by <@{record.claimed_by}>.", ephemeral=True)
         view = self.TicketActionView(claimed_by=str(interaction.user))
         await interaction.message.edit(view=view)
         await interaction.response.send_message(f"🙋 Ticket claimed by {interaction.user.mention}.", ephemeral=False)
 
     async def transcript_ticket(self, interaction: discord.Interaction):
-        if "ticket-" not in interaction.channel.name: 
+        if await self._ticket_for(interaction.channel) is None:
             return
         await interaction.response.defer(ephemeral=True, thinking=True)
         
-        transcript_filename = f"{TRANSCRIPTS_DIR}/{interaction.channel.id}.html"
-        async with aiofiles.open(transcript_filename, 'w', encoding='utf-8') as f:
-            await f.write(f"<html><body><h1>Transcript for #{interaction.channel.name}</h1>")
-            async for msg in interaction.channel.history(limit=None, oldest_first=True):
-                await f.write(f"<p><b>{msg.author.name}</b> ({msg.created_at.strftime('%Y-%m-%d %H:%M:%S')}): {msg.clean_content}</p>")
-            await f.write("</body></html>")
+        # Only messages newer than the previous export are fetched and appended
+        gzip = self.bot.get_guild_config(interaction.guild.id)["tickets"].get("transcript_gzip", False)
+        result = await self.transcripts.export(interaction.channel, gzip=gzip)
 
         # إرسال نسخة للـDM
         try:
-            await interaction.user.send(file=discord.File(transcript_filename))
-            await interaction.followup.send(f"✅ Transcript sent to your DMs.", ephemeral=True)
+            await interaction.user.send(file=discord.File(result.path, filename=f"{interaction.channel.name}{''.join(result.path.suffixes)}"))
+            await interaction.followup.send(f"✅ Transcript sent to your DMs ({result.total_messages} messages).", ephemeral=True)
         except discord.Forbidden:
             await interaction.followup.send(f"⚠️ Could not DM the transcript. Check your privacy settings.", ephemeral=True)
-        finally:
-            os.remove(transcript_filename)
+        except discord.HTTPException as e:
+            if e.status != 413:
+                raise
+            await interaction.followup.send("⚠️ The transcript is too large to upload. Ask an admin to enable gzip for transcripts.", ephemeral=True)
 
     async def close_ticket(self, interaction: discord.Interaction):
-        if "ticket-" not in interaction.channel.name: 
+        record = await self._ticket_for(interaction.channel)
+        if record is None or not record.is_open:
             return
+        if not await self.tickets.close(record):
+            return await interaction.response.send_message("This ticket is already being closed.", ephemeral=True)
         await interaction.response.send_message("🔒 Closing this ticket in 5 seconds...")
         await asyncio.sleep(5)
         # إنشاء زر لإعادة الفتح
@@ -151,27 +180,38 @@ class Tickets(commands.Cog):
         reopen_btn = discord.ui.Button(label="Reopen Ticket", style=discord.ButtonStyle.primary, custom_id=f"persistent_ticket_reopen_{interaction.channel.id}")
         view.add_item(reopen_btn)
         msg = await interaction.channel.send("Ticket closed.", view=view)
-        await interaction.channel.edit(name=f"closed-{interaction.channel.name}")
+        await interaction.channel.edit(name=f"closed-{interaction.channel.name.removeprefix('ticket-')}")
         await interaction.channel.set_permissions(interaction.guild.default_role, view_channel=False)
 
     async def reopen_ticket(self, interaction: discord.Interaction):
+        record = await self._ticket_for(interaction.channel)
+        if record is None or record.is_open:
+            return
+        if not await self.tickets.reopen(record):
+            existing = self.tickets.open_ticket_of(record.guild_id, record.user_id)
+            return await interaction.response.send_message(f"❌ <@{record.user_id}> already has another ticket open: <#{existing}>", ephemeral=True)
         await interaction.response.send_message("♻️ Ticket reopened!", ephemeral=True)
         channel = interaction.channel
-        await channel.edit(name=channel.name.replace("closed-", "ticket-"))
+        await channel.edit(name=f"ticket-{channel.name.removeprefix('closed-')}")
         await channel.set_permissions(interaction.guild.default_role, view_channel=False)
-        await channel.set_permissions(interaction.user, view_channel=True, send_messages=True)
+        try:
+            owner = interaction.guild.get_member(record.user_id) or await interaction.guild.fetch_member(record.user_id)
+            await channel.set_permissions(owner, view_channel=True, send_messages=True)
+        except discord.NotFound:
+            pass  # The ticket owner left the server
         await interaction.message.delete()
 
     async def mention_admins(self, interaction: discord.Interaction):
-        if "ticket-" not in interaction.channel.name: 
+        if await self._ticket_for(interaction.channel) is None:
             return
         guild = interaction.guild
-        admins = [member.mention for member in guild.members if member.guild_permissions.administrator]
+        await interaction.response.defer()  # The first query of a guild may have to chunk it
+        admins = [f"<@{member_id}>" for member_id in await self.bot.permission_index.members_with(guild, "administrator")]
         if not admins:
-            await interaction.response.send_message("No admins found.", ephemeral=True)
+            await interaction.followup.send("No admins found.")
         else:
             mentions = " ".join(admins)
-            await interaction.response.send_message(f"👑 Attention Admins: {mentions}", allowed_mentions=discord.AllowedMentions(users=True))
+            await interaction.followup.send(f"👑 Attention Admins: {mentions}", allowed_mentions=discord.AllowedMentions(users=True))
 
     # -----------------------------
     # Slash Command
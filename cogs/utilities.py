@@ -11,12 +11,16 @@ from discord.ext import commands, tasks
 import re
 import json
 from datetime import datetime as dt, UTC, timedelta
-import humanize
 
 if TYPE_CHECKING:
     from ..bot import MaxyBot # تأكد من صحة مسار الاستيراد هذا
 
-from .utils import cog_command_error # افتراض وجود هذه الدالة المساعدة
+from .utils import cog_command_error, lazy_import # افتراض وجود هذه الدالة المساعدة
+from utils.poll_store import OPEN_ENDED, PollStore
+from utils.reminder_delivery import ReminderDelivery
+from utils.outbound import Priority
+
+humanize = lazy_import("humanize")  # Only imported the first time it is used
 
 # --- SQL SCHEMA ---
 # ضع هذا في قاعدة بيانات SQLite الخاصة بك
@@ -37,15 +41,7 @@ from .utils import cog_command_error # افتراض وجود هذه الدالة
 #   remind_timestamp REAL
 # );
 #
-# CREATE TABLE IF NOT EXISTS polls (
-#   message_id INTEGER PRIMARY KEY,
-#   guild_id INTEGER NOT NULL,
-#   channel_id INTEGER NOT NULL,
-#   author_id INTEGER NOT NULL,
-#   end_timestamp REAL,
-#   question TEXT,
-#   options TEXT
-# );
+# polls / poll_votes: see DatabaseManager.init (votes are tallied by utils.poll_store.PollStore)
 #
 # --- Constants ---
 POLL_EMOJIS = ['1️⃣', '2️⃣', '3️⃣', '4️⃣', '5️⃣', '6️⃣', '7️⃣', '8️⃣', '9️⃣', '🔟']
@@ -84,13 +80,21 @@ class Utilities(commands.Cog, name="Utilities"):
     
     def __init__(self, bot: MaxyBot):
         self.bot = bot
+        self.polls = PollStore(bot.db)
+        self.reminder_delivery = ReminderDelivery(bot, bot.db, INFO_COLOR)
         self.check_reminders.start()
         self.check_polls.start()
 
-    def cog_unload(self):
+    async def cog_load(self):
+        await self.polls.load()
+        self.flush_poll_votes.start()
+
+    async def cog_unload(self):
         """إيقاف المهام الخلفية عند إلغاء تحميل الكوج."""
         self.check_reminders.cancel()
         self.check_polls.cancel()
+        self.flush_poll_votes.cancel()
+        await self.polls.flush()
 
     async def cog_app_command_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
         """معالج أخطاء مخصص لأوامر هذا الكوج."""
@@ -116,7 +120,7 @@ class Utilities(commands.Cog, name="Utilities"):
                 "DELETE FROM afk WHERE guild_id = ? AND user_id = ?",
                 (message.guild.id, message.author.id)
             )
-            await message.channel.send(f"أهلاً بعودتك {message.author.mention}! لقد أزلت حالة الـ AFK عنك.", delete_after=10)
+            self.bot.outbound.submit(message.channel, Priority.CHATTER, content=f"أهلاً بعودتك {message.author.mention}! لقد أزلت حالة الـ AFK عنك.", delete_after=10)
             try:
                 # محاولة إزالة [AFK] من اللقب
                 if message.author.display_name.startswith("[AFK]"):
@@ -142,7 +146,7 @@ class Utilities(commands.Cog, name="Utilities"):
                 mentioned_afk_users.append(f"**{user.display_name}** غائب حاليًا: `{afk_data['reason']}` ({afk_time})")
         
         if mentioned_afk_users:
-            await message.channel.send("\n".join(mentioned_afk_users), allowed_mentions=discord.AllowedMentions.none())
+            self.bot.outbound.submit(message.channel, Priority.CHATTER, content="\n".join(mentioned_afk_users), allowed_mentions=discord.AllowedMentions.none())
 
     # --- AFK Commands ---
     @app_commands.command(name="afk", description="يضبط حالتك إلى AFK (بعيد عن لوحة المفاتيح).")
@@ -195,72 +199,111 @@ class Utilities(commands.Cog, name="Utilities"):
         await interaction.response.send_message(embed=embed)
         message = await interaction.original_response()
 
+        # Recorded before the reactions are added, so no early vote is missed
+        await self.polls.create(interaction.guild.id, interaction.channel.id, message.id, question, option_list,
+                                end_time.timestamp() if end_time else None)
+
         for i in range(len(option_list)):
             await message.add_reaction(POLL_EMOJIS[i])
 
-        if end_time:
-            await self.bot.db.execute(
-                "INSERT INTO polls (message_id, guild_id, channel_id, author_id, end_timestamp, question, options) VALUES (?, ?, ?, ?, ?, ?, ?)",
-                (message.id, interaction.guild.id, interaction.channel.id, interaction.user.id, end_time.timestamp(), question, json.dumps(option_list))
-            )
+    def _poll_option(self, payload: discord.RawReactionActionEvent):
+        """Returns `(poll, option index)` for a reaction on an active poll by a user, else None."""
+        poll = self.polls.get(payload.message_id)
+        if poll is None or payload.user_id == self.bot.user.id:
+            return None
+        try:
+            option = POLL_EMOJIS.index(str(payload.emoji))
+        except ValueError:
+            return None
+        return (poll, option) if option < len(poll.options) else None
+
+    @commands.Cog.listener()
+    async def on_raw_reaction_add(self, payload: discord.RawReactionActionEvent):
+        if payload.member is not None and payload.member.bot:
+            return
+        if vote := self._poll_option(payload):
+            self.polls.vote(vote[0], payload.user_id, vote[1])
+
+    @commands.Cog.listener()
+    async def on_raw_reaction_remove(self, payload: discord.RawReactionActionEvent):
+        if vote := self._poll_option(payload):
+            self.polls.unvote(vote[0], payload.user_id, vote[1])
+
+    @tasks.loop(seconds=5)
+    async def flush_poll_votes(self):
+        """يحفظ الأصوات الجديدة في قاعدة البيانات على دفعات."""
+        try:
+            await self.polls.flush()
+        except Exception as e:
+            self.bot.logger.error(f"Failed to save poll votes: {e}")
+
+    @staticmethod
+    def _poll_results(question: str, options: List[str], counts: List[int], ended: bool) -> discord.Embed:
+        """يبني رسالة النتائج من عدد الأصوات لكل خيار."""
+        total_votes = sum(counts)
+        sorted_results = sorted(((option, votes) for option, votes in zip(options, counts) if votes > 0), key=lambda item: item[1], reverse=True)
+
+        result_description = []
+        for option, votes in sorted_results:
+            percentage = (votes / total_votes * 100) if total_votes > 0 else 0
+            bar = '█' * int(percentage / 10) + '░' * (10 - int(percentage / 10))
+            result_description.append(f"**{option}**\n`{bar}` ({votes} أصوات, {percentage:.1f}%)")
+
+        # تحديد الفائز
+        winner_text = "لم يتم الإدلاء بأي أصوات."
+        if sorted_results:
+            top_votes = sorted_results[0][1]
+            winners = [opt for opt, votes in sorted_results if votes == top_votes]
+            if len(winners) > 1:
+                winner_text = f"🏆 **تعادل بين:** {', '.join(winners)}"
+            else:
+                winner_text = f"🏆 **الفائز:** {winners[0]}"
+
+        embed = discord.Embed(
+            title=f"🏁 انتهى الاستطلاع: {question}" if ended else f"📊 النتائج الحالية: {question}",
+            description="\n\n".join(result_description),
+            color=SUCCESS_COLOR if ended else INFO_COLOR
+        )
+        embed.add_field(name="النتيجة النهائية" if ended else "المتصدر حاليًا", value=winner_text, inline=False)
+        return embed
+
+    @app_commands.command(name="poll-results", description="يعرض نتائج استطلاع في أي وقت.")
+    @app_commands.describe(message_id="معرّف رسالة الاستطلاع.")
+    async def poll_results(self, interaction: discord.Interaction, message_id: str):
+        """يعرض النتائج الحالية لاستطلاع نشط، أو النتائج النهائية لاستطلاع منتهٍ."""
+        if not message_id.isdigit():
+            return await interaction.response.send_message("معرّف الرسالة غير صالح.", ephemeral=True)
+        poll = self.polls.get(int(message_id))
+        if poll is not None and poll.guild_id == interaction.guild_id:
+            embed = self._poll_results(poll.question, poll.options, poll.counts, ended=False)
+            if poll.end_timestamp != OPEN_ENDED:
+                embed.add_field(name="⏰ ينتهي", value=discord.utils.format_dt(dt.fromtimestamp(poll.end_timestamp, UTC), 'R'), inline=False)
+            return await interaction.response.send_message(embed=embed, ephemeral=True)
+        stored = await self.polls.stored_results(int(message_id))
+        if stored is None or int(stored[0]['guild_id']) != interaction.guild_id:
+            return await interaction.response.send_message("لم يتم العثور على استطلاع بهذا المعرّف.", ephemeral=True)
+        row, counts = stored
+        embed = self._poll_results(row['question'], json.loads(row['options']), counts, ended=bool(row['is_ended']))
+        await interaction.response.send_message(embed=embed, ephemeral=True)
 
     @tasks.loop(seconds=60)
     async def check_polls(self):
         """تتحقق بشكل دوري من الاستطلاعات المنتهية وتعلن نتائجها."""
-        ended_polls = await self.bot.db.fetchall("SELECT * FROM polls WHERE end_timestamp <= ?", (dt.now(UTC).timestamp(),))
-        
-        for poll_data in ended_polls:
+        for poll in self.polls.due(dt.now(UTC).timestamp()):
+            if not self.bot.owns_guild(poll.guild_id):
+                continue  # Another cluster process closes this one
+            # The tally is already in memory; only the message edit needs the API.
+            message = self.bot.get_partial_messageable(poll.channel_id, guild_id=poll.guild_id).get_partial_message(poll.message_id)
+            embed = self._poll_results(poll.question, poll.options, poll.counts, ended=True)
             try:
-                channel = await self.bot.fetch_channel(poll_data['channel_id'])
-                message = await channel.fetch_message(poll_data['message_id'])
-            except (discord.NotFound, discord.Forbidden):
-                await self.bot.db.execute("DELETE FROM polls WHERE message_id = ?", (poll_data['message_id'],))
+                await message.edit(embed=embed)
+                await message.clear_reactions()
+            except discord.NotFound:
+                await self.polls.discard(poll)
                 continue
-
-            options = json.loads(poll_data['options'])
-            results = {}
-            total_votes = 0
-
-            # جلب الأصوات من الرسالة
-            for reaction in message.reactions:
-                emoji_str = str(reaction.emoji)
-                if emoji_str in POLL_EMOJIS:
-                    count = reaction.count - 1 # إزالة تصويت البوت
-                    if count > 0:
-                        idx = POLL_EMOJIS.index(emoji_str)
-                        if idx < len(options):
-                            results[options[idx]] = count
-                            total_votes += count
-
-            # إنشاء رسالة النتائج
-            result_description = []
-            sorted_results = sorted(results.items(), key=lambda item: item[1], reverse=True)
-            
-            for option, votes in sorted_results:
-                percentage = (votes / total_votes * 100) if total_votes > 0 else 0
-                bar = '█' * int(percentage / 10) + '░' * (10 - int(percentage / 10))
-                result_description.append(f"**{option}**\n`{bar}` ({votes} أصوات, {percentage:.1f}%)")
-
-            # تحديد الفائز
-            winner_text = "لم يتم الإدلاء بأي أصوات."
-            if sorted_results:
-                top_votes = sorted_results[0][1]
-                winners = [opt for opt, votes in sorted_results if votes == top_votes]
-                if len(winners) > 1:
-                    winner_text = f"🏆 **تعادل بين:** {', '.join(winners)}"
-                else:
-                    winner_text = f"🏆 **الفائز:** {winners[0]}"
-
-            embed = discord.Embed(
-                title=f"🏁 انتهى الاستطلاع: {poll_data['question']}",
-                description="\n\n".join(result_description),
-                color=SUCCESS_COLOR
-            )
-            embed.add_field(name="النتيجة النهائية", value=winner_text, inline=False)
-            
-            await message.edit(embed=embed)
-            await message.clear_reactions()
-            await self.bot.db.execute("DELETE FROM polls WHERE message_id = ?", (poll_data['message_id'],))
+            except discord.Forbidden:
+                pass  # Results are still recorded; the message just could not be updated
+            await self.polls.end(poll)
 
     # --- Reminder Commands ---
     @app_commands.command(name="remindme", description="يضبط تذكيرًا للمستقبل.")
@@ -289,26 +332,14 @@ class Utilities(commands.Cog, name="Utilities"):
     @tasks.loop(seconds=15)
     async def check_reminders(self):
         """تتحقق بشكل دوري من التذكيرات المستحقة وترسلها."""
+        if not self.bot.is_primary_cluster:
+            return  # Reminders are not tied to a guild; only cluster 0 sends them
         reminders = await self.bot.db.fetchall("SELECT * FROM reminders WHERE remind_timestamp <= ?", (dt.now(UTC).timestamp(),))
-        
-        for r in reminders:
-            try:
-                user = await self.bot.fetch_user(r['user_id'])
-                channel = await self.bot.fetch_channel(r['channel_id'])
-                
-                embed = discord.Embed(
-                    title="⏰ تذكير!",
-                    description=f"مرحبًا {user.mention}، لقد طلبت مني أن أذكرك بالتالي:",
-                    color=INFO_COLOR,
-                    timestamp=dt.fromtimestamp(r['remind_timestamp'], tz=UTC)
-                )
-                embed.add_field(name="المحتوى", value=f"> {r['remind_content']}", inline=False)
-                
-                await channel.send(embed=embed)
-            except (discord.NotFound, discord.Forbidden) as e:
-                self.bot.logger.warning(f"لا يمكن إرسال التذكير {r['reminder_id']}: {e}")
-            finally:
-                await self.bot.db.execute("DELETE FROM reminders WHERE reminder_id = ?", (r['reminder_id'],))
+        if not reminders:
+            return
+        delivered, dropped, kept = await self.reminder_delivery.deliver(reminders)
+        if dropped or kept:
+            self.bot.logger.warning(f"التذكيرات: أُرسل {delivered}، أُسقط {dropped}، وسيُعاد {kept}.")
     
     # --- Before Loop Waits ---
     @check_reminders.before_loop
@@ -6,7 +6,10 @@ import asyncio
 import datetime
 import logging
 import functools
+import importlib
+import sys
 import time
+import types
 from typing import Callable, Any, Type, Coroutine, Optional, Union
 
 # -----------------------
@@ -25,6 +28,49 @@ file_handler = logging.FileHandler("bot_errors.log", encoding="utf-8")
 file_handler.setFormatter(logging.Formatter("%(asctime)s:%(levelname)s:%(name)s: %(message)s"))
 logger.addHandler(file_handler)
 
+# -----------------------
+# الاستيراد الكسول للمكتبات الثقيلة (Lazy Imports)
+# -----------------------
+class LazyModule(types.ModuleType):
+    """
+    Stands in for a module until one of its attributes is first accessed.
+
+    The real module is imported at that point and its namespace copied onto the proxy,
+    so later attribute lookups cost the same as on the real module.
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__["_lazy_loaded"] = False
+
+    def _load(self) -> types.ModuleType:
+        start = time.perf_counter()
+        module = importlib.import_module(self.__name__)
+        self.__dict__.update(module.__dict__)
+        self.__dict__["_lazy_loaded"] = True
+        logger.debug(f"Lazy-imported {self.__name__} in {(time.perf_counter() - start) * 1000:.1f} ms")
+        return module
+
+    def __getattr__(self, attr: str) -> Any:
+        # Only called for attributes missing from the proxy, i.e. before the first load.
+        if self.__dict__["_lazy_loaded"]:
+            raise AttributeError(f"module '{self.__name__}' has no attribute '{attr}'")
+        return getattr(self._load(), attr)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.__dict__["_lazy_loaded"] else "not loaded"
+        return f"<lazy module '{self.__name__}' ({state})>"
+
+
+def lazy_import(name: str) -> types.ModuleType:
+    """
+    Returns `name` as a module that is only imported on first attribute access.
+    If the module was already imported, the real module is returned directly.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    return LazyModule(name)
+
 # -----------------------
 # معالج الأخطاء العام للـ Cogs
 # -----------------------
@@ -0,0 +1,45 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+
+import discord
+from discord.ext import commands
+
+if TYPE_CHECKING:
+    from ..bot import MaxyBot
+
+from utils.join_pipeline import JoinPipeline
+from utils.outbound import Priority
+
+
+class Welcome(commands.Cog, name="Welcome"):
+    """Welcome messages and autoroles for new members (see /setup-welcome and /autorole-human)."""
+
+    def __init__(self, bot: MaxyBot):
+        self.bot = bot
+        self.pipeline = JoinPipeline(bot)
+
+    async def cog_unload(self):
+        self.pipeline.close()
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member: discord.Member):
+        self.pipeline.joined(member)
+
+    @commands.Cog.listener()
+    async def on_raid_detected(self, guild: discord.Guild, joins: int):
+        """Alerts the moderators; a lockdown can hook into the same event."""
+        channel_id = self.bot.get_guild_config(guild.id)['moderation'].get('mod_log_channel_id')
+        if not channel_id:
+            return
+        channel = self.bot.get_channel(channel_id) or self.bot.get_partial_messageable(channel_id)
+        embed = discord.Embed(
+            title="🚨 Join raid detected",
+            description=f"{joins} accounts joined within {self.pipeline.raid_window:.0f} seconds. "
+                        f"Welcome messages are summarized until the joins calm down.",
+            color=discord.Color.red()
+        )
+        self.bot.outbound.submit(channel, Priority.MODERATION, coalesce_key=("raid", guild.id), embed=embed)
+
+
+async def setup(bot: MaxyBot):
+    await bot.add_cog(Welcome(bot))
@@ -0,0 +1,339 @@
+# Filename: utils/bulk_moderation.py
+
+from __future__ import annotations
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+from pathlib import Path
+from collections import defaultdict
+from datetime import datetime, timedelta, UTC
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+import discord
+from discord.utils import time_snowflake
+
+if TYPE_CHECKING:
+    from .database import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+ACTIONS = ("ban", "kick", "timeout", "purge")
+BULK_DELETE_MAX = 100
+BULK_DELETE_AGE = timedelta(days=14)  # Discord refuses to bulk delete older messages
+
+
+class ModerationJob:
+    """One bulk action: its targets (member ids, or channel ids for a purge) and how far it got."""
+
+    __slots__ = ("job_id", "guild_id", "moderator_id", "channel_id", "action", "reason", "params", "targets",
+                 "cursor", "affected", "failed", "status", "task")
+
+    def __init__(self, job_id: int, guild_id: int, moderator_id: int, channel_id: int, action: str, reason: str,
+                 params: Dict[str, Any], targets: List[int], cursor: int = 0, affected: int = 0, failed: int = 0, status: str = "running"):
+        self.job_id = job_id
+        self.guild_id = guild_id
+        self.moderator_id = moderator_id
+        self.channel_id = channel_id  # Where the job was started; progress of resumed jobs goes there
+        self.action = action
+        self.reason = reason
+        self.params = params
+        self.targets = targets
+        self.cursor = cursor  # Targets before this index are done
+        self.affected = affected  # Members actioned, or messages deleted
+        self.failed = failed
+        self.status = status  # running, done, cancelled
+        self.task: Optional[asyncio.Task] = None
+
+    def progress(self) -> str:
+        noun = "channels" if self.action == "purge" else "members"
+        result = f"{self.affected:,} messages deleted" if self.action == "purge" else f"{self.affected:,} done"
+        return (f"Job #{self.job_id} ({self.action}, {self.status}): {self.cursor:,}/{len(self.targets):,} {noun}, "
+                f"{result}, {self.failed:,} failed")
+
+
+class BulkModerationExecutor:
+    """
+    Runs bulk ban, kick, timeout and purge jobs through the raw HTTP client.
+
+    Targets are worked through in windows of `concurrency`: each window runs its calls
+    concurrently and then advances the job's cursor, so at most that many requests are
+    in flight and the cursor never passes an unfinished target. The cursor and counters
+    are saved to `moderation_jobs` at most every `save_every` seconds and when the job
+    ends; on startup, jobs still marked running resume from their saved cursor (a few
+    targets may be repeated, which bans, kicks and timeouts tolerate).
+
+    A purge pages through each channel's history newest first, stops at the bulk delete
+    age limit (14 days) or after `scan_limit` messages, and deletes the user's messages
+    100 at a time with the bulk delete endpoint.
+
+    `progress(job)` is called at most every `report_every` seconds and once at the end.
+    """
+
+    def __init__(self, bot: Any, db: DatabaseManager, concurrency: int = 4, save_every: float = 2.0,
+                 report_every: float = 2.0, scan_limit: int = 5_000):
+        self.bot = bot
+        self.db = db
+        self.concurrency = concurrency
+        self.save_every = save_every
+        self.report_every = report_every
+        self.scan_limit = scan_limit
+        self.jobs: Dict[int, ModerationJob] = {}
+
+    # --- Jobs ---
+    async def create(self, guild_id: int, moderator_id: int, channel_id: int, action: str, targets: Sequence[int],
+                     reason: str, params: Optional[Dict[str, Any]] = None) -> ModerationJob:
+        if action not in ACTIONS:
+            raise ValueError(f"Unknown bulk action '{action}'")
+        params = params or {}
+        now = time.time()
+        async with self.db.transaction() as db:
+            cursor = await db.execute(
+                "INSERT INTO moderation_jobs (guild_id, moderator_id, channel_id, action, reason, params, targets, cursor, affected, failed, status, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, 0, 0, 0, 'running', ?, ?)",
+                (guild_id, moderator_id, channel_id, action, reason, json.dumps(params), json.dumps(list(targets)), now, now)
+            )
+            job_id = cursor.lastrowid
+        job = self.jobs[job_id] = ModerationJob(job_id, guild_id, moderator_id, channel_id, action, reason, params, list(targets))
+        return job
+
+    async def load(self) -> List[ModerationJob]:
+        """Returns the jobs that were running when the bot stopped (call `start` to resume them)."""
+        rows = await self.db.fetchall("SELECT * FROM moderation_jobs WHERE status = 'running'")
+        jobs = []
+        for row in rows:
+            job = ModerationJob(row['job_id'], int(row['guild_id']), int(row['moderator_id']), int(row['channel_id']), row['action'],
+                                row['reason'], json.loads(row['params']), json.loads(row['targets']), row['cursor'], row['affected'], row['failed'])
+            self.jobs[job.job_id] = job
+            jobs.append(job)
+        return jobs
+
+    def start(self, job: ModerationJob, progress: Optional[Callable[[ModerationJob], Awaitable[None]]] = None) -> asyncio.Task:
+        job.task = asyncio.create_task(self._run(job, progress))
+        return job.task
+
+    async def cancel(self, job: ModerationJob) -> None:
+        job.status = "cancelled"
+        if job.task is not None:
+            job.task.cancel()
+        await self._save(job)
+
+    def close(self) -> None:
+        """Stops running jobs without changing their saved state, so they resume on the next start."""
+        for job in self.jobs.values():
+            if job.task is not None:
+                job.task.cancel()
+
+    async def _save(self, job: ModerationJob) -> None:
+        await self.db.execute(
+            "UPDATE moderation_jobs SET cursor = ?, affected = ?, failed = ?, status = ?, updated_at = ? WHERE job_id = ?",
+            (job.cursor, job.affected, job.failed, job.status, time.time(), job.job_id)
+        )
+
+    async def _run(self, job: ModerationJob, progress: Optional[Callable[[ModerationJob], Awaitable[None]]]) -> None:
+        action = getattr(self, f"_{job.action}")
+        saved = reported = time.monotonic()
+        try:
+            while job.cursor < len(job.targets):
+                window = job.targets[job.cursor:job.cursor + self.concurrency]
+                for result in await asyncio.gather(*(action(job, target) for target in window), return_exceptions=True):
+                    if isinstance(result, BaseException):
+                        job.failed += 1
+                        if not isinstance(result, discord.HTTPException):
+                            logger.error(f"Bulk {job.action} job {job.job_id} failed on a target", exc_info=result)
+                    else:
+                        job.affected += result
+                job.cursor += len(window)
+                now = time.monotonic()
+                if now - saved >= self.save_every:
+                    saved = now
+                    await self._save(job)
+                if progress is not None and now - reported >= self.report_every:
+                    reported = now
+                    await self._report(job, progress)
+            job.status = "done"
+            await self._save(job)
+        except asyncio.CancelledError:
+            if job.status == "cancelled":
+                await self._save(job)
+            raise
+        finally:
+            job.task = None
+        if progress is not None:
+            await self._report(job, progress)
+
+    async def _report(self, job: ModerationJob, progress: Callable[[ModerationJob], Awaitable[None]]) -> None:
+        try:
+            await progress(job)
+        except discord.HTTPException as e:
+            logger.debug(f"Could not report progress of job {job.job_id}: {e}")
+
+    # --- Actions (each returns how many members or messages it affected) ---
+    async def _ban(self, job: ModerationJob, user_id: int) -> int:
+        await self.bot.http.ban(user_id, job.guild_id, delete_message_seconds=job.params.get('delete_seconds', 0), reason=job.reason)
+        return 1
+
+    async def _kick(self, job: ModerationJob, user_id: int) -> int:
+        try:
+            await self.bot.http.kick(user_id, job.guild_id, reason=job.reason)
+        except discord.NotFound:
+            return 0  # Already gone
+        return 1
+
+    async def _timeout(self, job: ModerationJob, user_id: int) -> int:
+        until = datetime.now(UTC) + timedelta(seconds=job.params['seconds'])
+        try:
+            await self.bot.http.edit_member(job.guild_id, user_id, reason=job.reason, communication_disabled_until=until.isoformat())
+        except discord.NotFound:
+            return 0
+        return 1
+
+    async def _purge(self, job: ModerationJob, channel_id: int) -> int:
+        user_id = str(job.params['user_id'])
+        oldest = time_snowflake(datetime.now(UTC) - BULK_DELETE_AGE + timedelta(minutes=1))
+        before, scanned, found = None, 0, []
+        while scanned < self.scan_limit:
+            page = await self.bot.http.logs_from(channel_id, BULK_DELETE_MAX, before=before)
+            if not page:
+                break
+            scanned += len(page)
+            recent = [m for m in page if int(m['id']) > oldest]
+            found.extend(int(m['id']) for m in recent if m['author']['id'] == user_id)
+            if len(recent) < len(page) or len(page) < BULK_DELETE_MAX:
+                break
+            before = page[-1]['id']
+        for start in range(0, len(found), BULK_DELETE_MAX):
+            chunk = found[start:start + BULK_DELETE_MAX]
+            if len(chunk) == 1:
+                await self.bot.http.delete_message(channel_id, chunk[0], reason=job.reason)
+            else:
+                await self.bot.http.delete_messages(channel_id, chunk, reason=job.reason)
+        return len(found)
+
+
+# --- Throughput against a stub HTTP client ---
+class _StubHTTP:
+    """Counts REST calls and simulates their latency; no network is used."""
+
+    def __init__(self, latency: float, channels: int, per_channel: int, share: float):
+        self.latency = latency
+        self.calls: Dict[str, int] = defaultdict(int)
+        self.in_flight = self.peak = 0
+        now = datetime.now(UTC)
+        # Each channel's history, newest first; every `1 / share`-th message is by the target user
+        step = max(1, round(1 / share))
+        self.history = {
+            c: [{"id": str(time_snowflake(now - timedelta(minutes=10 * i))), "author": {"id": "42" if i % step == 0 else "7"}}
+                for i in range(per_channel)]
+            for c in range(channels)
+        }
+
+    async def _call(self, route: str) -> None:
+        self.calls[route] += 1
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self.in_flight -= 1
+
+    async def ban(self, user_id, guild_id, delete_message_seconds=86400, reason=None):
+        await self._call("PUT /guilds/{id}/bans/{id}")
+
+    async def kick(self, user_id, guild_id, reason=None):
+        await self._call("DELETE /guilds/{id}/members/{id}")
+
+    async def edit_member(self, guild_id, user_id, *, reason=None, **fields):
+        await self._call("PATCH /guilds/{id}/members/{id}")
+
+    async def logs_from(self, channel_id, limit, before=None):
+        await self._call("GET /channels/{id}/messages")
+        history = self.history[channel_id]
+        start = 0 if before is None else next((i + 1 for i, m in enumerate(history) if m["id"] == before), len(history))
+        return history[start:start + limit]
+
+    async def delete_messages(self, channel_id, message_ids, *, reason=None):
+        await self._call("POST /channels/{id}/messages/bulk-delete")
+
+    async def delete_message(self, channel_id, message_id, *, reason=None):
+        await self._call("DELETE /channels/{id}/messages/{id}")
+
+
+async def _benchmark(members: int, channels: int, per_channel: int, latency: float, concurrency: int, workdir: Path) -> None:
+    from .database import DatabaseManager
+
+    workdir.mkdir(parents=True, exist_ok=True)
+    path = workdir / "jobs.db"
+    for suffix in ("", "-wal", "-shm"):
+        Path(f"{path}{suffix}").unlink(missing_ok=True)
+    db = DatabaseManager(path)
+    await db.init()
+    targets = list(range(1_000, 1_000 + members))
+
+    http = _StubHTTP(latency, channels, per_channel, share=0.2)
+    elapsed = time.perf_counter()
+    for user_id in targets[:200]:  # One /ban at a time, as before (sampled)
+        await http.ban(user_id, 1)
+    sequential = 200 / (time.perf_counter() - elapsed)
+    print(f"one by one   {sequential:6.0f} bans/s")
+
+    for action in ("ban", "kick", "timeout"):
+        http.calls.clear()
+        executor = BulkModerationExecutor(type("Bot", (), {"http": http})(), db, concurrency=concurrency)
+        job = await executor.create(1, 2, 3, action, targets, "raid cleanup", {"seconds": 3600})
+        elapsed = time.perf_counter()
+        await executor.start(job)
+        elapsed = time.perf_counter() - elapsed
+        print(f"mass {action:<7} {members / elapsed:6.0f} {action}s/s  ({job.affected:,}/{members:,}, {sum(http.calls.values()):,} calls, peak {http.peak} in flight)")
+
+    # Stop a job halfway through, then resume it from the database as after a restart
+    http.calls.clear()
+    executor = BulkModerationExecutor(type("Bot", (), {"http": http})(), db, concurrency=concurrency, save_every=0)
+    job = await executor.create(1, 2, 3, "ban", targets, "raid cleanup")
+    task = executor.start(job)
+    while job.cursor < members // 2:
+        await asyncio.sleep(0.001)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    resumer = BulkModerationExecutor(type("Bot", (), {"http": http})(), db, concurrency=concurrency)
+    resumed = await resumer.load()
+    stopped_at = resumed[0].cursor
+    await resumer.start(resumed[0])
+    print(f"resume       stopped at {stopped_at:,}/{members:,}, finished as {resumed[0].status}; "
+          f"{http.calls['PUT /guilds/{id}/bans/{id}']:,} ban calls for {members:,} members")
+
+    http.calls.clear()
+    executor = BulkModerationExecutor(type("Bot", (), {"http": http})(), db, concurrency=concurrency)
+    job = await executor.create(1, 2, 3, "purge", list(range(channels)), "raid cleanup", {"user_id": 42})
+    elapsed = time.perf_counter()
+    await executor.start(job)
+    elapsed = time.perf_counter() - elapsed
+    calls = ", ".join(f"{route}: {n}" for route, n in sorted(http.calls.items()))
+    print(f"mass purge   {job.affected:,} messages from {channels} channels in {elapsed:.1f}s ({calls}); "
+          f"deleting one by one would take {job.affected:,} calls")
+    await db.close()
+
+
+def main() -> int:
+    """
+    Measures bulk job throughput against a stub HTTP client, and resumes a stopped job.
+
+    Run from the project root: `python -m utils.bulk_moderation --members 2000 --channels 50`
+    """
+    parser = argparse.ArgumentParser(description="Benchmark bulk moderation jobs.")
+    parser.add_argument("--members", type=int, default=2_000)
+    parser.add_argument("--channels", type=int, default=50)
+    parser.add_argument("--per-channel", type=int, default=2_500, help="Messages in each channel's history (10 minutes apart).")
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated seconds per API call.")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--workdir", type=Path, default=Path(os.getenv("TMPDIR", "/tmp")) / "maxy-bulk-bench")
+    args = parser.parse_args()
+    asyncio.run(_benchmark(args.members, args.channels, args.per_channel, args.latency, args.concurrency, args.workdir))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
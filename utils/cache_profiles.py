@@ -0,0 +1,114 @@
+# Filename: utils/cache_profiles.py
+
+from __future__ import annotations
+import os
+import time
+import asyncio
+import logging
+from typing import TYPE_CHECKING, Dict, List, NamedTuple, Sequence, Tuple
+
+import discord
+
+if TYPE_CHECKING:
+    from ..bot import MaxyBot
+
+logger = logging.getLogger(__name__)
+
+
+class CacheProfile(NamedTuple):
+    """The gateway intents and member caching a bot process runs with."""
+    name: str
+    intents: discord.Intents
+    member_cache_flags: discord.MemberCacheFlags
+    chunk_guilds_at_startup: bool
+
+
+def _lean_intents() -> discord.Intents:
+    # Everything the cogs listen for, minus presences (unused and by far the chattiest intent).
+    intents = discord.Intents.all()
+    intents.presences = False
+    return intents
+
+
+def _minimal_intents() -> discord.Intents:
+    intents = discord.Intents.default()
+    intents.message_content = True  # Prefix commands, autoresponder and aliases read message content
+    return intents
+
+
+def get_cache_profile(name: str) -> CacheProfile:
+    """
+    Builds a named cache profile.
+
+    - `full`:    every intent, every member cached, all guilds chunked before ready.
+    - `lean`:    no presences; only members seen through events or voice are cached and
+                 guilds are not chunked. Full member lists are fetched on demand.
+    - `minimal`: default intents plus message content, no member cache at all. Member
+                 events (joins, leaves, updates) are not received in this profile.
+    """
+    name = name.lower()
+    if name == "full":
+        intents = discord.Intents.all()
+        return CacheProfile(name, intents, discord.MemberCacheFlags.all(), True)
+    if name == "lean":
+        intents = _lean_intents()
+        return CacheProfile(name, intents, discord.MemberCacheFlags.from_intents(intents), False)
+    if name == "minimal":
+        return CacheProfile(name, _minimal_intents(), discord.MemberCacheFlags.none(), False)
+    raise ValueError(f"Unknown cache profile: {name!r} (expected full, lean or minimal)")
+
+
+def cache_profile_from_env(default: str = "lean") -> CacheProfile:
+    """Returns the profile named by the MAXY_CACHE_PROFILE environment variable."""
+    name = os.getenv("MAXY_CACHE_PROFILE", default)
+    try:
+        return get_cache_profile(name)
+    except ValueError as e:
+        logger.error(f"{e}. Falling back to '{default}'.")
+        return get_cache_profile(default)
+
+
+class MemberDirectory:
+    """
+    Full member lists for the few features that need them, fetched on demand.
+
+    When the guild is already chunked (the `full` profile) the cached member list is
+    used as is. Otherwise the guild is chunked without touching the member cache and
+    the result is kept for `ttl` seconds, so a burst of lookups costs one request and
+    the memory is released afterwards. Without the members intent only the members
+    already in cache can be returned.
+    """
+
+    def __init__(self, bot: MaxyBot, ttl: float = 600.0):
+        self.bot = bot
+        self.ttl = ttl
+        self._snapshots: Dict[int, Tuple[float, List[discord.Member]]] = {}
+        self._locks: Dict[int, asyncio.Lock] = {}
+
+    async def members(self, guild: discord.Guild) -> Sequence[discord.Member]:
+        """Returns every member of a guild, chunking it if needed."""
+        if guild.chunked or not self.bot.intents.members:
+            return guild.members
+
+        snapshot = self._snapshots.get(guild.id)
+        if snapshot and snapshot[0] > time.monotonic():
+            return snapshot[1]
+
+        lock = self._locks.setdefault(guild.id, asyncio.Lock())
+        async with lock:
+            snapshot = self._snapshots.get(guild.id)  # Another caller may have fetched it meanwhile
+            if snapshot and snapshot[0] > time.monotonic():
+                return snapshot[1]
+            start = time.perf_counter()
+            members = await guild.chunk(cache=False)
+            self._snapshots[guild.id] = (time.monotonic() + self.ttl, members)
+            logger.info(f"Chunked {len(members)} members of guild {guild.id} on demand in {time.perf_counter() - start:.2f}s.")
+        self._locks.pop(guild.id, None)
+        self.prune()
+        return members
+
+    def prune(self) -> None:
+        """Drops expired member snapshots."""
+        now = time.monotonic()
+        for guild_id in [gid for gid, (expires, _) in self._snapshots.items() if expires <= now]:
+            del self._snapshots[guild_id]
@@ -0,0 +1,265 @@
+# Filename: utils/cluster_ipc.py
+
+from __future__ import annotations
+import os
+import json
+import time
+import asyncio
+import inspect
+import logging
+import itertools
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, List, Optional, Union
+
+if TYPE_CHECKING:
+    from ..bot import MaxyBot
+
+logger = logging.getLogger(__name__)
+
+# One JSON object per line. Worker -> hub: hello, gather, reply. Hub -> worker: collect, gathered.
+_LINE_LIMIT = 16 * 1024 * 1024  # Guild lists of large clusters are a few MB
+
+
+async def _send(writer: asyncio.StreamWriter, payload: Dict[str, Any]) -> None:
+    writer.write(json.dumps(payload, separators=(",", ":")).encode("utf-8") + b"\n")
+    await writer.drain()
+
+
+class ClusterHub:
+    """
+    The launcher's side of the IPC channel: a Unix socket server every worker connects to.
+
+    A worker asks the hub to `gather` something (e.g. "stats"); the hub sends `collect`
+    to every connected worker, including the one asking, waits up to the timeout for
+    their replies and sends back `{cluster_id: data}`. Workers that do not answer in
+    time are left out, so one stuck worker never blocks `/stats` on the others.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self._workers: Dict[int, asyncio.StreamWriter] = {}
+        self._pending: Dict[int, Dict[int, Any]] = {}
+        self._waiters: Dict[int, asyncio.Event] = {}
+        self._expected: Dict[int, int] = {}
+        self._ids = itertools.count(1)
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    @property
+    def connected(self) -> List[int]:
+        return sorted(self._workers)
+
+    async def start(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self.path.exists():
+            self.path.unlink()  # Left over from a launcher that did not shut down cleanly
+        self._server = await asyncio.start_unix_server(self._handle, path=str(self.path), limit=_LINE_LIMIT)
+        logger.info(f"Cluster hub listening on {self.path}")
+
+    async def close(self) -> None:
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        for writer in self._workers.values():
+            writer.close()
+        self._workers.clear()
+        if self.path.exists():
+            self.path.unlink()
+
+    async def gather(self, what: str, timeout: float) -> Dict[int, Any]:
+        """Collects `what` from every connected worker. Returns `{cluster_id: data}`."""
+        request_id = next(self._ids)
+        targets = dict(self._workers)
+        self._pending[request_id] = {}
+        self._expected[request_id] = len(targets)
+        self._waiters[request_id] = event = asyncio.Event()
+        try:
+            for writer in targets.values():
+                try:
+                    await _send(writer, {"op": "collect", "id": request_id, "what": what})
+                except (ConnectionError, RuntimeError):
+                    self._expected[request_id] -= 1
+            if self._expected[request_id] > 0:
+                try:
+                    await asyncio.wait_for(event.wait(), timeout)
+                except asyncio.TimeoutError:
+                    missing = set(targets) - set(self._pending[request_id])
+                    logger.warning(f"Cluster gather '{what}' timed out waiting for cluster(s) {sorted(missing)}")
+            return self._pending[request_id]
+        finally:
+            self._pending.pop(request_id, None)
+            self._expected.pop(request_id, None)
+            self._waiters.pop(request_id, None)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        cluster_id: Optional[int] = None
+        try:
+            while line := await reader.readline():
+                message = json.loads(line)
+                op = message.get("op")
+                if op == "hello":
+                    cluster_id = int(message["cluster_id"])
+                    self._workers[cluster_id] = writer
+                    logger.info(f"Cluster {cluster_id} connected to the hub.")
+                elif op == "reply":
+                    results = self._pending.get(message["id"])
+                    if results is not None and cluster_id is not None:
+                        results[cluster_id] = message.get("data")
+                        if len(results) >= self._expected[message["id"]]:
+                            self._waiters[message["id"]].set()
+                elif op == "gather":
+                    # Served in a task so this worker's own `reply` can still be read meanwhile
+                    asyncio.create_task(self._answer(writer, message))
+        except (ConnectionError, json.JSONDecodeError, asyncio.IncompleteReadError) as e:
+            logger.warning(f"Cluster {cluster_id} IPC connection error: {e}")
+        finally:
+            if cluster_id is not None and self._workers.get(cluster_id) is writer:
+                del self._workers[cluster_id]
+                logger.info(f"Cluster {cluster_id} disconnected from the hub.")
+            writer.close()
+
+    async def _answer(self, writer: asyncio.StreamWriter, message: Dict[str, Any]) -> None:
+        results = await self.gather(message["what"], float(message.get("timeout", 2.0)))
+        try:
+            await _send(writer, {"op": "gathered", "id": message["id"], "results": {str(k): v for k, v in results.items()}})
+        except (ConnectionError, RuntimeError):
+            pass
+
+
+Provider = Callable[[], Union[Any, Awaitable[Any]]]
+
+
+class ClusterClient:
+    """
+    A worker's side of the IPC channel.
+
+    Each worker registers providers ("stats", "guilds", ...) that return JSON-serializable
+    data about its own shards, and can ask the hub to collect the same data from every
+    worker with `gather`.
+    """
+
+    def __init__(self, cluster_id: int, path: Union[str, Path]):
+        self.cluster_id = cluster_id
+        self.path = Path(path)
+        self.providers: Dict[str, Provider] = {}
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._listener: Optional[asyncio.Task] = None
+        self._futures: Dict[int, asyncio.Future] = {}
+        self._ids = itertools.count(1)
+
+    @property
+    def connected(self) -> bool:
+        return self._writer is not None and not self._writer.is_closing()
+
+    def provide(self, what: str, provider: Provider) -> None:
+        self.providers[what] = provider
+
+    async def connect(self) -> None:
+        self._reader, self._writer = await asyncio.open_unix_connection(str(self.path), limit=_LINE_LIMIT)
+        await _send(self._writer, {"op": "hello", "cluster_id": self.cluster_id})
+        self._listener = asyncio.create_task(self._listen())
+
+    async def close(self) -> None:
+        if self._listener:
+            self._listener.cancel()
+            self._listener = None
+        if self._writer:
+            self._writer.close()
+            self._writer = None
+        for future in self._futures.values():
+            if not future.done():
+                future.set_exception(ConnectionError("Cluster IPC closed"))
+        self._futures.clear()
+
+    async def gather(self, what: str, timeout: float = 2.0) -> Dict[int, Any]:
+        """
+        Returns `{cluster_id: data}` for every worker that answered within `timeout`.
+
+        Raises:
+            ConnectionError: If the hub is not reachable.
+        """
+        if not self.connected:
+            raise ConnectionError("Not connected to the cluster hub")
+        request_id = next(self._ids)
+        future = self._futures[request_id] = asyncio.get_running_loop().create_future()
+        try:
+            await _send(self._writer, {"op": "gather", "id": request_id, "what": what, "timeout": timeout})
+            # The hub waits `timeout` for the slowest worker; allow a little more for the round trip
+            results = await asyncio.wait_for(future, timeout + 1.0)
+        finally:
+            self._futures.pop(request_id, None)
+        return {int(k): v for k, v in results.items()}
+
+    async def _listen(self) -> None:
+        try:
+            while line := await self._reader.readline():
+                message = json.loads(line)
+                if message["op"] == "collect":
+                    asyncio.create_task(self._reply(message))
+                elif message["op"] == "gathered":
+                    future = self._futures.get(message["id"])
+                    if future and not future.done():
+                        future.set_result(message["results"])
+        except (ConnectionError, json.JSONDecodeError) as e:
+            logger.warning(f"Cluster IPC connection lost: {e}")
+        finally:
+            if self._writer:
+                self._writer.close()
+            for future in self._futures.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("Cluster hub disconnected"))
+
+    async def _reply(self, message: Dict[str, Any]) -> None:
+        provider = self.providers.get(message["what"])
+        data = None
+        if provider is not None:
+            try:
+                data = provider()
+                if inspect.isawaitable(data):
+                    data = await data
+            except Exception as e:
+                logger.error(f"Cluster provider '{message['what']}' failed: {e}", exc_info=True)
+        try:
+            await _send(self._writer, {"op": "reply", "id": message["id"], "data": data})
+        except (ConnectionError, RuntimeError, AttributeError):
+            pass
+
+
+# --- Providers and cluster-wide views used by the commands ---
+def local_stats(bot: MaxyBot) -> Dict[str, Any]:
+    """This process's share of the bot statistics, as plain JSON data."""
+    import psutil  # Only needed when stats are asked for
+
+    process = psutil.Process(os.getpid())
+    lag = bot.loop_monitor.snapshot()
+    return {
+        "cluster_id": bot.cluster_id,
+        "shard_ids": list(getattr(bot, "shard_ids", None) or []),
+        "guilds": len(bot.guilds),
+        "users": len(bot.users),
+        "latency": bot.latency if bot.latency == bot.latency else 0.0,  # NaN before the first heartbeat
+        "memory": process.memory_info().rss,
+        "cpu": process.cpu_percent() / (psutil.cpu_count() or 1),
+        "uptime": time.time() - bot.start_time.timestamp(),
+        "p99_lag": lag["p99_lag"],
+    }
+
+
+def local_guilds(bot: MaxyBot) -> List[List[Any]]:
+    """`[id, name, member_count]` for every guild on this process."""
+    return [[g.id, g.name, g.member_count or 0] for g in bot.guilds]
+
+
+async def cluster_gather(bot: MaxyBot, what: str, local: Callable[[MaxyBot], Any], timeout: float = 2.0) -> Dict[int, Any]:
+    """
+    Returns `{cluster_id: data}` for the whole cluster, or just this process when the
+    bot is not clustered or the hub does not answer.
+    """
+    if bot.cluster is not None and bot.cluster.connected:
+        try:
+            results = await bot.cluster.gather(what, timeout)
+            return {cid: data for cid, data in results.items() if data is not None} or {bot.cluster_id or 0: local(bot)}
+        except (ConnectionError, asyncio.TimeoutError) as e:
+            logger.warning(f"Cluster gather '{what}' failed, showing local data only: {e}")
+    return {bot.cluster_id or 0: local(bot)}
@@ -0,0 +1,87 @@
+# Filename: utils/cog_loader.py
+
+import ast
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class CogDependencyError(Exception):
+    """Raised when the declared cog dependencies cannot be satisfied (unknown cog or a cycle)."""
+
+
+def read_cog_dependencies(path: Path) -> Tuple[str, ...]:
+    """
+    Reads a cog's module-level `COG_DEPENDENCIES` tuple without importing the module.
+
+    Cogs declare the extensions that must be loaded before them, for example
+    `COG_DEPENDENCIES = ("cogs.utils",)`. Cogs without the declaration have none.
+    """
+    tree = ast.parse(path.read_text(encoding="utf-8"), filename=str(path))
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(isinstance(t, ast.Name) and t.id == "COG_DEPENDENCIES" for t in node.targets):
+            try:
+                value = ast.literal_eval(node.value)
+            except ValueError as e:
+                raise CogDependencyError(f"{path.name}: COG_DEPENDENCIES must be a literal tuple of extension names") from e
+            return tuple(value)
+    return ()
+
+
+def find_cycle(graph: Dict[str, Tuple[str, ...]]) -> Optional[List[str]]:
+    """Returns one dependency cycle as a list of names (first name repeated at the end), or None."""
+    visiting, done = set(), set()
+    path: List[str] = []
+
+    def visit(name: str) -> Optional[List[str]]:
+        visiting.add(name)
+        path.append(name)
+        for dep in graph.get(name, ()):
+            if dep in visiting:
+                return path[path.index(dep):] + [dep]
+            if dep not in done and (cycle := visit(dep)):
+                return cycle
+        visiting.discard(name)
+        done.add(name)
+        path.pop()
+        return None
+
+    for name in graph:
+        if name not in done and (cycle := visit(name)):
+            return cycle
+    return None
+
+
+def build_cog_graph(cog_dir: Path, package: str = "cogs") -> Dict[str, Tuple[str, ...]]:
+    """
+    Builds the `{extension: dependencies}` graph for every cog file in `cog_dir`.
+
+    Raises:
+        CogDependencyError: If a cog depends on an unknown extension or the graph has a cycle.
+    """
+    graph = {
+        f"{package}.{path.stem}": read_cog_dependencies(path)
+        for path in sorted(cog_dir.glob("*.py")) if not path.name.startswith("_")
+    }
+    for name, deps in graph.items():
+        missing = [dep for dep in deps if dep not in graph]
+        if missing:
+            raise CogDependencyError(f"{name} depends on unknown cog(s): {', '.join(missing)}")
+    if cycle := find_cycle(graph):
+        raise CogDependencyError(f"Cog dependency cycle: {' -> '.join(cycle)}")
+    return graph
+
+
+def critical_path(graph: Dict[str, Tuple[str, ...]], durations: Dict[str, float]) -> Tuple[float, List[str]]:
+    """Returns the longest chain of load durations through the graph, i.e. the best possible wall time."""
+    memo: Dict[str, Tuple[float, List[str]]] = {}
+
+    def longest(name: str) -> Tuple[float, List[str]]:
+        if name not in memo:
+            best = max((longest(dep) for dep in graph.get(name, ())), default=(0.0, []), key=lambda item: item[0])
+            memo[name] = (best[0] + durations.get(name, 0.0), best[1] + [name])
+        return memo[name]
+
+    return max((longest(name) for name in graph), default=(0.0, []), key=lambda item: item[0])
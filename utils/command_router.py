@@ -0,0 +1,183 @@
+# Filename: utils/command_router.py
+
+from __future__ import annotations
+import os
+import sys
+import time
+import random
+import asyncio
+import logging
+import argparse
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple
+
+import discord
+from discord.ext import commands
+
+if TYPE_CHECKING:
+    from ..bot import MaxyBot
+
+logger = logging.getLogger(__name__)
+
+
+class CommandRouter:
+    """
+    Decides cheaply whether a message can be a prefix command or an alias.
+
+    Prefix tuples (the guild prefix plus both mention forms) are built once per distinct
+    prefix and shared by every guild using it, so the per-message check is a single
+    `str.startswith(tuple)`. Aliases are kept in memory per guild, so resolving one is
+    a dict lookup instead of a database query.
+    """
+
+    def __init__(self, bot: MaxyBot, default_prefix: str):
+        self.bot = bot
+        self.default_prefix = default_prefix
+        self._prefix_cache: Dict[str, Tuple[str, ...]] = {}
+        self._cached_for_user: Optional[int] = None
+        self._aliases: Dict[int, Dict[str, str]] = {}
+
+    # --- Prefixes ---
+    def prefixes(self, guild: Optional[discord.Guild]) -> Tuple[str, ...]:
+        """Returns the prefixes valid in a guild, in the same order as `commands.when_mentioned_or`."""
+        user_id = self.bot.user.id if self.bot.user else None
+        if user_id != self._cached_for_user:
+            # Mention forms depend on the bot's user id, which is only known after login.
+            self._prefix_cache.clear()
+            self._cached_for_user = user_id
+
+        prefix = self.default_prefix if guild is None else self.bot.get_guild_config(guild.id).get("prefix", self.default_prefix)
+        cached = self._prefix_cache.get(prefix)
+        if cached is None:
+            mentions = (f'<@{user_id}> ', f'<@!{user_id}> ') if user_id else ()
+            cached = self._prefix_cache[prefix] = mentions + (prefix,)
+        return cached
+
+    def is_command(self, message: discord.Message) -> bool:
+        """True if the message starts with one of the guild's prefixes."""
+        return message.content.startswith(self.prefixes(message.guild))
+
+    # --- Aliases ---
+    def load_aliases(self, rows: Iterable[Tuple[str, str, str]]) -> None:
+        """Bulk loads `(guild_id, alias, command_name)` rows, replacing everything."""
+        self._aliases.clear()
+        for guild_id, alias, command_name in rows:
+            self._aliases.setdefault(int(guild_id), {})[alias.lower()] = command_name
+        logger.info(f"Loaded aliases for {len(self._aliases)} guilds.")
+
+    def add_alias(self, guild_id: int, alias: str, command_name: str) -> None:
+        self._aliases.setdefault(guild_id, {})[alias.lower()] = command_name
+
+    def remove_alias(self, guild_id: int, alias: str) -> bool:
+        aliases = self._aliases.get(guild_id)
+        if not aliases or aliases.pop(alias.lower(), None) is None:
+            return False
+        if not aliases:
+            del self._aliases[guild_id]
+        return True
+
+    def resolve_alias(self, message: discord.Message) -> Optional[str]:
+        """Returns the command name the message's first word is an alias for, if any."""
+        if message.guild is None:
+            return None
+        aliases = self._aliases.get(message.guild.id)
+        if not aliases:
+            return None
+        words = message.content.split(maxsplit=1)
+        return aliases.get(words[0].lower()) if words else None
+
+
+# --- Benchmark on a synthetic message stream ---
+class _StubGuild:
+    def __init__(self, guild_id: int):
+        self.id = guild_id
+
+
+class _StubMessage:
+    _state = None  # Read by Context, unused here
+
+    def __init__(self, content: str, guild: _StubGuild, author: Any):
+        self.content = content
+        self.guild = guild
+        self.author = author
+
+
+def _messages(count: int, guilds: int, commands_share: float, seed: int) -> List[_StubMessage]:
+    rng = random.Random(seed)
+    author = type("User", (), {"id": 2, "bot": False})()
+    servers = [_StubGuild(i) for i in range(1, guilds + 1)]
+    chat = ["hello everyone", "lol", "anyone up for a game tonight?", "gg", "brb", "that was a great match honestly"]
+    return [
+        _StubMessage(f"!{rng.choice(['help', 'ping', 'rank'])}" if rng.random() < commands_share else rng.choice(chat), rng.choice(servers), author)
+        for _ in range(count)
+    ]
+
+
+async def _benchmark(count: int, guilds: int, commands_share: float, alias_sample: int, workdir: Path) -> None:
+    import aiosqlite
+
+    config = {"prefix": "!"}
+    bot = commands.Bot(command_prefix=lambda bot, message: commands.when_mentioned_or(config["prefix"])(bot, message),
+                       intents=discord.Intents.none(), help_command=None)
+    bot._connection.user = type("ClientUser", (), {"id": 1})()  # Mention prefixes need the bot's id
+    bot.get_guild_config = lambda guild_id: config
+    router = CommandRouter(bot, "!")
+    messages = _messages(count, guilds, commands_share, seed=1)
+
+    # The old alias listener queried aliases.db for every message
+    workdir.mkdir(parents=True, exist_ok=True)
+    alias_db = workdir / "aliases.db"
+    alias_db.unlink(missing_ok=True)
+    async with aiosqlite.connect(alias_db) as db:
+        await db.execute("CREATE TABLE aliases (guild_id TEXT, alias TEXT, command_name TEXT, PRIMARY KEY (guild_id, alias))")
+        await db.executemany("INSERT INTO aliases VALUES (?, ?, ?)", [(str(g), "r", "rank") for g in range(1, guilds + 1)])
+        await db.commit()
+    router.load_aliases([(str(g), "r", "rank") for g in range(1, guilds + 1)])
+
+    start = time.perf_counter()
+    for message in messages:
+        await bot.get_context(message)  # process_commands on every message
+    old = count / (time.perf_counter() - start)
+
+    sample = messages[:alias_sample]
+    start = time.perf_counter()
+    for message in sample:
+        async with aiosqlite.connect(alias_db) as db:
+            cursor = await db.execute("SELECT command_name FROM aliases WHERE guild_id = ? AND alias = ?",
+                                      (str(message.guild.id), message.content.split()[0].lower()))
+            await cursor.fetchone()
+    old_alias = len(sample) / (time.perf_counter() - start)
+
+    contexts = 0
+    start = time.perf_counter()
+    for message in messages:
+        router.resolve_alias(message)
+        if router.is_command(message):
+            await bot.get_context(message)
+            contexts += 1
+    new = count / (time.perf_counter() - start)
+
+    print(f"old on_message (get_context every message): {old:>10,.0f} msg/s")
+    print(f"old alias listener (query per message):     {old_alias:>10,.0f} msg/s  ({len(sample):,} sampled)")
+    print(f"router fast path + alias dict lookup:       {new:>10,.0f} msg/s  ({contexts:,} contexts built for {count:,} messages)")
+
+
+def main() -> int:
+    """
+    Compares the old on_message path with the router on a mostly-chat message stream.
+
+    Run from the project root: `python -m utils.command_router --messages 100000 --commands 0.05`
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the prefix and alias router.")
+    parser.add_argument("--messages", type=int, default=100_000)
+    parser.add_argument("--guilds", type=int, default=500)
+    parser.add_argument("--commands", type=float, default=0.05, help="Share of messages that are commands.")
+    parser.add_argument("--alias-sample", type=int, default=2_000, help="Messages timed through the per-message alias query.")
+    parser.add_argument("--workdir", type=Path, default=Path(os.getenv("TMPDIR", "/tmp")) / "maxy-router-bench")
+    args = parser.parse_args()
+    asyncio.run(_benchmark(args.messages, args.guilds, args.commands, args.alias_sample, args.workdir))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
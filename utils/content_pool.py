@@ -0,0 +1,240 @@
+# Filename: utils/content_pool.py
+
+from __future__ import annotations
+import sys
+import time
+import random
+import asyncio
+import logging
+import argparse
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Generic, Iterable, List, Optional, Sequence, TypeVar
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+TENOR_URL = "https://tenor.googleapis.com/v2/search"
+REDDIT_URL = "https://www.reddit.com"
+IMAGE_SUFFIXES = (".jpg", ".jpeg", ".png", ".gif", ".webp")
+REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=10)
+
+
+class _Pool(Generic[T]):
+    """The prefetched items of one key."""
+
+    __slots__ = ("items", "fetched_at", "task", "failed_until")
+
+    def __init__(self):
+        self.items: List[T] = []
+        self.fetched_at = 0.0
+        self.task: Optional[asyncio.Task] = None  # The refill in flight, shared by everyone who waits for it
+        self.failed_until = 0.0
+
+
+class ContentPool(Generic[T]):
+    """
+    Keeps prefetched results per query key so commands can answer without a web request.
+
+    `take(key)` pops a random item. When a key drops below `low_watermark` items, or its
+    batch is older than `ttl` seconds, a background task fetches a new batch of up to
+    `size` items to replace it; until then the remaining items are still served. Only a
+    pool that is empty makes its caller wait, and all callers waiting on the same key share
+    one request (singleflight). A failed fetch is not retried for `retry_after` seconds,
+    so an upstream outage costs one request per key per interval, not one per command.
+
+    `fetch(key)` returns the batch. At most `max_keys` keys are kept; the least recently
+    used idle pool is dropped beyond that.
+    """
+
+    def __init__(self, fetch: Callable[[str], Awaitable[Sequence[T]]], size: int = 50, low_watermark: int = 10,
+                 ttl: float = 900.0, retry_after: float = 30.0, max_keys: int = 256):
+        self.fetch = fetch
+        self.size = size
+        self.low_watermark = low_watermark
+        self.ttl = ttl
+        self.retry_after = retry_after
+        self.max_keys = max_keys
+        self._pools: "OrderedDict[str, _Pool[T]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.fetches = 0
+
+    async def take(self, key: str) -> Optional[T]:
+        """A random item for `key`, or None if there is none and fetching failed."""
+        pool = self._get(key)
+        now = time.monotonic()
+        if not pool.items:
+            self.misses += 1
+            if pool.failed_until > now:
+                return None
+            # Shielded: a caller that gives up must not cancel the request the others wait on
+            await asyncio.shield(self._refill(key, pool))
+            if not pool.items:
+                return None
+        else:
+            self.hits += 1
+
+        index = random.randrange(len(pool.items))
+        pool.items[index], pool.items[-1] = pool.items[-1], pool.items[index]
+        item = pool.items.pop()
+        if (len(pool.items) < self.low_watermark or now - pool.fetched_at > self.ttl) and pool.failed_until <= now:
+            self._refill(key, pool)
+        return item
+
+    def warm(self, keys: Iterable[str]) -> None:
+        """Starts filling the given keys in the background."""
+        for key in keys:
+            self._refill(key, self._get(key))
+
+    def close(self) -> None:
+        for pool in self._pools.values():
+            if pool.task is not None:
+                pool.task.cancel()
+
+    def _get(self, key: str) -> _Pool[T]:
+        pool = self._pools.get(key)
+        if pool is not None:
+            self._pools.move_to_end(key)
+            return pool
+        if len(self._pools) >= self.max_keys:
+            idle = next((k for k, p in self._pools.items() if p.task is None), None)
+            if idle is not None:
+                del self._pools[idle]
+        pool = self._pools[key] = _Pool()
+        return pool
+
+    def _refill(self, key: str, pool: _Pool[T]) -> asyncio.Task:
+        if pool.task is None:
+            pool.task = asyncio.create_task(self._fill(key, pool))
+        return pool.task
+
+    async def _fill(self, key: str, pool: _Pool[T]) -> None:
+        self.fetches += 1
+        try:
+            items = list(await self.fetch(key))[:self.size]
+        except (aiohttp.ClientError, asyncio.TimeoutError, KeyError, ValueError) as e:
+            logger.warning(f"Could not refill the content pool for {key!r}: {e!r}")
+            pool.failed_until = time.monotonic() + self.retry_after
+            return
+        finally:
+            pool.task = None
+        if items:
+            pool.items = items
+            pool.fetched_at = time.monotonic()
+        else:
+            # Nothing matched; treated like a failure so the key is not searched again right away
+            pool.failed_until = time.monotonic() + self.retry_after
+
+
+def tenor_fetcher(session: aiohttp.ClientSession, api_key: str, limit: int = 50,
+                  base_url: str = TENOR_URL) -> Callable[[str], Awaitable[List[str]]]:
+    """Fetches GIF urls for a search query. `random=true` makes each refill a different batch."""
+    async def fetch(query: str) -> List[str]:
+        params = {"q": query, "key": api_key, "limit": limit, "media_filter": "minimal", "random": "true"}
+        async with session.get(base_url, params=params, timeout=REQUEST_TIMEOUT) as response:
+            response.raise_for_status()
+            data = await response.json()
+        return [r['media_formats']['gif']['url'] for r in data['results'] if 'gif' in r['media_formats']]
+    return fetch
+
+
+def reddit_fetcher(session: aiohttp.ClientSession, limit: int = 100,
+                   base_url: str = REDDIT_URL) -> Callable[[str], Awaitable[List[Dict[str, Any]]]]:
+    """Fetches the image posts among a subreddit's hot posts, without NSFW and pinned posts."""
+    async def fetch(subreddit: str) -> List[Dict[str, Any]]:
+        url = f"{base_url}/r/{subreddit}/hot.json"
+        async with session.get(url, params={"limit": limit}, headers={"User-Agent": "MaxyBot"}, timeout=REQUEST_TIMEOUT) as response:
+            response.raise_for_status()
+            data = await response.json()
+        posts = []
+        for child in data['data']['children']:
+            post = child['data']
+            if post.get('over_18') or post.get('stickied') or not post.get('url', '').lower().endswith(IMAGE_SUFFIXES):
+                continue
+            posts.append({key: post[key] for key in ("title", "permalink", "url", "ups", "num_comments", "subreddit")})
+        return posts
+    return fetch
+
+
+# --- Benchmark against a local stub HTTP server ---
+async def _start_stub(latency: float, requests: Dict[str, int]):
+    """A Tenor-like search endpoint on localhost that answers after `latency` seconds."""
+    from aiohttp import web
+
+    async def search(request: web.Request) -> web.Response:
+        requests[request.query["q"]] = requests.get(request.query["q"], 0) + 1
+        await asyncio.sleep(latency)
+        limit = int(request.query.get("limit", 20))
+        results = [{"media_formats": {"gif": {"url": f"https://media.example/{random.getrandbits(32):08x}.gif"}}} for _ in range(limit)]
+        return web.json_response({"results": results})
+
+    app = web.Application()
+    app.router.add_get("/v2/search", search)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/v2/search"
+
+
+async def _benchmark(commands: int, burst: int, keys: int, latency: float) -> None:
+    requests: Dict[str, int] = {}
+    runner, url = await _start_stub(latency, requests)
+    try:
+        async with aiohttp.ClientSession() as session:
+            fetch = tenor_fetcher(session, "stub", base_url=url)
+            naive = tenor_fetcher(session, "stub", limit=20, base_url=url)
+            queries = [f"query {i}" for i in range(keys)]
+            for label in ("naive", "pool"):
+                requests.clear()
+                pool = ContentPool(fetch)
+                latencies: List[float] = []
+
+                async def command(query: str) -> None:
+                    start = time.perf_counter()
+                    if label == "naive":
+                        assert random.choice(await naive(query))
+                    else:
+                        assert await pool.take(query)
+                    latencies.append(time.perf_counter() - start)
+
+                start = time.perf_counter()
+                for i in range(0, commands, burst):
+                    # Commands arrive in bursts: the first burst on a cold pool shares one request per key
+                    await asyncio.gather(*(command(random.choice(queries)) for _ in range(min(burst, commands - i))))
+                    await asyncio.sleep(0.005)
+                elapsed = time.perf_counter() - start
+                while any(p.task for p in pool._pools.values()):
+                    await asyncio.sleep(0.01)
+                latencies.sort()
+                p50, p99 = latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.99)]
+                extra = f"; {pool.hits} hits, {pool.misses} misses" if label == "pool" else ""
+                print(f"{label:<5} {commands} commands in {elapsed:.2f}s: p50 {p50 * 1000:.1f} ms, p99 {p99 * 1000:.1f} ms, "
+                      f"{sum(requests.values())} upstream requests{extra}")
+                pool.close()
+    finally:
+        await runner.cleanup()
+
+
+def main() -> int:
+    """
+    Compares live searches per command with the content pool against a local stub server.
+
+    Run from the project root: `python -m utils.content_pool --commands 2000 --burst 20`
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the content pool against a stub Tenor server.")
+    parser.add_argument("--commands", type=int, default=2000)
+    parser.add_argument("--burst", type=int, default=20, help="Commands that arrive at once.")
+    parser.add_argument("--keys", type=int, default=3, help="Distinct search queries.")
+    parser.add_argument("--latency", type=float, default=0.15, help="Simulated seconds per upstream request.")
+    args = parser.parse_args()
+    asyncio.run(_benchmark(args.commands, args.burst, args.keys, args.latency))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,256 @@
+# Filename: utils/cooldowns.py
+
+from __future__ import annotations
+import os
+import sys
+import time
+import asyncio
+import logging
+import argparse
+import tracemalloc
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Hashable, List, Optional, Tuple
+
+import discord
+from discord import app_commands
+
+if TYPE_CHECKING:
+    from .database import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+
+def _stored_key(key: Hashable) -> str:
+    return ":".join(map(str, key)) if isinstance(key, tuple) else str(key)
+
+
+class CooldownService:
+    """
+    Every command and listener cooldown, with O(1) expiry and bounded memory.
+
+    A cooldown allows `rate` uses per `per` seconds, the window starting at the first
+    use (as with discord.py's `Cooldown`). Live entries sit in one ordered dict and are
+    registered in a hashed timing wheel of `slots` buckets of `tick` seconds. Each call
+    advances the wheel over the ticks that passed and drops what expired there, so no
+    call scans the table and memory follows the number of active cooldowns. An entry
+    further out than one turn of the wheel stays in its slot for another turn. Past
+    `max_keys`, the entries of the next slot to come up (those closest to expiring)
+    are evicted.
+
+    Cooldowns of `persist_after` seconds or more (daily, work, rob) are also written to
+    the `cooldowns` table and read back when not in memory, so restarts and evictions do
+    not reset them. Times are wall-clock for that reason.
+    """
+
+    def __init__(self, db: Optional[DatabaseManager] = None, tick: float = 1.0, slots: int = 4096,
+                 max_keys: int = 1_000_000, persist_after: float = 600.0):
+        self.db = db
+        self.tick = tick
+        self.slots = slots
+        self.max_keys = max_keys
+        self.persist_after = persist_after
+        self._entries: Dict[Tuple[str, Hashable], float] = {}  # (bucket, key) -> expires at
+        self._uses: Dict[Tuple[str, Hashable], int] = {}  # Only for windows used more than once
+        self._wheel: List[List[Tuple[str, Hashable]]] = [[] for _ in range(slots)]
+        self._tick_at = int(time.time() / tick)  # The last tick the wheel was advanced to
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # --- Timing wheel ---
+    def _advance(self, now: float) -> None:
+        current = int(now / self.tick)
+        if current <= self._tick_at:
+            return
+        entries = self._entries
+        # After a gap longer than a turn, every slot is visited once
+        for tick in range(max(self._tick_at + 1, current - self.slots + 1), current + 1):
+            index = tick % self.slots
+            slot = self._wheel[index]
+            if not slot:
+                continue
+            self._wheel[index] = kept = []
+            for full_key in slot:
+                expires = entries.get(full_key)
+                if expires is None:
+                    continue  # Reset or evicted
+                if expires <= now:
+                    self._drop(full_key)
+                elif self._slot(expires) == index:
+                    kept.append(full_key)  # Due in a later turn
+                # Otherwise the key was used again and is registered in another slot
+        self._tick_at = current
+
+    def _slot(self, expires: float) -> int:
+        # The tick after the expiry, so an entry is always expired when its slot comes up
+        return (int(expires / self.tick) + 1) % self.slots
+
+    def _drop(self, full_key: Tuple[str, Hashable]) -> None:
+        del self._entries[full_key]
+        if self._uses:
+            self._uses.pop(full_key, None)
+
+    def _evict(self) -> None:
+        # Walks the slots from the next tick on; normally the very next one is occupied
+        for step in range(1, self.slots + 1):
+            slot = self._wheel[(self._tick_at + step) % self.slots]
+            while slot:
+                full_key = slot.pop()
+                if full_key in self._entries:
+                    self._drop(full_key)
+                    self.evicted += 1
+                    return
+
+    def _store(self, full_key: Tuple[str, Hashable], expires: float, uses: int) -> None:
+        if full_key not in self._entries and len(self._entries) >= self.max_keys:
+            self._evict()
+        self._entries[full_key] = expires
+        if uses > 1:
+            self._uses[full_key] = uses
+        else:
+            self._uses.pop(full_key, None)
+        self._wheel[self._slot(expires)].append(full_key)
+
+    # --- Checks ---
+    def hit(self, bucket: str, key: Hashable, rate: int, per: float, now: Optional[float] = None) -> float:
+        """
+        Counts one use of `key` in `bucket` (memory only; for listeners and short cooldowns).
+
+        Returns:
+            0 if the use is allowed, otherwise the seconds until it would be.
+        """
+        now = time.time() if now is None else now
+        self._advance(now)
+        full_key = (bucket, key)
+        expires = self._entries.get(full_key)
+        if expires is not None and expires > now:
+            uses = self._uses.get(full_key, 1)
+            if uses >= rate:
+                return expires - now
+            self._uses[full_key] = uses + 1
+            return 0.0
+        self._store(full_key, now + per, 1)
+        return 0.0
+
+    def retry_after(self, bucket: str, key: Hashable) -> float:
+        """Seconds until `key` may use `bucket` again at rate 1, without counting a use."""
+        expires = self._entries.get((bucket, key))
+        return max(0.0, expires - time.time()) if expires is not None else 0.0
+
+    def reset(self, bucket: str, key: Hashable) -> None:
+        if (bucket, key) in self._entries:
+            self._drop((bucket, key))
+
+    async def acquire(self, bucket: str, key: Hashable, rate: int, per: float) -> float:
+        """`hit()`, persisted to the database when `per` is at least `persist_after`."""
+        if self.db is None or per < self.persist_after:
+            return self.hit(bucket, key, rate, per)
+        full_key, stored = (bucket, key), _stored_key(key)
+        if full_key not in self._entries:
+            row = await self.db.fetchone(
+                "SELECT expires_at, uses FROM cooldowns WHERE bucket = ? AND key = ? AND expires_at > ?",
+                (bucket, stored, time.time())
+            )
+            if row and full_key not in self._entries:  # A concurrent call may have stored a newer one
+                self._store(full_key, row['expires_at'], row['uses'])
+        retry = self.hit(bucket, key, rate, per)
+        if not retry:
+            expires, uses = self._entries[full_key], self._uses.get(full_key, 1)
+            await self.db.execute(
+                "INSERT INTO cooldowns (bucket, key, expires_at, uses) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(bucket, key) DO UPDATE SET expires_at = excluded.expires_at, uses = excluded.uses",
+                (bucket, stored, expires, uses)
+            )
+        return retry
+
+    async def purge(self) -> None:
+        """Deletes expired rows from the `cooldowns` table."""
+        if self.db is not None:
+            await self.db.execute("DELETE FROM cooldowns WHERE expires_at <= ?", (time.time(),))
+
+
+def cooldown(rate: int, per: float, bucket: Optional[str] = None):
+    """
+    A per-member app command cooldown kept by `bot.cooldowns`, in place of
+    `app_commands.checks.cooldown`. It raises the same `CommandOnCooldown`, so the existing
+    error handlers apply. `bucket` defaults to the command's name; commands that share a
+    bucket share the cooldown.
+    """
+    async def predicate(interaction: discord.Interaction) -> bool:
+        name = bucket or interaction.command.qualified_name
+        retry = await interaction.client.cooldowns.acquire(name, (interaction.guild_id, interaction.user.id), rate, per)
+        if retry:
+            raise app_commands.CommandOnCooldown(app_commands.Cooldown(rate, per), retry)
+        return True
+    return app_commands.check(predicate)
+
+
+# --- Benchmark ---
+async def _benchmark(keys: int, workdir: Path) -> None:
+    from .database import DatabaseManager
+
+    start = float(int(time.time()))
+    service = CooldownService(max_keys=keys)
+    service._tick_at = int(start)
+    elapsed = time.perf_counter()
+    for i in range(keys):
+        # XP-style cooldowns: one minute each, started over the first minute
+        service.hit("xp", (i % 1000, i), 1, 60, now=start + i * 60 / keys)
+    elapsed = time.perf_counter() - elapsed
+    print(f"track   {keys:,} keys: {keys / elapsed:,.0f} hits/s")
+
+    tracemalloc.start()
+    sample = CooldownService()
+    for i in range(100_000):
+        sample.hit("xp", (i % 1000, 10**18 + i), 1, 60, now=start)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"memory  {memory / 100_000:.0f} B per key with snowflake ids (~{memory * keys / 100_000 / 2**20:,.0f} MiB at {keys:,})")
+
+    live = range(0, keys, 7)
+    elapsed = time.perf_counter()
+    denied = sum(1 for i in live if service.hit("xp", (i % 1000, i), 1, 60, now=start + 59.5))
+    elapsed = time.perf_counter() - elapsed
+    print(f"check   {len(live):,} live keys: {len(live) / elapsed:,.0f} checks/s, {denied:,} on cooldown")
+
+    slowest = 0.0
+    for second in range(60, 122):
+        elapsed = time.perf_counter()
+        service.hit("xp", (0, -second), 1, 60, now=start + second)
+        slowest = max(slowest, time.perf_counter() - elapsed)
+    print(f"expire  one call per second for a minute: slowest {slowest * 1000:.1f} ms; {len(service):,} keys left")
+
+    for i in range(keys + 1):
+        service.hit("xp", (i % 1000, i), 1, 3600, now=start + 122)
+    print(f"bound   {keys + 1:,} one-hour cooldowns at max_keys={keys:,}: {len(service):,} kept, {service.evicted:,} evicted")
+
+    workdir.mkdir(parents=True, exist_ok=True)
+    path = workdir / "cooldowns.db"
+    for suffix in ("", "-wal", "-shm"):
+        Path(f"{path}{suffix}").unlink(missing_ok=True)
+    db = DatabaseManager(path)
+    await db.init()
+    first = await CooldownService(db).acquire("daily", (1, 2), 1, 86_400)
+    retry = await CooldownService(db).acquire("daily", (1, 2), 1, 86_400)  # A fresh process
+    print(f"persist /daily after a restart: first use allowed={not first}, retry after {retry / 3600:.1f} h")
+    await db.close()
+
+
+def main() -> int:
+    """
+    Tracks a million XP cooldowns, then checks, expires and evicts them, and checks that
+    a long cooldown survives a restart.
+
+    Run from the project root: `python -m utils.cooldowns --keys 1000000`
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the cooldown service.")
+    parser.add_argument("--keys", type=int, default=1_000_000)
+    parser.add_argument("--workdir", type=Path, default=Path(os.getenv("TMPDIR", "/tmp")) / "maxy-cooldown-bench")
+    args = parser.parse_args()
+    asyncio.run(_benchmark(args.keys, args.workdir))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,8 +3,12 @@
 import aiosqlite
 import logging
 import asyncio
+import time
+import contextlib
 from pathlib import Path
-from typing import Any, Iterable, Optional, List, Union, Dict
+from typing import Any, AsyncIterator, Iterable, Optional, List, Set, Union, Dict
+
+from .query_profiler import QueryProfiler
 
 # Set up a logger for database-related messages
 logger = logging.getLogger(__name__)
@@ -16,18 +20,32 @@ class DatabaseManager:
 
     This class handles connection, initialization, and common database operations,
     with added concurrency control to prevent 'database is locked' errors.
+
+    Multi-process mode (cluster workers sharing one database file): the asyncio lock
+    only serializes writers inside one process. Across processes SQLite itself does it;
+    the database runs in WAL mode so readers never block, and `busy_timeout` makes a
+    writer wait for another process's write transaction instead of failing with
+    'database is locked'. Keep write transactions short (no awaits on Discord inside
+    them), and keep per-guild caches in the worker that owns the guild.
     """
 
-    def __init__(self, db_path: Union[str, Path]):
+    def __init__(self, db_path: Union[str, Path], slow_query_threshold: float = 0.25, busy_timeout: float = 5.0):
         """
         Initializes the DatabaseManager.
 
         Args:
             db_path: The file path to the SQLite database.
+            slow_query_threshold: Queries taking longer than this many seconds are
+                logged together with their `EXPLAIN QUERY PLAN` output.
+            busy_timeout: How many seconds a statement waits for a lock held by another
+                process before raising 'database is locked'.
         """
         self._db_path = Path(db_path)
         self._db: Optional[aiosqlite.Connection] = None
         self._lock = asyncio.Lock()  # Lock for serializing write operations
+        self.busy_timeout = busy_timeout
+        self.profiler = QueryProfiler(slow_threshold=slow_query_threshold)
+        self._explain_tasks: Set[asyncio.Task] = set()  # Referenced so they are not collected mid-run
 
     async def _get_db(self) -> aiosqlite.Connection:
         """
@@ -39,10 +57,14 @@ class DatabaseManager:
         Returns:
             An active aiosqlite.Connection object.
         """
+        # Fast path: reads should not queue behind writers just to get the connection.
+        if self._db is not None and self._db._running:
+            return self._db
         async with self._lock:
             if self._db is None or not self._db._running:
                 self._db_path.parent.mkdir(parents=True, exist_ok=True)
-                self._db = await aiosqlite.connect(self._db_path)
+                # `timeout` is SQLite's busy timeout: wait for writers in other processes instead of failing
+                self._db = await aiosqlite.connect(self._db_path, timeout=self.busy_timeout)
                 self._db.row_factory = aiosqlite.Row
                 # Enable Write-Ahead Logging for better concurrency
                 await self._db.execute("PRAGMA journal_mode=WAL;")
@@ -66,6 +88,7 @@ class DatabaseManager:
                 user_id TEXT NOT NULL,
                 wallet INTEGER DEFAULT 0,
                 bank INTEGER DEFAULT 0,
+                net_worth INTEGER GENERATED ALWAYS AS (wallet + bank) VIRTUAL,
                 PRIMARY KEY (guild_id, user_id)
             )''',
             # Leveling
@@ -125,7 +148,8 @@ class DatabaseManager:
                 channel_id TEXT PRIMARY KEY,
                 guild_id TEXT NOT NULL,
                 user_id TEXT NOT NULL,
-                status TEXT DEFAULT 'open' CHECK(status IN ('open', 'closed'))
+                status TEXT DEFAULT 'open' CHECK(status IN ('open', 'closed')),
+                claimed_by TEXT
             )''',
             # Auto Responses
             '''CREATE TABLE IF NOT EXISTS auto_responses (
@@ -174,6 +198,56 @@ class DatabaseManager:
                 option_index INTEGER NOT NULL,
                 PRIMARY KEY (poll_id, user_id),
                 FOREIGN KEY (poll_id) REFERENCES polls(poll_id) ON DELETE CASCADE
+            )''',
+            # Guild Settings (only the keys that differ from the defaults, JSON encoded)
+            '''CREATE TABLE IF NOT EXISTS guild_config (
+                guild_id TEXT PRIMARY KEY,
+                settings TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )''',
+            # Economy Ledger (append-only journal of balance changes, see utils/economy_ledger.py)
+            '''CREATE TABLE IF NOT EXISTS economy_ledger (
+                entry_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                guild_id TEXT NOT NULL,
+                user_id TEXT NOT NULL,
+                wallet_change INTEGER NOT NULL,
+                bank_change INTEGER NOT NULL,
+                reason TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )''',
+            # Ticket Transcripts (export cursor: re-exports only append newer messages)
+            '''CREATE TABLE IF NOT EXISTS ticket_transcripts (
+                channel_id TEXT PRIMARY KEY,
+                guild_id TEXT NOT NULL,
+                last_message_id TEXT,
+                message_count INTEGER NOT NULL DEFAULT 0,
+                path TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )''',
+            # Cooldowns (only the long ones, see utils/cooldowns.py)
+            '''CREATE TABLE IF NOT EXISTS cooldowns (
+                bucket TEXT NOT NULL,
+                key TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                uses INTEGER NOT NULL,
+                PRIMARY KEY (bucket, key)
+            )''',
+            # Bulk Moderation Jobs (targets and progress, so jobs resume after a restart; see utils/bulk_moderation.py)
+            '''CREATE TABLE IF NOT EXISTS moderation_jobs (
+                job_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                guild_id TEXT NOT NULL,
+                moderator_id TEXT NOT NULL,
+                channel_id TEXT NOT NULL,
+                action TEXT NOT NULL CHECK(action IN ('ban', 'kick', 'timeout', 'purge')),
+                reason TEXT,
+                params TEXT NOT NULL, -- JSON encoded
+                targets TEXT NOT NULL, -- JSON encoded list of member (or channel) ids
+                cursor INTEGER NOT NULL DEFAULT 0,
+                affected INTEGER NOT NULL DEFAULT 0,
+                failed INTEGER NOT NULL DEFAULT 0,
+                status TEXT NOT NULL DEFAULT 'running' CHECK(status IN ('running', 'done', 'cancelled')),
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
             )'''
         ]
         
@@ -189,6 +263,62 @@ class DatabaseManager:
                 logger.error(f"Failed to initialize database tables: {e}")
                 await db.rollback()
 
+        # Columns added after a table was first released; older databases get them here.
+        added_columns = {
+            "tickets": {"claimed_by": "TEXT"},
+            "economy": {"net_worth": "INTEGER GENERATED ALWAYS AS (wallet + bank) VIRTUAL"},
+        }
+        async with self._lock:
+            for table, columns in added_columns.items():
+                # table_xinfo also lists generated columns, which table_info hides
+                async with db.execute(f"PRAGMA table_xinfo({table})") as cursor:
+                    existing = {row['name'] for row in await cursor.fetchall()}
+                for column, declaration in columns.items():
+                    if column not in existing:
+                        await db.execute(f"ALTER TABLE {table} ADD COLUMN {column} {declaration}")
+                        logger.info(f"Added column {table}.{column}.")
+            await db.commit()
+
+        # Indexes that serve the leaderboards in order (see utils/leaderboards.py); no query sorts.
+        indexes = [
+            "CREATE INDEX IF NOT EXISTS idx_leveling_board ON leveling (guild_id, level DESC, xp DESC, user_id DESC)",
+            "CREATE INDEX IF NOT EXISTS idx_economy_board ON economy (guild_id, net_worth DESC, user_id DESC)",
+        ]
+        async with self._lock:
+            for query in indexes:
+                await db.execute(query)
+            await db.commit()
+
+
+    @contextlib.asynccontextmanager
+    async def _timed_lock(self) -> AsyncIterator[float]:
+        """Acquires the write lock and yields how long the caller waited for it."""
+        wait_start = time.perf_counter()
+        async with self._lock:
+            yield time.perf_counter() - wait_start
+
+    def _record_query(self, query: str, params: Iterable[Any], duration: float, rows: int, lock_wait: float = 0.0) -> None:
+        """Feeds one execution into the profiler and explains the query if it was slow."""
+        if self.profiler.record(query, duration, max(rows, 0), lock_wait):
+            logger.warning(
+                f"Slow query ({duration * 1000:.1f} ms, waited {lock_wait * 1000:.1f} ms for lock): "
+                f"{self.profiler.get(query).query}"
+            )
+            task = asyncio.create_task(self._explain_query(query, params))
+            self._explain_tasks.add(task)
+            task.add_done_callback(self._explain_tasks.discard)
+
+    async def _explain_query(self, query: str, params: Iterable[Any]) -> None:
+        """Logs the `EXPLAIN QUERY PLAN` output for a query."""
+        try:
+            db = await self._get_db()
+            async with db.execute(f"EXPLAIN QUERY PLAN {query}", tuple(params)) as cursor:
+                plan = await cursor.fetchall()
+        except (aiosqlite.Error, ValueError) as e:
+            logger.debug(f"Could not explain query '{query}': {e}")
+            return
+        plan_lines = "\n".join(f"  {row['detail']}" for row in plan) or "  (no plan)"
+        logger.warning(f"Query plan for slow query:\n{plan_lines}")
 
     async def execute(self, query: str, params: Iterable[Any] = ()) -> None:
         """
@@ -196,9 +326,11 @@ class DatabaseManager:
         This operation is locked to prevent concurrency issues.
         """
         db = await self._get_db()
-        async with self._lock:
-            await db.execute(query, params)
+        async with self._timed_lock() as lock_wait:
+            start = time.perf_counter()
+            cursor = await db.execute(query, params)
             await db.commit()
+            self._record_query(query, params, time.perf_counter() - start, cursor.rowcount, lock_wait)
 
     async def executemany(self, query: str, seq_of_params: Iterable[Iterable[Any]]) -> None:
         """
@@ -206,8 +338,29 @@ class DatabaseManager:
         This operation is locked to prevent concurrency issues.
         """
         db = await self._get_db()
-        async with self._lock:
-            await db.executemany(query, seq_of_params)
+        async with self._timed_lock() as lock_wait:
+            start = time.perf_counter()
+            cursor = await db.executemany(query, seq_of_params)
+            await db.commit()
+            self._record_query(query, (), time.perf_counter() - start, cursor.rowcount, lock_wait)
+
+    @contextlib.asynccontextmanager
+    async def transaction(self) -> AsyncIterator[aiosqlite.Connection]:
+        """
+        Runs the statements issued on the yielded connection as one atomic write.
+
+        The write lock is held throughout and the transaction starts with `BEGIN IMMEDIATE`,
+        so it also excludes writers in other processes. It commits when the block exits and
+        rolls back if the block raises (or is cancelled). Do not await Discord inside it.
+        """
+        db = await self._get_db()
+        async with self._timed_lock():
+            await db.execute("BEGIN IMMEDIATE")
+            try:
+                yield db
+            except BaseException:
+                await db.rollback()
+                raise
             await db.commit()
 
     async def fetchone(self, query: str, params: Iterable[Any] = ()) -> Optional[aiosqlite.Row]:
@@ -215,19 +368,29 @@ class DatabaseManager:
         Fetches a single row from the database (read operation).
         """
         db = await self._get_db()
+        start = time.perf_counter()
         async with db.execute(query, params) as cursor:
-            return await cursor.fetchone()
+            row = await cursor.fetchone()
+        self._record_query(query, params, time.perf_counter() - start, 1 if row else 0)
+        return row
 
     async def fetchall(self, query: str, params: Iterable[Any] = ()) -> List[aiosqlite.Row]:
         """
         Fetches all rows from a database query (read operation).
         """
         db = await self._get_db()
+        start = time.perf_counter()
         async with db.execute(query, params) as cursor:
-            return await cursor.fetchall()
+            rows = await cursor.fetchall()
+        self._record_query(query, params, time.perf_counter() - start, len(rows))
+        return rows
 
     async def close(self) -> None:
         """Closes the database connection if it is open."""
+        for task in self._explain_tasks:
+            task.cancel()
+        if self._explain_tasks:
+            await asyncio.gather(*self._explain_tasks, return_exceptions=True)
         if self._db:
             await self._db.close()
             self._db = None
@@ -254,10 +417,14 @@ class DatabaseManager:
         """
         Removes an auto-response from a guild. Returns True if a row was deleted.
         """
+        query = "DELETE FROM auto_responses WHERE guild_id = ? AND trigger = ?"
+        params = (str(guild_id), trigger)
         db = await self._get_db()
-        async with self._lock:
-            async with db.execute("DELETE FROM auto_responses WHERE guild_id = ? AND trigger = ?", (str(guild_id), trigger)) as cursor:
+        async with self._timed_lock() as lock_wait:
+            start = time.perf_counter()
+            async with db.execute(query, params) as cursor:
                 await db.commit()
+                self._record_query(query, params, time.perf_counter() - start, cursor.rowcount, lock_wait)
                 # cursor.rowcount will be 1 if a row was deleted, 0 otherwise
                 return cursor.rowcount > 0
 
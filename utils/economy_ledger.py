@@ -0,0 +1,235 @@
+# Filename: utils/economy_ledger.py
+
+from __future__ import annotations
+import os
+import sys
+import time
+import random
+import asyncio
+import logging
+import argparse
+from pathlib import Path
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, NamedTuple, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    from .database import DatabaseManager
+    from .leaderboards import Leaderboard
+
+logger = logging.getLogger(__name__)
+
+
+class Balance(NamedTuple):
+    wallet: int
+    bank: int
+
+    @property
+    def total(self) -> int:
+        return self.wallet + self.bank
+
+
+class Change(NamedTuple):
+    """One account's part of a ledger operation."""
+
+    user_id: int
+    wallet: int = 0
+    bank: int = 0
+    requires: int = 0  # Wallet the account must hold beforehand (e.g. a bet that is settled in the same change)
+
+
+class InsufficientFunds(Exception):
+    """A change would have left an account negative (or below `requires`); nothing was applied."""
+
+    def __init__(self, user_id: int):
+        super().__init__(f"Insufficient funds for user {user_id}")
+        self.user_id = user_id
+
+
+class EconomyLedger:
+    """
+    Applies balance changes atomically, with the balance checks done by SQLite.
+
+    `apply()` runs every change of an operation (a payment is two changes, a purchase
+    one change plus an inventory insert) in a single write transaction. Each change is
+    an `UPDATE ... WHERE wallet + ? >= 0 AND bank + ? >= 0 AND wallet >= ? RETURNING`,
+    so the check and the write cannot be separated by another command: if any account
+    would go negative the whole operation rolls back and `InsufficientFunds` is raised.
+    Accounts are created with the guild's start balance inside the same transaction.
+
+    Balances read or written go into a write-through LRU cache, updated only after the
+    transaction committed. Every write for a guild goes through its owning process,
+    so the cache stays authoritative in cluster mode too.
+
+    With `journal` on, each change is also appended to the `economy_ledger` table.
+    """
+
+    def __init__(self, db: DatabaseManager, start_balance: Callable[[int], int], board: Optional[Leaderboard] = None,
+                 journal: bool = False, cache_size: int = 10_000):
+        self.db = db
+        self.start_balance = start_balance  # guild id -> wallet of a new account
+        self.board = board
+        self.journal = journal
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[Tuple[int, int], Balance]" = OrderedDict()
+        self.hits = self.misses = 0
+
+    # --- Cache ---
+    def _remember(self, guild_id: int, user_id: int, balance: Balance) -> None:
+        key = (guild_id, user_id)
+        self._cache[key] = balance
+        self._cache.move_to_end(key)
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def forget(self, guild_id: int, user_id: Optional[int] = None) -> None:
+        """Drops cached balances of one member, or of a whole guild."""
+        if user_id is not None:
+            self._cache.pop((guild_id, user_id), None)
+        else:
+            for key in [key for key in self._cache if key[0] == guild_id]:
+                del self._cache[key]
+
+    # --- Reads ---
+    async def balance(self, guild_id: int, user_id: int) -> Balance:
+        """A member's balance; opens the account if it does not exist yet."""
+        cached = self._cache.get((guild_id, user_id))
+        if cached is not None:
+            self.hits += 1
+            self._cache.move_to_end((guild_id, user_id))
+            return cached
+        self.misses += 1
+        # Read inside the write lock so a concurrent change cannot be cached over by an older value
+        async with self.db.transaction() as db:
+            created = await self._open(db, guild_id, user_id)
+            async with db.execute("SELECT wallet, bank FROM economy WHERE guild_id = ? AND user_id = ?", (guild_id, user_id)) as cursor:
+                row = await cursor.fetchone()
+        balance = Balance(row['wallet'], row['bank'])
+        self._remember(guild_id, user_id, balance)
+        if created and self.board:
+            self.board.note_score(guild_id, user_id, (balance.total,))
+        return balance
+
+    async def _open(self, db, guild_id: int, user_id: int) -> bool:
+        cursor = await db.execute(
+            "INSERT INTO economy (guild_id, user_id, wallet) VALUES (?, ?, ?) ON CONFLICT(guild_id, user_id) DO NOTHING",
+            (guild_id, user_id, self.start_balance(guild_id))
+        )
+        return cursor.rowcount > 0
+
+    # --- Writes ---
+    async def apply(self, guild_id: int, changes: Sequence[Change], reason: str,
+                    statements: Iterable[Tuple[str, Sequence[Any]]] = ()) -> Dict[int, Balance]:
+        """
+        Applies all changes, plus any extra `(sql, params)` statements, in one transaction.
+
+        Returns:
+            The new balance of every account involved.
+
+        Raises:
+            InsufficientFunds: An account failed its guard; nothing was applied.
+        """
+        results: Dict[int, Balance] = {}
+        async with self.db.transaction() as db:
+            for change in changes:
+                await self._open(db, guild_id, change.user_id)
+                async with db.execute(
+                    "UPDATE economy SET wallet = wallet + ?, bank = bank + ? "
+                    "WHERE guild_id = ? AND user_id = ? AND wallet + ? >= 0 AND bank + ? >= 0 AND wallet >= ? "
+                    "RETURNING wallet, bank",
+                    (change.wallet, change.bank, guild_id, change.user_id, change.wallet, change.bank, change.requires)
+                ) as cursor:
+                    row = await cursor.fetchone()
+                if row is None:
+                    raise InsufficientFunds(change.user_id)
+                results[change.user_id] = Balance(row['wallet'], row['bank'])
+            for query, params in statements:
+                await db.execute(query, params)
+            if self.journal:
+                now = time.time()
+                await db.executemany(
+                    "INSERT INTO economy_ledger (guild_id, user_id, wallet_change, bank_change, reason, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    [(guild_id, c.user_id, c.wallet, c.bank, reason, now) for c in changes]
+                )
+
+        for user_id, balance in results.items():
+            self._remember(guild_id, user_id, balance)
+            if self.board:
+                self.board.note_score(guild_id, user_id, (balance.total,))
+        return results
+
+    async def transfer(self, guild_id: int, from_user: int, to_user: int, amount: int, reason: str = "transfer") -> Dict[int, Balance]:
+        """Moves `amount` from one wallet to another."""
+        return await self.apply(guild_id, [Change(from_user, wallet=-amount), Change(to_user, wallet=amount)], reason)
+
+
+# --- Benchmark ---
+async def _legacy_transfer(db: DatabaseManager, guild_id: int, from_user: int, to_user: int, amount: int) -> bool:
+    # The previous /pay: read, check, then two committed statements per account.
+    row = await db.fetchone("SELECT wallet FROM economy WHERE guild_id = ? AND user_id = ?", (guild_id, from_user))
+    if row['wallet'] < amount:
+        return False
+    for user_id, delta in ((from_user, -amount), (to_user, amount)):
+        await db.execute("INSERT OR IGNORE INTO economy (guild_id, user_id) VALUES (?, ?)", (guild_id, user_id))
+        await db.execute("UPDATE economy SET wallet = wallet + ? WHERE guild_id = ? AND user_id = ?", (delta, guild_id, user_id))
+    return True
+
+
+async def _benchmark(transfers: int, accounts: int, workdir: Path) -> None:
+    from .database import DatabaseManager
+
+    workdir.mkdir(parents=True, exist_ok=True)
+    guild, start = 1, 1_000
+    rng = random.Random(7)
+    plan = [(rng.randrange(accounts), rng.randrange(accounts), rng.randint(1, 400)) for _ in range(transfers)]
+    plan = [(a, b, amount) for a, b, amount in plan if a != b]
+
+    for label in ("legacy", "ledger", "ledger+journal"):
+        path = workdir / f"{label}.db"
+        for suffix in ("", "-wal", "-shm"):
+            Path(f"{path}{suffix}").unlink(missing_ok=True)
+        db = DatabaseManager(path)
+        await db.init()
+        await db.executemany("INSERT INTO economy (guild_id, user_id, wallet) VALUES (?, ?, ?)", [(guild, u, start) for u in range(accounts)])
+
+        elapsed = time.perf_counter()
+        if label == "legacy":
+            async def pay(a, b, amount):
+                return await _legacy_transfer(db, guild, a, b, amount)
+        else:
+            ledger = EconomyLedger(db, lambda _: start, journal=label.endswith("journal"))
+
+            async def pay(a, b, amount):
+                try:
+                    await ledger.transfer(guild, a, b, amount)
+                    return True
+                except InsufficientFunds:
+                    return False
+        results = await asyncio.gather(*(pay(a, b, amount) for a, b, amount in plan))
+        elapsed = time.perf_counter() - elapsed
+
+        totals = await db.fetchone("SELECT SUM(wallet) AS money, MIN(wallet) AS lowest, SUM(wallet < 0) AS negative FROM economy WHERE guild_id = ?", (guild,))
+        journal = await db.fetchone("SELECT COUNT(*) AS entries FROM economy_ledger")
+        print(f"{label:<15} {len(plan) / elapsed:8.0f} transfers/s  applied {sum(results):4}/{len(plan)}  "
+              f"money {totals['money']:,} (expected {accounts * start:,})  negative accounts {totals['negative']}  "
+              f"lowest {totals['lowest']}  journal entries {journal['entries']}")
+        await db.close()
+
+
+def main() -> int:
+    """
+    Runs concurrent transfers between a few accounts, with the old read-then-write
+    pattern and with the ledger, and checks that no money was created or overdrawn.
+
+    Run from the project root: `python -m utils.economy_ledger --transfers 1000`
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the economy ledger under concurrent transfers.")
+    parser.add_argument("--transfers", type=int, default=1_000)
+    parser.add_argument("--accounts", type=int, default=20, help="Few accounts means many conflicting transfers.")
+    parser.add_argument("--workdir", type=Path, default=Path(os.getenv("TMPDIR", "/tmp")) / "maxy-ledger-bench")
+    args = parser.parse_args()
+    asyncio.run(_benchmark(args.transfers, args.accounts, args.workdir))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
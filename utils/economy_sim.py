@@ -0,0 +1,242 @@
+# Filename: utils/economy_sim.py
+
+import sys
+import time
+import argparse
+from typing import Dict, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Blackjack decks are simulated in chunks of this many games (52 bytes each).
+CHUNK = 250_000
+
+
+class Payouts(NamedTuple):
+    """The tunable game rules; `current_payouts()` reads the live values from cogs/economy.py."""
+
+    daily: Tuple[int, int]
+    work: Tuple[int, int]
+    slot_symbols: int
+    slots_triple: float
+    slots_pair: float
+    flip: float
+    blackjack: float
+    blackjack_natural: float
+    dealer_stands_at: int
+    rob_odds: int
+    rob_fine: Tuple[int, int]
+
+
+class Policy(NamedTuple):
+    """How a kind of player behaves per day."""
+
+    name: str
+    bet: int
+    slots: int              # Rounds per day
+    flips: int
+    blackjack: int
+    stand_at: int           # Blackjack: hit while the hand is below this
+    works: int              # /work is on a one hour cooldown
+    daily_rate: float       # Share of days /daily is claimed
+    robs: float             # Attempts per day (Poisson mean)
+
+
+POLICIES: Dict[str, Policy] = {
+    "casual": Policy("casual", bet=100, slots=3, flips=2, blackjack=1, stand_at=17, works=2, daily_rate=0.5, robs=0.2),
+    "grinder": Policy("grinder", bet=50, slots=0, flips=0, blackjack=0, stand_at=17, works=12, daily_rate=1.0, robs=1.0),
+    "gambler": Policy("gambler", bet=2000, slots=100, flips=100, blackjack=40, stand_at=15, works=4, daily_rate=1.0, robs=3.0),
+}
+
+
+def current_payouts() -> Payouts:
+    from cogs import economy as eco
+
+    return Payouts(
+        daily=eco.DAILY_REWARD, work=eco.WORK_REWARD, slot_symbols=len(eco.SLOT_SYMBOLS),
+        slots_triple=eco.SLOTS_TRIPLE_PAYOUT, slots_pair=eco.SLOTS_PAIR_PAYOUT, flip=eco.FLIP_PAYOUT,
+        blackjack=eco.BLACKJACK_PAYOUT, blackjack_natural=eco.BLACKJACK_NATURAL_PAYOUT, dealer_stands_at=eco.DEALER_STANDS_AT,
+        rob_odds=eco.ROB_ODDS, rob_fine=eco.ROB_FINE,
+    )
+
+
+def card_values() -> np.ndarray:
+    """The 52-card deck as blackjack values, each one scored by `BlackjackGame._calculate_value` (aces are 11)."""
+    from cogs.economy import BlackjackGame
+
+    game = BlackjackGame()
+    return np.array([game._calculate_value([card]) for card in game._create_deck()], dtype=np.int8)
+
+
+def hand_value(total: np.ndarray, aces: np.ndarray) -> np.ndarray:
+    """Vectorized `_calculate_value`: count aces as 1 instead of 11 until the hand is 21 or less."""
+    demote = np.minimum(aces, np.maximum(0, -(-(total - 21) // 10)))
+    return total - 10 * demote
+
+
+# --- Round simulators: net result of each round in units of the bet ---
+def slots_rounds(n: int, rng: np.random.Generator, p: Payouts) -> np.ndarray:
+    reels = rng.integers(0, p.slot_symbols, size=(n, 3), dtype=np.int8)
+    left, right = reels[:, 0] == reels[:, 1], reels[:, 1] == reels[:, 2]
+    payout = np.where(left & right, p.slots_triple, np.where(left | right, p.slots_pair, 0.0))
+    return payout - 1.0
+
+
+def flip_rounds(n: int, rng: np.random.Generator, p: Payouts) -> np.ndarray:
+    return np.where(rng.random(n) < 0.5, p.flip - 1.0, -1.0)
+
+
+def blackjack_rounds(n: int, rng: np.random.Generator, p: Payouts, stand_at: int, deck: np.ndarray) -> np.ndarray:
+    """Plays `n` games from freshly shuffled decks: the player hits below `stand_at`, the dealer below 17."""
+    results = []
+    for start in range(0, n, CHUNK):
+        m = min(CHUNK, n - start)
+        cards = rng.permuted(np.broadcast_to(deck, (m, deck.size)), axis=1).astype(np.int16)
+        rows = np.arange(m)
+        # Dealt like BlackjackGame.deal_initial: player, dealer, player, dealer; then one shared draw pile
+        p_total, d_total = cards[:, 0] + cards[:, 2], cards[:, 1] + cards[:, 3]
+        p_aces = (cards[:, 0] == 11).astype(np.int16) + (cards[:, 2] == 11)
+        d_aces = (cards[:, 1] == 11).astype(np.int16) + (cards[:, 3] == 11)
+        drawn = np.full(m, 4)
+        player = hand_value(p_total, p_aces)
+        natural = player == 21
+
+        hitting = ~natural & (player < stand_at)
+        while hitting.any():
+            card = cards[rows, drawn]
+            p_total = p_total + np.where(hitting, card, 0)
+            p_aces = p_aces + (hitting & (card == 11))
+            drawn = drawn + hitting
+            player = hand_value(p_total, p_aces)
+            hitting &= player < stand_at
+
+        dealer = hand_value(d_total, d_aces)
+        hitting = ~natural & (player <= 21) & (dealer < p.dealer_stands_at)
+        while hitting.any():
+            card = cards[rows, drawn]
+            d_total = d_total + np.where(hitting, card, 0)
+            d_aces = d_aces + (hitting & (card == 11))
+            drawn = drawn + hitting
+            dealer = hand_value(d_total, d_aces)
+            hitting &= dealer < p.dealer_stands_at
+
+        win, lose = p.blackjack - 1.0, -1.0
+        net = np.select(
+            [natural, player > 21, dealer > 21, dealer > player, player > dealer],
+            [p.blackjack_natural - 1.0, lose, win, lose, win],
+            default=0.0,  # Push: the bet is returned
+        )
+        results.append(net)
+    return np.concatenate(results)
+
+
+def check_rules(rng: np.random.Generator, deck: np.ndarray, hands: int = 20_000) -> None:
+    """Asserts that `hand_value` scores random hands exactly like `BlackjackGame._calculate_value`."""
+    from cogs.economy import BlackjackGame
+
+    game = BlackjackGame()
+    names = {2: '2', 3: '3', 4: '4', 5: '5', 6: '6', 7: '7', 8: '8', 9: '9', 10: 'K', 11: 'A'}
+    for size in rng.integers(2, 8, size=hands):
+        hand = rng.choice(deck, size=size).astype(int)
+        expected = game._calculate_value([{'rank': names[v]} for v in hand])
+        got = int(hand_value(np.array([hand.sum()]), np.array([(hand == 11).sum()]))[0])
+        assert got == expected, f"hand {hand.tolist()}: simulator {got}, game {expected}"
+
+
+# --- Money supply ---
+class Report(NamedTuple):
+    ev: Dict[str, Tuple[float, float]]          # game -> (mean, std) of one round, in bets
+    flows: Dict[str, Tuple[float, float]]       # source -> (mean, std) of coins created per player-day
+    growth: float                               # Mean coins created per player over the horizon
+
+
+def simulate_policy(policy: Policy, p: Payouts, rng: np.random.Generator, rounds: int, players: int, days: int,
+                    deck: np.ndarray) -> Report:
+    samples = {
+        "slots": slots_rounds(rounds, rng, p),
+        "flip": flip_rounds(rounds, rng, p),
+        "blackjack": blackjack_rounds(rounds, rng, p, policy.stand_at, deck),
+    }
+    ev = {game: (float(s.mean()), float(s.std())) for game, s in samples.items()}
+    plays = {"slots": policy.slots, "flip": policy.flips, "blackjack": policy.blackjack}
+
+    n = players * days  # One row per player-day
+    flows: Dict[str, np.ndarray] = {
+        "daily": np.where(rng.random(n) < policy.daily_rate, rng.integers(p.daily[0], p.daily[1] + 1, n), 0),
+        "work": rng.integers(p.work[0], p.work[1] + 1, (n, policy.works)).sum(axis=1) if policy.works else np.zeros(n),
+    }
+    for game, count in plays.items():
+        # Bootstrap from the simulated rounds: the net of `count` rounds per player-day
+        flows[game] = np.zeros(n) if not count else policy.bet * np.add.reduce(
+            [rng.choice(samples[game], n) for _ in range(count)]
+        )
+    attempts = rng.poisson(policy.robs, n)
+    failures = rng.binomial(attempts, 1 - 1 / p.rob_odds)
+    # A failed robbery's fine leaves the economy; a successful one only moves coins between members
+    draws = rng.integers(p.rob_fine[0], p.rob_fine[1] + 1, failures.sum())
+    fines = np.bincount(np.repeat(np.arange(n), failures), weights=draws, minlength=n)
+    flows["rob fines"] = -fines
+    flows["total"] = sum(flows.values())
+    stats = {source: (float(v.mean()), float(v.std())) for source, v in flows.items()}
+    return Report(ev, stats, stats["total"][0] * days)
+
+
+def _parse_overrides(pairs: Sequence[str], payouts: Payouts, parser: argparse.ArgumentParser) -> Payouts:
+    # Fields are typed by the NamedTuple, not by the current value: SLOTS_PAIR_PAYOUT = 3 still takes 2.5
+    changes = {}
+    for pair in pairs:
+        name, _, value = pair.partition("=")
+        if name not in Payouts._fields:
+            parser.error(f"unknown payout '{name}'. Choose from: {', '.join(Payouts._fields)}")
+        kind = Payouts.__annotations__[name]
+        try:
+            if isinstance(getattr(payouts, name), tuple):
+                low, high = (int(v) for v in value.split(","))
+                changes[name] = (low, high)
+            elif kind is int:
+                changes[name] = int(value)
+            else:
+                changes[name] = float(value)
+        except ValueError:
+            parser.error(f"invalid value for {name}: '{value}'")
+    return payouts._replace(**changes)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """
+    Simulates the economy games and faucets with the current (or overridden) payouts.
+
+    Run from the project root:
+        python -m utils.economy_sim --rounds 1000000
+        python -m utils.economy_sim --set slots_pair=2.5 --set daily=300,900 --policy gambler
+    """
+    parser = argparse.ArgumentParser(description="Monte Carlo simulation of the economy games.")
+    parser.add_argument("--rounds", type=int, default=1_000_000, help="Rounds simulated per game and policy.")
+    parser.add_argument("--players", type=int, default=10_000)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--policy", choices=[*POLICIES, "all"], default="all")
+    parser.add_argument("--set", dest="overrides", action="append", default=[], metavar="NAME=VALUE",
+                        help="Override a payout, e.g. slots_triple=8 or work=100,300.")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    payouts = _parse_overrides(args.overrides, current_payouts(), parser)
+    deck = card_values()
+    check_rules(rng, deck)
+    print(f"Payouts: {payouts._asdict()}\n")
+
+    for name in (POLICIES if args.policy == "all" else [args.policy]):
+        policy = POLICIES[name]
+        start = time.perf_counter()
+        report = simulate_policy(policy, payouts, rng, args.rounds, args.players, args.days, deck)
+        print(f"[{name}] bet {policy.bet:,}, blackjack stands at {policy.stand_at}  ({time.perf_counter() - start:.1f}s)")
+        for game, (mean, std) in report.ev.items():
+            print(f"  {game:<10} EV {mean:+.4f} bets/round (house edge {-mean:+.2%}), std {std:.3f}")
+        for source, (mean, std) in report.flows.items():
+            print(f"  {source:<10} {mean:+12,.0f} coins/player-day  (std {std:,.0f})")
+        print(f"  money supply growth over {args.days} days: {report.growth:+,.0f} coins per player\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,279 @@
+# Filename: utils/guild_config.py
+
+import json
+import time
+import logging
+from collections import OrderedDict
+from collections.abc import Mapping
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Dict, Iterator, Optional, Set, Tuple, Union
+
+import aiofiles
+
+from .database import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+def freeze_config(value: Any) -> Any:
+    """Returns a read-only copy of a config tree (dicts become mapping proxies, lists become tuples)."""
+    if isinstance(value, Mapping):
+        return MappingProxyType({key: freeze_config(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze_config(item) for item in value)
+    return value
+
+
+def thaw_config(value: Any) -> Any:
+    """Returns a plain, mutable copy of a (possibly frozen) config tree."""
+    if isinstance(value, Mapping):
+        return {key: thaw_config(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [thaw_config(item) for item in value]
+    return value
+
+
+def diff_config(defaults: Mapping, config: Mapping) -> Dict[str, Any]:
+    """Returns only the keys of `config` that differ from `defaults`, recursively."""
+    changed: Dict[str, Any] = {}
+    for key, value in config.items():
+        default = defaults.get(key, _MISSING)
+        if isinstance(value, Mapping) and isinstance(default, Mapping):
+            nested = diff_config(default, value)
+            if nested:
+                changed[key] = nested
+        elif default is _MISSING or thaw_config(value) != thaw_config(default):
+            changed[key] = thaw_config(value)
+    return changed
+
+
+class GuildConfigView(Mapping):
+    """
+    A dict-like, layered view of one guild's config.
+
+    Reads return the guild's override when there is one and otherwise fall through to
+    the shared, immutable defaults tree. Nested sections are returned as child views,
+    so `conf['welcome']['enabled'] = True` stores just that one key for the guild and
+    marks it dirty. Default lists are returned as tuples; assign a new list to change one.
+    """
+
+    __slots__ = ("_store", "_guild_id", "_defaults", "_path")
+
+    def __init__(self, store: "GuildConfigStore", guild_id: int, defaults: Mapping, path: Tuple[str, ...] = ()):
+        self._store = store
+        self._guild_id = guild_id
+        self._defaults = defaults
+        self._path = path
+
+    def _overrides(self, create: bool = False) -> Optional[Dict[str, Any]]:
+        """Returns this section's override dict, optionally creating it along the path."""
+        node = self._store._overrides.get(self._guild_id)
+        if node is None:
+            if not create:
+                return None
+            node = self._store._overrides[self._guild_id] = {}
+        for key in self._path:
+            child = node.get(key)
+            if not isinstance(child, dict):
+                if not create:
+                    return None
+                child = node[key] = {}
+            node = child
+        return node
+
+    def __getitem__(self, key: str) -> Any:
+        default = self._defaults.get(key, _MISSING)
+        overrides = self._overrides()
+        value = overrides.get(key, _MISSING) if overrides is not None else _MISSING
+
+        if isinstance(default, Mapping) and (value is _MISSING or isinstance(value, dict)):
+            return GuildConfigView(self._store, self._guild_id, default, self._path + (key,))
+        if value is not _MISSING:
+            return value
+        if default is _MISSING:
+            raise KeyError(key)
+        return default
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        default = self._defaults.get(key, _MISSING)
+        overrides = self._overrides(create=True)
+        if isinstance(default, Mapping) and isinstance(value, Mapping):
+            value = diff_config(default, value)
+            if value:
+                overrides[key] = value
+            else:
+                overrides.pop(key, None)
+        elif default is not _MISSING and thaw_config(default) == thaw_config(value):
+            overrides.pop(key, None)  # Back to the default, no need to store it
+        else:
+            overrides[key] = value
+        self._store.mark_dirty(self._guild_id)
+
+    def __delitem__(self, key: str) -> None:
+        """Drops the guild's override for `key`, reverting it to the default."""
+        overrides = self._overrides()
+        if overrides is not None and overrides.pop(key, _MISSING) is not _MISSING:
+            self._store.mark_dirty(self._guild_id)
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self._defaults
+        overrides = self._overrides()
+        if overrides:
+            yield from (key for key in overrides if key not in self._defaults)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __contains__(self, key: object) -> bool:
+        if key in self._defaults:
+            return True
+        overrides = self._overrides()
+        return overrides is not None and key in overrides
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Returns the fully merged config as a plain dict."""
+        return {key: value.to_dict() if isinstance(value, GuildConfigView) else thaw_config(value) for key, value in self.items()}
+
+    def __repr__(self) -> str:
+        return f"<GuildConfigView guild_id={self._guild_id} path={'.'.join(self._path) or '<root>'}>"
+
+
+class GuildConfigStore:
+    """
+    Per-guild settings stored in the `guild_config` table.
+
+    Only the keys a guild has changed are kept, both in memory and on disk; every read
+    of an unchanged key falls through to one shared, frozen defaults tree. Views handed
+    out by `get()` are kept in a bounded LRU so hot guilds reuse theirs. Changing a
+    value marks the guild as dirty and `flush()` writes only the dirty guilds, as a
+    single batched upsert.
+    """
+
+    def __init__(self, db: DatabaseManager, defaults: Dict[str, Any], max_cached_views: int = 5000):
+        """
+        Initializes the GuildConfigStore.
+
+        Args:
+            db: The bot's DatabaseManager.
+            defaults: The default guild config. A frozen copy is shared by all guilds.
+            max_cached_views: How many guild views to keep in the LRU cache.
+        """
+        self.db = db
+        self.defaults: Mapping = freeze_config(defaults)
+        self.max_cached_views = max_cached_views
+        self._overrides: Dict[int, Dict[str, Any]] = {}  # Only guilds with at least one changed key
+        self._views: "OrderedDict[int, GuildConfigView]" = OrderedDict()
+        self._dirty: Set[int] = set()
+
+    async def load(self) -> int:
+        """Loads every stored guild's overrides into memory. Returns the number of guilds."""
+        rows = await self.db.fetchall("SELECT guild_id, settings FROM guild_config")
+        self._overrides.clear()
+        self._views.clear()
+        for row in rows:
+            try:
+                overrides = diff_config(self.defaults, json.loads(row['settings']))
+            except (ValueError, TypeError, AttributeError) as e:
+                logger.error(f"Ignoring corrupt config row for guild {row['guild_id']}: {e}")
+                continue
+            if overrides:
+                self._overrides[int(row['guild_id'])] = overrides
+        logger.info(f"Loaded settings for {len(rows)} guilds ({len(self._overrides)} with custom values).")
+        return len(rows)
+
+    async def import_json(self, path: Union[str, Path]) -> int:
+        """
+        One-shot migration of a legacy `config.json` into the table.
+
+        The import only runs while the table is empty. Afterwards the file is renamed to
+        `<name>.imported` so it is never read again.
+
+        Returns:
+            The number of guilds imported.
+        """
+        path = Path(path)
+        if not path.exists():
+            return 0
+        if await self.db.fetchone("SELECT 1 FROM guild_config LIMIT 1"):
+            logger.warning(f"{path.name} still exists but guild_config already has data; skipping import.")
+            return 0
+
+        try:
+            async with aiofiles.open(path, 'r', encoding='utf-8') as f:
+                legacy = json.loads(await f.read()).get("guild_settings", {})
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error(f"Could not read {path.name} for import: {e}")
+            return 0
+
+        now = time.time()
+        rows = [
+            (str(guild_id), json.dumps(diff_config(self.defaults, settings), ensure_ascii=False), now)
+            for guild_id, settings in legacy.items() if isinstance(settings, dict)
+        ]
+        if rows:
+            await self.db.executemany(
+                "INSERT OR IGNORE INTO guild_config (guild_id, settings, updated_at) VALUES (?, ?, ?)", rows
+            )
+        try:
+            path.rename(path.with_name(f"{path.name}.imported"))
+        except FileNotFoundError:
+            # Another cluster worker imported the same file concurrently; both inserts are INSERT OR IGNORE
+            logger.info(f"{path.name} was already imported by another process.")
+            return 0
+        logger.info(f"Imported settings for {len(rows)} guilds from {path.name}.")
+        return len(rows)
+
+    def get(self, guild_id: int) -> GuildConfigView:
+        """Returns the layered config view for a guild. Changes made through it are saved on the next flush."""
+        view = self._views.get(guild_id)
+        if view is not None:
+            self._views.move_to_end(guild_id)
+            return view
+        view = self._views[guild_id] = GuildConfigView(self, guild_id, self.defaults)
+        if len(self._views) > self.max_cached_views:
+            self._views.popitem(last=False)
+        return view
+
+    def mark_dirty(self, guild_id: int) -> None:
+        """Flags a guild's config to be written on the next flush."""
+        self._dirty.add(guild_id)
+
+    @property
+    def dirty_count(self) -> int:
+        return len(self._dirty)
+
+    async def flush(self) -> int:
+        """
+        Persists all dirty guilds in one batched upsert.
+
+        Returns:
+            The number of guilds written.
+        """
+        if not self._dirty:
+            return 0
+        dirty, self._dirty = self._dirty, set()
+
+        now = time.time()
+        rows = []
+        for guild_id in dirty:
+            overrides = diff_config(self.defaults, self._overrides.get(guild_id, {}))
+            if overrides:
+                self._overrides[guild_id] = overrides
+            else:
+                self._overrides.pop(guild_id, None)
+            rows.append((str(guild_id), json.dumps(overrides, ensure_ascii=False), now))
+
+        try:
+            await self.db.executemany(
+                "INSERT INTO guild_config (guild_id, settings, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(guild_id) DO UPDATE SET settings = excluded.settings, updated_at = excluded.updated_at",
+                rows
+            )
+        except Exception:
+            # Keep the guilds dirty so the next flush retries them.
+            self._dirty |= dirty
+            raise
+        return len(rows)
@@ -0,0 +1,320 @@
+# Filename: utils/join_pipeline.py
+
+from __future__ import annotations
+import sys
+import time
+import random
+import asyncio
+import logging
+import argparse
+from collections import defaultdict, deque
+from typing import TYPE_CHECKING, Any, Deque, Dict, List, Mapping, Optional, Tuple
+
+import discord
+
+from .outbound import OutboundScheduler, Priority
+
+if TYPE_CHECKING:
+    from ..bot import MaxyBot
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WELCOME = "Welcome {user.mention} to {guild.name}!"
+
+
+class _Crowd:
+    """Stands in for `user` in a welcome template when several members are greeted at once."""
+
+    def __init__(self, members: List[discord.Member], total: int):
+        more = f" and {total - len(members)} others" if total > len(members) else ""
+        self.mention = ", ".join(m.mention for m in members) + more
+        self.name = self.display_name = self.global_name = ", ".join(m.name for m in members) + more
+        self.id = members[0].id
+        self.display_avatar = members[0].display_avatar
+
+
+class JoinBatch:
+    """The members waiting for a guild's next welcome message."""
+
+    __slots__ = ("members", "total", "task")
+
+    def __init__(self):
+        self.members: List[discord.Member] = []  # Only the first `max_mentions` are kept
+        self.total = 0
+        self.task: Optional[asyncio.Task] = None
+
+
+class JoinPipeline:
+    """
+    Handles member joins so that a join wave costs a bounded number of API calls.
+
+    - Welcomes: joins within `window` seconds of a guild's first pending join are greeted
+      in one message (through the outbound scheduler), mentioning at most `max_mentions`.
+      While a guild is being raided, one message per `raid_window` only says how many
+      joined, without pings.
+    - Autoroles: grants go through one queue served by `role_workers` tasks, so at most
+      that many role calls are in flight. A rate limit pauses all workers, for a backoff
+      that doubles with each consecutive 429; the grant is then retried. Server errors
+      are retried too, and members who left are skipped.
+    - Raids: each guild keeps the times of its last `raid_joins` joins (a fixed-size ring).
+      When the oldest of them is within `raid_window` seconds, the bot dispatches
+      `raid_detected(guild, joins)` once; the raid ends after `raid_window` without one.
+      Listeners implement the lockdown.
+    """
+
+    def __init__(self, bot: MaxyBot, window: float = 3.0, max_mentions: int = 20, role_workers: int = 3,
+                 retries: int = 4, backoff: float = 1.0, raid_joins: int = 15, raid_window: float = 10.0):
+        self.bot = bot
+        self.window = window
+        self.max_mentions = max_mentions
+        self.role_workers = role_workers
+        self.retries = retries
+        self.backoff = backoff
+        self.raid_joins = raid_joins
+        self.raid_window = raid_window
+        self._batches: Dict[int, JoinBatch] = {}
+        self._joins: Dict[int, Deque[float]] = {}
+        self._raids: Dict[int, float] = {}  # guild id -> time of the latest join while raided
+        self._roles: "asyncio.Queue[Tuple[int, int, int]]" = asyncio.Queue()
+        self._workers: List[asyncio.Task] = []
+        self._paused_until = 0.0
+        self._limited = 0  # Consecutive 429s
+        self.stats: Dict[str, int] = defaultdict(int)
+
+    def close(self) -> None:
+        for task in self._workers:
+            task.cancel()
+        for batch in self._batches.values():
+            if batch.task is not None:
+                batch.task.cancel()
+
+    def joined(self, member: discord.Member, now: Optional[float] = None) -> None:
+        guild_id = member.guild.id
+        self._track(member.guild, time.monotonic() if now is None else now)
+        conf = self.bot.get_guild_config(guild_id)
+
+        welcome = conf['welcome']
+        if welcome.get('enabled') and welcome.get('channel_id'):
+            batch = self._batches.get(guild_id)
+            if batch is None:
+                batch = self._batches[guild_id] = JoinBatch()
+                batch.task = asyncio.create_task(self._welcome(member.guild, batch))
+            batch.total += 1
+            if len(batch.members) < self.max_mentions:
+                batch.members.append(member)
+
+        autorole = conf['autorole']
+        role_id = autorole.get('bot_role_id' if member.bot else 'human_role_id')
+        if autorole.get('enabled') and role_id:
+            self._roles.put_nowait((guild_id, member.id, int(role_id)))
+            if not self._workers:
+                self._workers = [asyncio.create_task(self._grant_roles()) for _ in range(self.role_workers)]
+
+    # --- Raids ---
+    def _track(self, guild: discord.Guild, now: float) -> None:
+        joins = self._joins.get(guild.id)
+        if joins is None:
+            joins = self._joins[guild.id] = deque(maxlen=self.raid_joins)
+        joins.append(now)
+        if guild.id in self._raids:
+            if now - self._raids[guild.id] <= self.raid_window:
+                self._raids[guild.id] = now
+                return
+            del self._raids[guild.id]  # Quiet for a whole window: that raid is over
+        if len(joins) == self.raid_joins and now - joins[0] <= self.raid_window:
+            self._raids[guild.id] = now
+            self.stats["raids"] += 1
+            logger.warning(f"Join raid in guild {guild.id}: {len(joins)} joins in {now - joins[0]:.1f}s.")
+            self.bot.dispatch("raid_detected", guild, len(joins))
+
+    def raided(self, guild_id: int, now: Optional[float] = None) -> bool:
+        since = self._raids.get(guild_id)
+        return since is not None and (time.monotonic() if now is None else now) - since <= self.raid_window
+
+    # --- Welcomes ---
+    async def _welcome(self, guild: discord.Guild, batch: JoinBatch) -> None:
+        await asyncio.sleep(self.raid_window if self.raided(guild.id) else self.window)
+        self._batches.pop(guild.id, None)
+        conf = self.bot.get_guild_config(guild.id)['welcome']
+        channel_id = conf.get('channel_id')
+        if not channel_id:
+            return
+        channel = self.bot.get_channel(channel_id) or self.bot.get_partial_messageable(channel_id)
+        self.stats["welcome_messages"] += 1
+        self.bot.outbound.submit(channel, Priority.CHATTER, coalesce_key=("welcome", guild.id), **self.render(conf, guild, batch))
+
+    def render(self, conf: Mapping, guild: discord.Guild, batch: JoinBatch) -> Dict[str, Any]:
+        """The send arguments for one welcome message."""
+        if self.raided(guild.id):
+            return {"content": f"👋 {batch.total} new members joined.", "allowed_mentions": discord.AllowedMentions.none()}
+        user = batch.members[0] if batch.total == 1 else _Crowd(batch.members, batch.total)
+        try:
+            content = conf.get('message', DEFAULT_WELCOME).format(user=user, guild=guild)
+        except (KeyError, AttributeError, IndexError, ValueError):
+            content = DEFAULT_WELCOME.format(user=user, guild=guild)
+        kwargs: Dict[str, Any] = {"content": content, "allowed_mentions": discord.AllowedMentions(users=batch.members, roles=False, everyone=False)}
+        embed_conf = conf.get('embed') or {}
+        if embed_conf.get('enabled'):
+            embed = discord.Embed(title=embed_conf.get('title'), description=embed_conf.get('description'), color=discord.Color.green())
+            embed.set_thumbnail(url=user.display_avatar.url)
+            kwargs["embed"] = embed
+        return kwargs
+
+    # --- Autoroles ---
+    async def _grant_roles(self) -> None:
+        while True:
+            guild_id, member_id, role_id = await self._roles.get()
+            try:
+                await self._grant(guild_id, member_id, role_id)
+            finally:
+                self._roles.task_done()
+
+    async def _grant(self, guild_id: int, member_id: int, role_id: int) -> None:
+        for attempt in range(self.retries + 1):
+            while (pause := self._paused_until - time.monotonic()) > 0:
+                await asyncio.sleep(pause)
+            try:
+                self.stats["role_calls"] += 1
+                await self.bot.http.add_role(guild_id, member_id, role_id, reason="Autorole")
+                self.stats["roles_granted"] += 1
+                self._limited = 0
+                return
+            except discord.NotFound:
+                return  # The member left (or the role was deleted)
+            except discord.Forbidden:
+                logger.warning(f"Missing permissions to grant the autorole {role_id} in guild {guild_id}.")
+                return
+            except discord.HTTPException as e:
+                if (e.status != 429 and e.status < 500) or attempt == self.retries:
+                    logger.error(f"Could not grant the autorole {role_id} to {member_id} in guild {guild_id}: {e}")
+                    return
+                self.stats["retries"] += 1
+                if e.status == 429:
+                    # Every worker waits; the first 429 of a streak sets the pause, later ones extend it
+                    self._limited += 1
+                    delay = self.backoff * 2 ** min(self._limited - 1, 6) * random.uniform(0.5, 1.5)
+                    self._paused_until = max(self._paused_until, time.monotonic() + delay)
+                else:
+                    await asyncio.sleep(self.backoff * 2 ** attempt * random.uniform(0.5, 1.5))
+
+    async def drain(self) -> None:
+        """Waits until every queued role grant was attempted."""
+        await self._roles.join()
+
+
+# --- Synthetic join stream against a stub HTTP client ---
+class _StubResponse:
+    def __init__(self, status: int):
+        self.status, self.reason = status, "stub"
+
+
+class _StubHTTP:
+    """Counts REST calls, simulates latency and answers 429 beyond `limit` role calls per second."""
+
+    def __init__(self, latency: float, limit: int):
+        self.latency = latency
+        self.limit = limit
+        self.calls: Dict[str, int] = defaultdict(int)
+        self.in_flight = self.peak = 0
+        self._granted: Deque[float] = deque()
+
+    async def add_role(self, guild_id: int, user_id: int, role_id: int, *, reason: Optional[str] = None) -> None:
+        self.calls["PUT /guilds/{id}/members/{id}/roles/{id}"] += 1
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+            now = time.monotonic()
+            while self._granted and now - self._granted[0] > 1.0:
+                self._granted.popleft()
+            if len(self._granted) >= self.limit:
+                raise discord.HTTPException(_StubResponse(429), "You are being rate limited.")
+            self._granted.append(now)
+        finally:
+            self.in_flight -= 1
+
+
+class _StubChannel:
+    def __init__(self, channel_id: int, http: _StubHTTP):
+        self.id = channel_id
+        self._http = http
+        self.sent: List[str] = []
+
+    async def send(self, content=None, *, embed=None, allowed_mentions=None):
+        self._http.calls["POST /channels/{id}/messages"] += 1
+        self.sent.append(content)
+        await asyncio.sleep(self._http.latency)
+
+
+class _StubMember:
+    def __init__(self, member_id: int, guild):
+        self.id, self.guild, self.bot = member_id, guild, False
+        self.name = f"user{member_id}"
+        self.mention = f"<@{member_id}>"
+        self.display_avatar = type("Asset", (), {"url": "https://cdn.example/a.png"})()
+
+
+class _StubBot:
+    def __init__(self, http: _StubHTTP):
+        self.http = http
+        self.outbound = OutboundScheduler()
+        self.channel = _StubChannel(10, http)
+        self.raids: List[int] = []
+
+    def get_guild_config(self, guild_id: int) -> Dict[str, Any]:
+        return {"welcome": {"enabled": True, "channel_id": 10, "message": DEFAULT_WELCOME, "embed": {"enabled": True, "title": "New Member!", "description": "Hi"}},
+                "autorole": {"enabled": True, "human_role_id": 20}}
+
+    def get_channel(self, channel_id: int):
+        return self.channel
+
+    def dispatch(self, event: str, guild, joins: int) -> None:
+        self.raids.append(joins)
+
+
+async def _benchmark(joins: int, duration: float, latency: float, limit: int) -> None:
+    http = _StubHTTP(latency, limit)
+    bot = _StubBot(http)
+    pipeline = JoinPipeline(bot, backoff=0.05)
+    guild = type("Guild", (), {"id": 1, "name": "Test"})()
+    start = time.perf_counter()
+    # A few ordinary joins, then a raid, then a few more after it is over
+    schedule = [0.0, 4.0, 4.5] + [5.0 + duration * i / joins for i in range(joins)] + [duration + 25.0, duration + 40.0]
+    for i, at in enumerate(schedule):
+        await asyncio.sleep(max(0.0, start + at - time.perf_counter()))
+        pipeline.joined(_StubMember(100 + i, guild))
+    await asyncio.sleep(pipeline.window + 0.1)
+    await pipeline.drain()
+    while bot.outbound.pending():
+        await asyncio.sleep(0.05)
+    elapsed = time.perf_counter() - start
+    pipeline.close()
+    await bot.outbound.close()
+
+    calls = ", ".join(f"{route}: {n}" for route, n in sorted(http.calls.items()))
+    print(f"{len(schedule):,} joins ({joins:,} within {duration:.0f}s) handled in {elapsed:.1f}s")
+    print(f"  naive:    {2 * len(schedule):,} API calls (one welcome and one role grant each)")
+    print(f"  pipeline: {sum(http.calls.values()):,} API calls ({calls})")
+    print(f"  roles granted {pipeline.stats['roles_granted']:,}/{len(schedule):,}, {pipeline.stats['retries']} retries after 429s, "
+          f"peak {http.peak} concurrent role calls")
+    print(f"  raid_detected dispatched {len(bot.raids)}x; welcome messages: {[m[:60] for m in bot.channel.sent]}")
+
+
+def main() -> int:
+    """
+    Replays a synthetic join stream (a raid between ordinary joins) against a stub HTTP client.
+
+    Run from the project root: `python -m utils.join_pipeline --joins 2000 --duration 20`
+    """
+    parser = argparse.ArgumentParser(description="Load test the join pipeline.")
+    parser.add_argument("--joins", type=int, default=2_000, help="Accounts joining in the raid.")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds the raid lasts.")
+    parser.add_argument("--latency", type=float, default=0.01, help="Simulated seconds per API call.")
+    parser.add_argument("--limit", type=int, default=50, help="Role calls per second before the stub answers 429.")
+    args = parser.parse_args()
+    asyncio.run(_benchmark(args.joins, args.duration, args.latency, args.limit))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,305 @@
+# Filename: utils/leaderboards.py
+
+from __future__ import annotations
+import os
+import sys
+import time
+import random
+import asyncio
+import logging
+import argparse
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, NamedTuple, Optional, Tuple
+
+import discord
+
+if TYPE_CHECKING:
+    from .database import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+Cursor = Tuple[Any, ...]
+
+
+class BoardSpec(NamedTuple):
+    table: str
+    score: Tuple[str, ...]  # Score columns, highest first; each board has an index on (guild_id, *score, user_id)
+    columns: str            # Columns returned for each row
+
+
+LEVELS = BoardSpec("leveling", ("level", "xp"), "user_id, level, xp")
+ECONOMY = BoardSpec("economy", ("net_worth",), "user_id, wallet, bank, net_worth")  # net_worth is a generated column
+
+
+class Leaderboard:
+    """
+    A guild leaderboard read straight from an index, one page at a time.
+
+    Rows are ordered by the score columns and then `user_id`, all descending, which is
+    exactly the order of the board's index, so no query sorts. Pages are fetched with
+    keyset pagination: a page starts after the `(score..., user_id)` cursor of the last
+    row of the previous page, which costs the same on page 1 and page 10,000. Ranks are
+    a COUNT over the index range above the member.
+
+    The first page and the row count are cached per guild for `ttl` seconds. Score
+    changes are reported through `note_score`, which drops the cached page only when
+    the change can affect it.
+    """
+
+    def __init__(self, db: DatabaseManager, spec: BoardSpec, page_size: int = 10, ttl: float = 30.0):
+        self.db = db
+        self.spec = spec
+        self.page_size = page_size
+        self.ttl = ttl
+        self._top: Dict[int, Tuple[float, list, int]] = {}  # guild -> (expires, first page, row count)
+
+        key = spec.score + ("user_id",)
+        self._key = key
+        self._order = ", ".join(f"{column} DESC" for column in key)
+        self._tuple = f"({', '.join(key)})"
+        self._marks = f"({', '.join('?' * len(key))})"
+
+    def cursor(self, row) -> Cursor:
+        """The keyset cursor of a row: pages after it start right below it."""
+        return tuple(row[column] for column in self._key)
+
+    # --- Pages ---
+    async def top(self, guild_id: int) -> Tuple[list, int]:
+        """Returns `(first page, row count)`, cached for `ttl` seconds."""
+        cached = self._top.get(guild_id)
+        if cached and cached[0] > time.monotonic():
+            return cached[1], cached[2]
+        rows = await self.db.fetchall(
+            f"SELECT {self.spec.columns} FROM {self.spec.table} WHERE guild_id = ? ORDER BY {self._order} LIMIT ?",
+            (guild_id, self.page_size)
+        )
+        count = await self.db.fetchone(f"SELECT COUNT(*) AS total FROM {self.spec.table} WHERE guild_id = ?", (guild_id,))
+        self._top[guild_id] = (time.monotonic() + self.ttl, rows, count['total'])
+        return rows, count['total']
+
+    async def page(self, guild_id: int, after: Optional[Cursor] = None) -> list:
+        """Returns the page that starts right after `after` (the first page for None)."""
+        if after is None:
+            return (await self.top(guild_id))[0]
+        return await self.db.fetchall(
+            f"SELECT {self.spec.columns} FROM {self.spec.table} WHERE guild_id = ? AND {self._tuple} < {self._marks} "
+            f"ORDER BY {self._order} LIMIT ?",
+            (guild_id, *after, self.page_size)
+        )
+
+    async def cursor_at(self, guild_id: int, position: int) -> Optional[Cursor]:
+        """The cursor of the row at a 0-based position, found by walking the index (no sort)."""
+        row = await self.db.fetchone(
+            f"SELECT {', '.join(self._key)} FROM {self.spec.table} WHERE guild_id = ? ORDER BY {self._order} LIMIT 1 OFFSET ?",
+            (guild_id, position)
+        )
+        return self.cursor(row) if row else None
+
+    async def rank(self, guild_id: int, user_id: int) -> Optional[int]:
+        """The member's 1-based position, or None if they are not on the board."""
+        row = await self.db.fetchone(
+            f"SELECT {', '.join(self._key)} FROM {self.spec.table} WHERE guild_id = ? AND user_id = ?", (guild_id, user_id)
+        )
+        if row is None:
+            return None
+        above = await self.db.fetchone(
+            f"SELECT COUNT(*) AS above FROM {self.spec.table} WHERE guild_id = ? AND {self._tuple} > {self._marks}",
+            (guild_id, *self.cursor(row))
+        )
+        return above['above'] + 1
+
+    # --- Cache invalidation ---
+    def invalidate(self, guild_id: int) -> None:
+        self._top.pop(guild_id, None)
+
+    def _on_page(self, rows: list, user_id: int) -> bool:
+        return any(str(row['user_id']) == str(user_id) for row in rows)
+
+    def note_score(self, guild_id: int, user_id: int, score: Tuple[Any, ...]) -> None:
+        """Reports a member's new score; the cached page is dropped only if it can change."""
+        cached = self._top.get(guild_id)
+        if cached is None:
+            return
+        rows = cached[1]
+        lowest = tuple(rows[-1][column] for column in self.spec.score) if rows else None
+        if len(rows) < self.page_size or self._on_page(rows, user_id) or score >= lowest:
+            self.invalidate(guild_id)
+
+
+class _PageModal(discord.ui.Modal, title="Go to page"):
+    number = discord.ui.TextInput(label="Page", max_length=7)
+
+    def __init__(self, view: LeaderboardView):
+        super().__init__()
+        self.view = view
+
+    async def on_submit(self, interaction: discord.Interaction):
+        try:
+            page = int(self.number.value) - 1
+        except ValueError:
+            return await interaction.response.send_message("Please enter a page number.", ephemeral=True)
+        await self.view.show(interaction, page)
+
+
+class LeaderboardView(discord.ui.View):
+    """
+    Pages through a leaderboard. It remembers the cursor in front of every page it has
+    shown, so going back or returning to a page is one indexed query; unseen pages
+    (the last one, or a typed page number) find their cursor with `cursor_at`.
+    """
+
+    def __init__(self, board: Leaderboard, guild_id: int, author_id: int, total: int,
+                 render: Callable[[list, int], discord.Embed]):
+        super().__init__(timeout=180.0)
+        self.board = board
+        self.guild_id = guild_id
+        self.author_id = author_id
+        self.render = render  # (rows, position of the first row) -> embed
+        self.pages = max(1, -(-total // board.page_size))
+        self.current = 0
+        self.cursors: Dict[int, Optional[Cursor]] = {0: None}  # page -> cursor of the row before it
+        self.message: Optional[discord.Message] = None
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.author_id:
+            await interaction.response.send_message("This leaderboard is not for you; run the command yourself.", ephemeral=True)
+            return False
+        return True
+
+    async def on_timeout(self):
+        for item in self.children:
+            item.disabled = True
+        if self.message:
+            try:
+                await self.message.edit(view=self)
+            except discord.HTTPException:
+                pass
+
+    def embed_for(self, rows: list) -> discord.Embed:
+        embed = self.render(rows, self.current * self.board.page_size)
+        embed.set_footer(text=f"Page {self.current + 1}/{self.pages}")
+        self.first_page.disabled = self.previous_page.disabled = self.current == 0
+        self.next_page.disabled = self.last_page.disabled = self.current >= self.pages - 1
+        return embed
+
+    async def show(self, interaction: discord.Interaction, page: int):
+        page = max(0, min(page, self.pages - 1))
+        if page not in self.cursors:
+            self.cursors[page] = await self.board.cursor_at(self.guild_id, page * self.board.page_size - 1)
+        rows = await self.board.page(self.guild_id, self.cursors[page])
+        if not rows and page > 0:  # The board shrank since the count was taken
+            self.pages = page
+            return await self.show(interaction, page - 1)
+        self.current = page
+        if rows:
+            self.cursors[page + 1] = self.board.cursor(rows[-1])
+        await interaction.response.edit_message(embed=self.embed_for(rows), view=self)
+
+    @discord.ui.button(emoji="⏮️", style=discord.ButtonStyle.secondary)
+    async def first_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show(interaction, 0)
+
+    @discord.ui.button(emoji="◀️", style=discord.ButtonStyle.primary)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show(interaction, self.current - 1)
+
+    @discord.ui.button(emoji="▶️", style=discord.ButtonStyle.primary)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show(interaction, self.current + 1)
+
+    @discord.ui.button(emoji="⏭️", style=discord.ButtonStyle.secondary)
+    async def last_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show(interaction, self.pages - 1)
+
+    @discord.ui.button(emoji="🔢", style=discord.ButtonStyle.secondary)
+    async def go_to_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await interaction.response.send_modal(_PageModal(self))
+
+
+async def send_leaderboard(interaction: discord.Interaction, board: Leaderboard, render: Callable[[list, int], discord.Embed]) -> bool:
+    """Sends the first page with a pager to a deferred interaction. Returns False if the board is empty."""
+    rows, total = await board.top(interaction.guild.id)
+    if not rows:
+        return False
+    view = LeaderboardView(board, interaction.guild.id, interaction.user.id, total, render)
+    view.cursors[1] = board.cursor(rows[-1])
+    view.message = await interaction.followup.send(embed=view.embed_for(rows), view=view if view.pages > 1 else discord.utils.MISSING, wait=True)
+    return True
+
+
+# --- Benchmark ---
+async def _benchmark(rows: int, workdir: Path) -> None:
+    from .database import DatabaseManager
+
+    workdir.mkdir(parents=True, exist_ok=True)
+    path = workdir / "leaderboard-bench.db"
+    for suffix in ("", "-wal", "-shm"):
+        Path(f"{path}{suffix}").unlink(missing_ok=True)
+    db = DatabaseManager(path)
+    await db.init()
+    guild = 1
+    rng = random.Random(42)
+    start = time.perf_counter()
+    await db.executemany(
+        "INSERT INTO leveling (guild_id, user_id, xp, level) VALUES (?, ?, ?, ?)",
+        ((guild, 10**17 + i, rng.randint(0, 5000), rng.randint(0, 100)) for i in range(rows))
+    )
+    await db.executemany(
+        "INSERT INTO economy (guild_id, user_id, wallet, bank) VALUES (?, ?, ?, ?)",
+        ((guild, 10**17 + i, rng.randint(0, 10**6), rng.randint(0, 10**7)) for i in range(rows))
+    )
+    print(f"Inserted {rows:,} rows per table in {time.perf_counter() - start:.1f}s\n")
+
+    async def timed(label: str, query, repeat: int = 5) -> None:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            await query()
+        print(f"  {label:<44} {(time.perf_counter() - start) / repeat * 1000:9.2f} ms")
+
+    for spec, legacy_order in ((LEVELS, "level DESC, xp DESC"), (ECONOMY, "(wallet + bank) DESC")):
+        board = Leaderboard(db, spec)
+        # The legacy queries are pinned to the primary key, the only index they had
+        legacy = f"SELECT user_id FROM {spec.table} INDEXED BY sqlite_autoindex_{spec.table}_1 WHERE guild_id = ? ORDER BY {legacy_order}"
+        print(f"{spec.table}:")
+        await timed("legacy top 10 (sort)", lambda: db.fetchall(f"{legacy} LIMIT 10", (guild,)))
+        await timed("legacy rank (fetch all, scan in Python)", lambda: db.fetchall(legacy, (guild,)), repeat=1)
+        await timed("legacy page 50,000 (OFFSET + sort)", lambda: db.fetchall(f"{legacy} LIMIT 10 OFFSET 499990", (guild,)), repeat=1)
+        await timed("top 10, uncached (index + count)", lambda: _uncached_top(board, guild))
+        await timed("top 10, cached", lambda: board.top(guild), repeat=1000)
+        cursor = await board.cursor_at(guild, 499_989)
+        await timed("page 50,000, known cursor (keyset)", lambda: board.page(guild, cursor))
+        await timed("page 50,000, jump (cursor_at + keyset)", lambda: _jump(board, guild, 49_999))
+        await timed("rank of a member (index COUNT)", lambda: board.rank(guild, 10**17 + rows // 2))
+        plan = await db.fetchall(
+            f"EXPLAIN QUERY PLAN SELECT {spec.columns} FROM {spec.table} WHERE guild_id = ? AND {board._tuple} < {board._marks} ORDER BY {board._order} LIMIT 10",
+            (guild, *cursor)
+        )
+        print("  keyset plan: " + "; ".join(row['detail'] for row in plan) + "\n")
+    await db.close()
+
+
+async def _uncached_top(board: Leaderboard, guild_id: int) -> Tuple[list, int]:
+    board.invalidate(guild_id)
+    return await board.top(guild_id)
+
+
+async def _jump(board: Leaderboard, guild_id: int, page: int) -> list:
+    return await board.page(guild_id, await board.cursor_at(guild_id, page * board.page_size - 1))
+
+
+def main() -> int:
+    """
+    Benchmarks legacy leaderboard queries against the indexed board on a generated guild.
+
+    Run from the project root: `python -m utils.leaderboards --rows 1000000`
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the leaderboards.")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--workdir", type=Path, default=Path(os.getenv("TMPDIR", "/tmp")) / "maxy-leaderboard-bench")
+    args = parser.parse_args()
+    asyncio.run(_benchmark(args.rows, args.workdir))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,200 @@
+# Filename: utils/loop_monitor.py
+
+import sys
+import time
+import asyncio
+import logging
+import argparse
+import threading
+import traceback
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class StallReport:
+    """A snapshot of what the event loop thread was executing while it was blocked."""
+
+    __slots__ = ("detected_at", "blocked_for", "stack")
+
+    def __init__(self, detected_at: float, blocked_for: float, stack: str):
+        self.detected_at = detected_at  # Wall-clock time (time.time()) of the capture
+        self.blocked_for = blocked_for  # How long the loop had been blocked when captured
+        self.stack = stack
+
+    @property
+    def location(self) -> str:
+        """The innermost `File ..., line ..., in ...` line of the captured stack."""
+        frames = [line.strip() for line in self.stack.splitlines() if line.strip().startswith("File ")]
+        return frames[-1] if frames else "unknown"
+
+
+class LoopLagMonitor:
+    """
+    Continuously measures event loop scheduling delay.
+
+    A sampler coroutine sleeps for `interval` seconds and records how late it wakes up.
+    A watchdog thread watches the sampler's heartbeat; when the loop has not run the
+    sampler for longer than `stall_threshold`, it captures the loop thread's stack so the
+    blocking call shows up in the report even though the loop itself cannot run.
+    """
+
+    def __init__(self, interval: float = 0.5, lag_threshold: float = 0.1, stall_threshold: float = 1.0, history: int = 600):
+        """
+        Initializes the LoopLagMonitor.
+
+        Args:
+            interval: Seconds between lag samples.
+            lag_threshold: Lag (in seconds) above which a sample is logged as a warning.
+            stall_threshold: How long the loop must be blocked before the watchdog
+                captures the loop thread's stack.
+            history: Number of recent lag samples kept for percentiles.
+        """
+        self.interval = interval
+        self.lag_threshold = lag_threshold
+        self.stall_threshold = stall_threshold
+
+        self.samples: Deque[float] = deque(maxlen=history)
+        self.reports: Deque[StallReport] = deque(maxlen=10)
+        self.max_lag = 0.0
+        self.last_lag = 0.0
+        self.stall_count = 0
+
+        self._heartbeat = time.perf_counter()
+        self._pending_report: Optional[StallReport] = None
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+    # --- Lifecycle ---
+    def start(self) -> None:
+        """Starts the sampler on the running loop and the watchdog thread."""
+        if self._task and not self._task.done():
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.perf_counter()
+        self._stop_event.clear()
+        self._task = asyncio.get_running_loop().create_task(self._sample_forever())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+        self._watchdog.start()
+        logger.info(f"Loop lag monitor started (interval={self.interval}s, stall threshold={self.stall_threshold}s).")
+
+    def stop(self) -> None:
+        """Stops the sampler and the watchdog thread."""
+        self._stop_event.set()
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    # --- Sampling ---
+    async def _sample_forever(self) -> None:
+        while True:
+            self._heartbeat = time.perf_counter()
+            expected = self._heartbeat + self.interval
+            await asyncio.sleep(self.interval)
+            self.record(max(0.0, time.perf_counter() - expected))
+
+    def record(self, lag: float) -> None:
+        """Records one lag sample and logs it if it crossed the threshold."""
+        self.samples.append(lag)
+        self.last_lag = lag
+        if lag > self.max_lag:
+            self.max_lag = lag
+
+        report, self._pending_report = self._pending_report, None
+        if report is not None:
+            logger.warning(
+                f"Event loop was blocked for {lag * 1000:.0f} ms. "
+                f"Loop thread stack after {report.blocked_for * 1000:.0f} ms:\n{report.stack}"
+            )
+        elif lag > self.lag_threshold:
+            logger.warning(f"Event loop lag of {lag * 1000:.0f} ms detected.")
+
+    def _watch(self) -> None:
+        """Watchdog thread: captures the loop thread's stack while the loop is stalled."""
+        check_every = min(self.interval, self.stall_threshold) / 2
+        captured_for: Optional[float] = None
+        while not self._stop_event.wait(check_every):
+            heartbeat = self._heartbeat
+            blocked_for = time.perf_counter() - heartbeat - self.interval
+            if blocked_for < self.stall_threshold or captured_for == heartbeat:
+                continue
+
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            captured_for = heartbeat
+            report = StallReport(time.time(), blocked_for, "".join(traceback.format_stack(frame)))
+            self.reports.append(report)
+            self.stall_count += 1
+            self._pending_report = report
+
+    # --- Reporting ---
+    def percentile(self, pct: float) -> float:
+        """Returns the given percentile (0-100) of the recent lag samples."""
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Returns the current lag statistics as a plain dictionary."""
+        last_report = self.reports[-1] if self.reports else None
+        return {
+            "last_lag": self.last_lag,
+            "p99_lag": self.percentile(99),
+            "max_lag": self.max_lag,
+            "stall_count": self.stall_count,
+            "last_stall_location": last_report.location if last_report else None,
+            "last_stall_at": last_report.detected_at if last_report else None,
+        }
+
+
+# --- Self-check with an injected blocking call ---
+def _blocking_handler(seconds: float) -> None:
+    time.sleep(seconds)  # Stands in for a synchronous call made from a coroutine
+
+
+async def _check(block: float, stall_threshold: float) -> bool:
+    monitor = LoopLagMonitor(interval=0.1, stall_threshold=stall_threshold)
+    monitor.start()
+    await asyncio.sleep(1.0)
+    healthy = monitor.max_lag
+    _blocking_handler(block)
+    await asyncio.sleep(0.5)  # Lets the sampler record the late wake-up
+    monitor.stop()
+
+    snapshot = monitor.snapshot()
+    print(f"max lag before the block: {healthy * 1000:.1f} ms")
+    print(f"max lag after a {block:.1f}s time.sleep: {snapshot['max_lag'] * 1000:.0f} ms, stalls: {snapshot['stall_count']}")
+    print(f"captured location: {snapshot['last_stall_location']}")
+    checks = {
+        "lag reported": snapshot["max_lag"] >= block * 0.8,
+        "stall captured": snapshot["stall_count"] >= 1,
+        "stack points at the blocking call": "_blocking_handler" in (snapshot["last_stall_location"] or ""),
+    }
+    for name, passed in checks.items():
+        print(f"  {'ok  ' if passed else 'FAIL'} {name}")
+    return all(checks.values())
+
+
+def main() -> int:
+    """
+    Blocks the event loop with `time.sleep` and checks that the monitor reports the lag and the stack.
+
+    Run from the project root: `python -m utils.loop_monitor --block 1.5`
+    """
+    parser = argparse.ArgumentParser(description="Check the loop lag monitor against an injected blocking call.")
+    parser.add_argument("--block", type=float, default=1.5, help="Seconds the loop is blocked.")
+    parser.add_argument("--stall-threshold", type=float, default=0.5)
+    args = parser.parse_args()
+    if args.block <= args.stall_threshold:
+        parser.error("--block must be longer than --stall-threshold for a stall to be captured")
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s %(message)s")
+    return 0 if asyncio.run(_check(args.block, args.stall_threshold)) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,316 @@
+# Filename: utils/outbound.py
+
+from __future__ import annotations
+import sys
+import time
+import heapq
+import asyncio
+import logging
+import argparse
+import itertools
+from enum import IntEnum
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+# Discord allows 5 messages per 5 seconds in a channel and 50 requests per second per bot.
+CHANNEL_RATE = (5, 5.0)
+GLOBAL_RATE = (50, 1.0)
+
+
+class Priority(IntEnum):
+    """Send priority; lower values go first."""
+
+    MODERATION = 0   # Moderation output and audit logs
+    INTERACTION = 1  # Messages a user's command asked for
+    CHATTER = 2      # Automated messages: level-ups, auto-responses, AFK notices
+
+
+class TokenBucket:
+    """Allows `capacity` sends per `period` seconds, refilled continuously."""
+
+    __slots__ = ("capacity", "rate", "tokens", "updated")
+
+    def __init__(self, capacity: int, period: float):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, keep: float = 0.0) -> float:
+        """Seconds until a token can be taken while leaving `keep` tokens in the bucket."""
+        self._refill()
+        missing = 1 + keep - self.tokens
+        return max(0.0, missing / self.rate)
+
+    def take(self) -> None:
+        self._refill()
+        self.tokens -= 1
+
+
+class _Outbound:
+    __slots__ = ("priority", "kwargs", "futures", "coalesce_key", "queued_at", "done")
+
+    def __init__(self, priority: Priority, kwargs: Dict[str, Any], coalesce_key: Optional[Hashable]):
+        self.priority = priority
+        self.kwargs = kwargs
+        self.futures: List[asyncio.Future] = []
+        self.coalesce_key = coalesce_key
+        self.queued_at = time.monotonic()
+        self.done = False
+
+    def resolve(self, result: Optional[discord.Message]) -> None:
+        self.done = True
+        for future in self.futures:
+            if not future.done():
+                future.set_result(result)
+
+
+class _ChannelQueue:
+    __slots__ = ("channel", "heap", "bucket", "coalescing", "chatter", "worker")
+
+    def __init__(self, channel: discord.abc.Messageable, rate: Tuple[int, float]):
+        self.channel = channel
+        self.heap: List[Tuple[int, int, _Outbound]] = []
+        self.bucket = TokenBucket(*rate)
+        self.coalescing: Dict[Hashable, _Outbound] = {}
+        self.chatter = 0  # Queued CHATTER items
+        self.worker: Optional[asyncio.Task] = None
+
+    def peek(self) -> Optional[_Outbound]:
+        while self.heap and self.heap[0][2].done:
+            heapq.heappop(self.heap)
+        return self.heap[0][2] if self.heap else None
+
+
+class OutboundScheduler:
+    """
+    Sends channel messages through per-channel priority queues.
+
+    Every channel gets a queue ordered by `Priority` and a token bucket modeled on
+    Discord's per-channel limit; a shared bucket models the global limit, and CHATTER
+    may only use it while `reserve` of its capacity is left, so moderation output in
+    a quiet channel is not stuck behind a busy one. A worker per channel runs only
+    while that channel has queued messages.
+
+    Chatter is the first thing to give under load:
+    - messages with the same `coalesce_key` are merged while queued (the newest text wins)
+    - a channel keeps at most `chatter_limit` queued chatter messages; new ones are dropped
+    - chatter that waited longer than `chatter_ttl` seconds is dropped instead of sent
+
+    `submit` returns a future that resolves to the sent message, or None if the message
+    was dropped or failed (failures are logged here), so callers may ignore it.
+    """
+
+    def __init__(self, channel_rate: Tuple[int, float] = CHANNEL_RATE, global_rate: Tuple[int, float] = GLOBAL_RATE,
+                 reserve: float = 0.2, chatter_limit: int = 10, chatter_ttl: float = 30.0):
+        self.channel_rate = channel_rate
+        self.global_bucket = TokenBucket(*global_rate)
+        self.reserve = global_rate[0] * reserve
+        self.chatter_limit = chatter_limit
+        self.chatter_ttl = chatter_ttl
+        self._queues: Dict[int, _ChannelQueue] = {}
+        self._seq = itertools.count()
+        self.sent = self.dropped = self.coalesced = self.failed = 0
+
+    # --- Submitting ---
+    def submit(self, channel: discord.abc.Messageable, priority: Priority = Priority.CHATTER,
+               coalesce_key: Optional[Hashable] = None, **kwargs: Any) -> asyncio.Future:
+        """Queues `channel.send(**kwargs)`. See the class docstring for what the future resolves to."""
+        future = asyncio.get_running_loop().create_future()
+        queue = self._queues.get(channel.id)
+        if queue is None:
+            queue = self._queues[channel.id] = _ChannelQueue(channel, self.channel_rate)
+
+        if coalesce_key is not None and (item := queue.coalescing.get(coalesce_key)) and not item.done:
+            item.kwargs = kwargs
+            item.futures.append(future)
+            if priority < item.priority:
+                self._unqueue(queue, item)
+                item.done = True  # Requeue at the higher priority; the old heap entry is skipped
+                self._push(queue, priority, kwargs, coalesce_key, item.futures)
+            self.coalesced += 1
+            return future
+
+        if priority is Priority.CHATTER and queue.chatter >= self.chatter_limit:
+            self.dropped += 1
+            future.set_result(None)
+            return future
+
+        self._push(queue, priority, kwargs, coalesce_key, [future])
+        if queue.worker is None or queue.worker.done():
+            queue.worker = asyncio.create_task(self._drain(queue))
+        return future
+
+    async def send(self, channel: discord.abc.Messageable, priority: Priority = Priority.CHATTER,
+                   coalesce_key: Optional[Hashable] = None, **kwargs: Any) -> Optional[discord.Message]:
+        """Queues a message and waits until it was sent (or dropped)."""
+        return await self.submit(channel, priority, coalesce_key, **kwargs)
+
+    def _push(self, queue: _ChannelQueue, priority: Priority, kwargs: Dict[str, Any],
+              coalesce_key: Optional[Hashable], futures: List[asyncio.Future]) -> _Outbound:
+        item = _Outbound(priority, kwargs, coalesce_key)
+        item.futures = futures
+        heapq.heappush(queue.heap, (priority, next(self._seq), item))
+        if coalesce_key is not None:
+            queue.coalescing[coalesce_key] = item
+        if priority is Priority.CHATTER:
+            queue.chatter += 1
+        return item
+
+    @staticmethod
+    def _unqueue(queue: _ChannelQueue, item: _Outbound) -> None:
+        # Once an item leaves the queue nothing may coalesce into it any more
+        if item.coalesce_key is not None and queue.coalescing.get(item.coalesce_key) is item:
+            del queue.coalescing[item.coalesce_key]
+        if item.priority is Priority.CHATTER:
+            queue.chatter -= 1
+
+    # --- Sending ---
+    async def _drain(self, queue: _ChannelQueue) -> None:
+        try:
+            while (item := queue.peek()) is not None:
+                if wait := queue.bucket.wait_time():
+                    await asyncio.sleep(wait)
+                    continue  # Something more urgent may have arrived meanwhile
+                keep = self.reserve if item.priority is Priority.CHATTER else 0.0
+                if wait := self.global_bucket.wait_time(keep):
+                    await asyncio.sleep(wait)
+                    continue
+
+                heapq.heappop(queue.heap)
+                self._unqueue(queue, item)
+                if item.priority is Priority.CHATTER and time.monotonic() - item.queued_at > self.chatter_ttl:
+                    self.dropped += 1
+                    item.resolve(None)
+                    continue
+                queue.bucket.take()
+                self.global_bucket.take()
+                result = None
+                try:
+                    result = await queue.channel.send(**item.kwargs)
+                    self.sent += 1
+                except Exception as e:
+                    self.failed += 1
+                    logger.warning(f"Outbound message to channel {queue.channel.id} failed: {e}")
+                item.resolve(result)
+        finally:
+            if not queue.heap and self._queues.get(queue.channel.id) is queue:
+                del self._queues[queue.channel.id]
+
+    async def close(self) -> None:
+        """Stops all workers; queued messages are dropped."""
+        queues, self._queues = list(self._queues.values()), {}
+        for queue in queues:
+            if queue.worker is not None:
+                queue.worker.cancel()
+            for _, _, item in queue.heap:
+                item.resolve(None)
+        await asyncio.gather(*(q.worker for q in queues if q.worker is not None), return_exceptions=True)
+
+    def pending(self) -> int:
+        return sum(1 for queue in self._queues.values() for _, _, item in queue.heap if not item.done)
+
+
+# --- Simulation ---
+class _StubChannel:
+    """Records when each message was sent; sending takes `latency` seconds."""
+
+    def __init__(self, channel_id: int, latency: float):
+        self.id = channel_id
+        self.latency = latency
+        self.sent: List[Tuple[float, Dict[str, Any]]] = []
+
+    async def send(self, **kwargs: Any) -> None:
+        await asyncio.sleep(self.latency)
+        self.sent.append((time.monotonic(), kwargs))
+
+
+class _DirectSender:
+    """The previous behavior: every cog awaits `channel.send`, served first come, first served."""
+
+    def __init__(self, channel_rate: Tuple[int, float], global_rate: Tuple[int, float]):
+        self.channel_rate = channel_rate
+        self.global_bucket = TokenBucket(*global_rate)
+        self.global_lock = asyncio.Lock()
+        self.buckets: Dict[int, Tuple[asyncio.Lock, TokenBucket]] = {}
+
+    async def send(self, channel: _StubChannel, **kwargs: Any) -> None:
+        lock, bucket = self.buckets.setdefault(channel.id, (asyncio.Lock(), TokenBucket(*self.channel_rate)))
+        async with lock:
+            while wait := bucket.wait_time():
+                await asyncio.sleep(wait)
+            async with self.global_lock:
+                while wait := self.global_bucket.wait_time():
+                    await asyncio.sleep(wait)
+                self.global_bucket.take()
+            bucket.take()
+            await channel.send(**kwargs)
+
+
+async def _storm(scheduled: bool, channels: int, levelups: int, scale: float) -> Tuple[float, int, int]:
+    """Level-ups flood `channels` channels; then one moderation log is sent. Returns (latency, sent, dropped)."""
+    channel_rate = (CHANNEL_RATE[0], CHANNEL_RATE[1] * scale)
+    global_rate = (GLOBAL_RATE[0], GLOBAL_RATE[1] * scale)
+    latency = 0.05 * scale
+    storm = [_StubChannel(i, latency) for i in range(channels)]
+    mod_channel = storm[0] if channels == 1 else _StubChannel(10_000, latency)
+
+    scheduler = OutboundScheduler(channel_rate, global_rate, chatter_ttl=30.0 * scale) if scheduled else None
+    direct = None if scheduled else _DirectSender(channel_rate, global_rate)
+    pending = []
+    for i in range(levelups):
+        channel, user = storm[i % channels], i % max(1, levelups * 2 // 3)  # A third of them level up twice
+        content = f"🎉 Congrats <@{user}>, you reached **Level {i}**!"
+        if scheduler:
+            pending.append(scheduler.submit(channel, Priority.CHATTER, ("levelup", user), content=content))
+        else:
+            pending.append(asyncio.create_task(direct.send(channel, content=content)))
+    await asyncio.sleep(0.2 * scale)
+
+    start = time.monotonic()
+    if scheduler:
+        await scheduler.send(mod_channel, Priority.MODERATION, embed="Member banned")
+    else:
+        await direct.send(mod_channel, embed="Member banned")
+    mod_latency = (time.monotonic() - start) / scale
+
+    await asyncio.gather(*pending)
+    sent = sum(len(c.sent) for c in storm) - (1 if mod_channel in storm else 0)
+    if scheduler:
+        await scheduler.close()
+    return mod_latency, sent, levelups - sent
+
+
+async def _simulate(levelups: int, scale: float) -> None:
+    for channels, label in ((1, "same channel"), (100, "quiet channel, storm in 100 others")):
+        for scheduled in (False, True):
+            mod_latency, sent, dropped = await _storm(scheduled, channels, levelups, scale)
+            name = "scheduler" if scheduled else "direct"
+            print(f"{label:<36} {name:<10} moderation latency {mod_latency:7.2f}s   level-ups sent {sent:5}, dropped/coalesced {dropped:5}")
+
+
+def main() -> int:
+    """
+    Simulates moderation latency during a level-up storm, with and without the scheduler.
+
+    Latencies are in simulated Discord seconds; the run itself is `--scale` times faster.
+    Run from the project root: `python -m utils.outbound --levelups 600`
+    """
+    parser = argparse.ArgumentParser(description="Simulate the outbound message scheduler under a level-up storm.")
+    parser.add_argument("--levelups", type=int, default=600)
+    parser.add_argument("--scale", type=float, default=0.02, help="Real seconds per simulated second.")
+    args = parser.parse_args()
+    asyncio.run(_simulate(args.levelups, args.scale))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
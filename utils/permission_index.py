@@ -0,0 +1,196 @@
+# Filename: utils/permission_index.py
+
+from __future__ import annotations
+import time
+import asyncio
+import logging
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import discord
+
+if TYPE_CHECKING:
+    from ..bot import MaxyBot
+
+logger = logging.getLogger(__name__)
+
+# Permissions the index can answer for. Administrator implies all of them.
+TRACKED_PERMISSIONS = (
+    "administrator", "manage_guild", "manage_roles", "manage_channels",
+    "manage_messages", "kick_members", "ban_members", "moderate_members",
+)
+
+
+def _granted(permissions: discord.Permissions) -> Set[str]:
+    if permissions.administrator:
+        return set(TRACKED_PERMISSIONS)
+    return {name for name in TRACKED_PERMISSIONS if getattr(permissions, name)}
+
+
+class _GuildIndex:
+    __slots__ = ("grants", "holders")
+
+    def __init__(self):
+        self.grants: Dict[str, Set[int]] = {name: set() for name in TRACKED_PERMISSIONS}  # permission -> role ids
+        self.holders: Dict[int, Set[int]] = {}  # granting role id -> member ids
+
+    def granting_roles(self) -> Set[int]:
+        return set(self.holders)
+
+
+class PermissionIndex:
+    """
+    Answers "which members have permission X" in time proportional to the answer.
+
+    For each guild it keeps which roles grant a tracked permission and which members
+    hold those roles (only those; ordinary roles are not tracked). A guild is indexed
+    the first time it is queried, from a full member list, and is then kept up to date
+    from role create/update/delete, member join/remove and member role changes.
+
+    Member role changes are read from the raw GUILD_MEMBER_UPDATE payload, because
+    discord.py only dispatches `on_member_update` for members already in the cache,
+    which in the lean cache profile is a minority of them. When a role starts granting
+    a tracked permission its holders are unknown, so the guild is re-indexed on the
+    next query.
+    """
+
+    def __init__(self, bot: MaxyBot):
+        self.bot = bot
+        self._guilds: Dict[int, _GuildIndex] = {}
+        self._building: Dict[int, List[Tuple[int, Optional[List[int]]]]] = {}  # guild -> (member, roles) seen meanwhile
+        self._stale: Set[int] = set()  # Guilds whose roles changed while they were being indexed
+        self._locks: Dict[int, asyncio.Lock] = {}
+        bot.add_listener(self.on_guild_role_create)
+        bot.add_listener(self.on_guild_role_update)
+        bot.add_listener(self.on_guild_role_delete)
+        bot.add_listener(self.on_member_join)
+        bot.add_listener(self.on_raw_member_remove)
+        bot.add_listener(self.on_guild_remove)
+        self._hook_member_updates()
+
+    # --- Queries ---
+    async def members_with(self, guild: discord.Guild, permission: str = "administrator") -> List[int]:
+        """Returns the ids of members that have a guild-wide permission (the owner always does)."""
+        if permission not in TRACKED_PERMISSIONS:
+            raise ValueError(f"{permission!r} is not tracked by the permission index")
+        if getattr(guild.default_role.permissions, permission) or guild.default_role.permissions.administrator:
+            # Everyone has it; the answer is the whole member list anyway.
+            return [m.id for m in await self.bot.member_directory.members(guild)]
+
+        index = await self._index_for(guild)
+        members: Set[int] = {guild.owner_id} if guild.owner_id else set()
+        for role_id in index.grants[permission]:
+            members |= index.holders.get(role_id, set())
+        return list(members)
+
+    async def _index_for(self, guild: discord.Guild) -> _GuildIndex:
+        index = self._guilds.get(guild.id)
+        if index is not None:
+            return index
+        lock = self._locks.setdefault(guild.id, asyncio.Lock())
+        async with lock:
+            if (index := self._guilds.get(guild.id)) is not None:
+                return index
+            start = time.perf_counter()
+            self._building[guild.id] = []
+            try:
+                index = _GuildIndex()
+                for role in guild.roles:
+                    self._set_role_grants(index, role.id, _granted(role.permissions), guild.id)
+                granting = index.granting_roles()
+                if granting:
+                    for member in await self.bot.member_directory.members(guild):
+                        # member._roles is the raw id list; member.roles would build and sort Role objects
+                        for role_id in granting.intersection(member._roles):
+                            index.holders[role_id].add(member.id)
+                # Apply role changes that arrived while the member list was fetched
+                for member_id, roles in self._building[guild.id]:
+                    self._apply_member(index, member_id, roles)
+            finally:
+                del self._building[guild.id]
+            if guild.id in self._stale:
+                self._stale.discard(guild.id)  # Answer this query, but index again next time
+            else:
+                self._guilds[guild.id] = index
+            logger.info(f"Indexed {len(index.holders)} permission roles of guild {guild.id} in {time.perf_counter() - start:.2f}s.")
+        self._locks.pop(guild.id, None)
+        return index
+
+    def invalidate(self, guild_id: int) -> None:
+        """Drops a guild's index; it is rebuilt on the next query."""
+        self._guilds.pop(guild_id, None)
+        if guild_id in self._building:
+            self._stale.add(guild_id)
+
+    # --- Maintenance ---
+    @staticmethod
+    def _set_role_grants(index: _GuildIndex, role_id: int, granted: Set[str], guild_id: int) -> None:
+        for name, roles in index.grants.items():
+            if name in granted and role_id != guild_id:  # @everyone is handled in members_with
+                roles.add(role_id)
+            else:
+                roles.discard(role_id)
+        if granted and role_id != guild_id:
+            index.holders.setdefault(role_id, set())
+        else:
+            index.holders.pop(role_id, None)
+
+    @staticmethod
+    def _apply_member(index: _GuildIndex, member_id: int, roles: Optional[Iterable[int]]) -> None:
+        """Sets a member's granting roles from their full role list (None: the member left)."""
+        roles = set(roles or ())
+        for role_id, holders in index.holders.items():
+            if role_id in roles:
+                holders.add(member_id)
+            else:
+                holders.discard(member_id)
+
+    def _member_changed(self, guild_id: int, member_id: int, roles: Optional[List[int]]) -> None:
+        if guild_id in self._building:
+            self._building[guild_id].append((member_id, roles))
+        if (index := self._guilds.get(guild_id)) is not None:
+            self._apply_member(index, member_id, roles)
+
+    def _hook_member_updates(self) -> None:
+        parsers: Dict[str, Any] = self.bot._connection.parsers
+        original = parsers["GUILD_MEMBER_UPDATE"]
+
+        def parse_guild_member_update(data: Dict[str, Any]) -> None:
+            try:
+                self._member_changed(int(data['guild_id']), int(data['user']['id']), [int(r) for r in data.get('roles', ())])
+            except Exception as e:  # Never let the index break event parsing
+                logger.error(f"Permission index failed to apply a member update: {e}", exc_info=True)
+            original(data)
+
+        parsers["GUILD_MEMBER_UPDATE"] = parse_guild_member_update
+
+    async def on_guild_role_create(self, role: discord.Role):
+        if role.guild.id in self._building:
+            self.invalidate(role.guild.id)
+        elif (index := self._guilds.get(role.guild.id)) is not None:
+            self._set_role_grants(index, role.id, _granted(role.permissions), role.guild.id)  # A new role has no members yet
+
+    async def on_guild_role_update(self, before: discord.Role, after: discord.Role):
+        if after.guild.id in self._building:
+            self.invalidate(after.guild.id)
+        index = self._guilds.get(after.guild.id)
+        if index is None:
+            return
+        if after.id not in index.holders and _granted(after.permissions):
+            self.invalidate(after.guild.id)  # Its members were never tracked
+        else:
+            self._set_role_grants(index, after.id, _granted(after.permissions), after.guild.id)
+
+    async def on_guild_role_delete(self, role: discord.Role):
+        if role.guild.id in self._building:
+            self.invalidate(role.guild.id)
+        elif (index := self._guilds.get(role.guild.id)) is not None:
+            self._set_role_grants(index, role.id, set(), role.guild.id)
+
+    async def on_member_join(self, member: discord.Member):
+        self._member_changed(member.guild.id, member.id, list(member._roles))
+
+    async def on_raw_member_remove(self, payload: discord.RawMemberRemoveEvent):
+        self._member_changed(payload.guild_id, payload.user.id, None)
+
+    async def on_guild_remove(self, guild: discord.Guild):
+        self.invalidate(guild.id)
@@ -0,0 +1,155 @@
+# Filename: utils/query_profiler.py
+
+import re
+import time
+import logging
+from collections import OrderedDict, deque
+from typing import Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Literals are folded into placeholders so that the same statement with different
+# values is aggregated under one key.
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalizes a SQL statement so that equivalent queries share one profile entry.
+
+    String and numeric literals become `?`, `IN (?, ?, ...)` lists collapse to `(?+)`
+    and all whitespace is collapsed to a single space.
+    """
+    normalized = _STRING_LITERAL.sub("?", query)
+    normalized = _NUMBER_LITERAL.sub("?", normalized)
+    normalized = _WHITESPACE.sub(" ", normalized).strip().rstrip(";")
+    return _IN_LIST.sub("(?+)", normalized)
+
+
+class QueryStats:
+    """Aggregated timings for a single normalized query."""
+
+    __slots__ = ("query", "calls", "total_time", "max_time", "total_rows", "total_lock_wait", "samples")
+
+    def __init__(self, query: str, sample_size: int):
+        self.query = query
+        self.calls = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.total_rows = 0
+        self.total_lock_wait = 0.0
+        # A bounded window of recent durations, used for percentile estimates.
+        self.samples: Deque[float] = deque(maxlen=sample_size)
+
+    def add(self, duration: float, rows: int, lock_wait: float) -> None:
+        self.calls += 1
+        self.total_time += duration
+        self.total_rows += rows
+        self.total_lock_wait += lock_wait
+        if duration > self.max_time:
+            self.max_time = duration
+        self.samples.append(duration)
+
+    @property
+    def avg_time(self) -> float:
+        return self.total_time / self.calls if self.calls else 0.0
+
+    def percentile(self, pct: float) -> float:
+        """Returns the given percentile (0-100) of the recent duration samples."""
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+
+class QueryProfiler:
+    """
+    Records per-query execution statistics for the DatabaseManager.
+
+    Entries are kept in a bounded table of `max_entries` distinct queries. Queries seen
+    only once sit in a probation bucket of up to a quarter of the table, evicted least
+    recently seen first, so a new query survives the next few new ones and gets measured;
+    a second execution promotes it. Once the bucket is full, or when it is empty, the
+    promoted query with the smallest total time makes room instead, so the rest of the
+    table holds the heaviest repeated queries.
+    """
+
+    def __init__(self, max_entries: int = 200, sample_size: int = 512, slow_threshold: float = 0.25):
+        """
+        Initializes the QueryProfiler.
+
+        Args:
+            max_entries: The maximum number of distinct normalized queries to track.
+            sample_size: How many recent durations to keep per query for percentiles.
+            slow_threshold: Queries slower than this (in seconds) are reported as slow.
+        """
+        self.max_entries = max_entries
+        self.sample_size = sample_size
+        self.slow_threshold = slow_threshold
+        self.started_at = time.time()
+        self._stats: Dict[str, QueryStats] = {}
+        self._probation: "OrderedDict[str, None]" = OrderedDict()  # Queries seen once, least recently seen first
+        self.probation_size = max(1, max_entries // 4)
+        self._explained: set = set()
+
+    def record(self, query: str, duration: float, rows: int = 0, lock_wait: float = 0.0) -> bool:
+        """
+        Records one execution of a query.
+
+        Returns:
+            True if the query crossed the slow threshold and has not been explained yet,
+            meaning the caller should log its query plan.
+        """
+        key = normalize_query(query)
+        stats = self._stats.get(key)
+        if stats is None:
+            if len(self._stats) >= self.max_entries:
+                self._evict()
+            stats = self._stats[key] = QueryStats(key, self.sample_size)
+            self._probation[key] = None
+        elif key in self._probation:
+            del self._probation[key]  # Seen again: promoted
+        stats.add(duration, rows, lock_wait)
+
+        if duration >= self.slow_threshold and key not in self._explained:
+            self._explained.add(key)
+            return True
+        return False
+
+    def _evict(self) -> None:
+        """Drops the oldest query on probation, or the promoted query with the lowest total time."""
+        if self._probation and (len(self._probation) >= self.probation_size or len(self._probation) == len(self._stats)):
+            victim, _ = self._probation.popitem(last=False)
+        else:
+            victim = min((s for s in self._stats.values() if s.query not in self._probation), key=lambda s: s.total_time).query
+        del self._stats[victim]
+        self._explained.discard(victim)
+
+    def top(self, by: str = "total", limit: int = 10) -> List[QueryStats]:
+        """Returns the top queries sorted by `total` time, `p99`, `avg` or `calls`."""
+        keys = {
+            "total": lambda s: s.total_time,
+            "p99": lambda s: s.percentile(99),
+            "avg": lambda s: s.avg_time,
+            "calls": lambda s: s.calls,
+        }
+        if by not in keys:
+            raise ValueError(f"Unknown sort key: {by}")
+        return sorted(self._stats.values(), key=keys[by], reverse=True)[:limit]
+
+    def get(self, query: str) -> Optional[QueryStats]:
+        return self._stats.get(normalize_query(query))
+
+    def reset(self) -> None:
+        """Clears all collected statistics."""
+        self._stats.clear()
+        self._probation.clear()
+        self._explained.clear()
+        self.started_at = time.time()
+
+    def __len__(self) -> int:
+        return len(self._stats)
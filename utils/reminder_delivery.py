@@ -0,0 +1,230 @@
+# Filename: utils/reminder_delivery.py
+
+from __future__ import annotations
+import sys
+import time
+import asyncio
+import logging
+import argparse
+from collections import defaultdict
+from datetime import datetime, UTC
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Mapping, Sequence, Tuple
+
+import discord
+
+if TYPE_CHECKING:
+    from .database import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+MAX_EMBEDS_PER_MESSAGE = 10
+MAX_EMBED_CHARS_PER_MESSAGE = 6000
+DELETE_CHUNK = 500  # Stays well under SQLite's bound-parameter limit
+
+
+def reminder_embed(row: Mapping[str, Any], color: discord.Color) -> discord.Embed:
+    embed = discord.Embed(
+        title="⏰ تذكير!",
+        description=f"مرحبًا <@{row['user_id']}>، لقد طلبت مني أن أذكرك بالتالي:",
+        color=color,
+        timestamp=datetime.fromtimestamp(row['remind_timestamp'], tz=UTC)
+    )
+    embed.add_field(name="المحتوى", value=f"> {row['remind_content']}"[:1024], inline=False)
+    return embed
+
+
+def pack_messages(rows: Sequence[Mapping[str, Any]], color: discord.Color) -> List[Tuple[List[Mapping[str, Any]], List[discord.Embed]]]:
+    """Groups one channel's reminders into messages of at most 10 embeds and 6000 embed characters."""
+    messages: List[Tuple[List[Mapping[str, Any]], List[discord.Embed]]] = []
+    batch_rows, batch_embeds, chars = [], [], 0
+    for row in rows:
+        embed = reminder_embed(row, color)
+        size = len(embed)
+        if batch_embeds and (len(batch_embeds) == MAX_EMBEDS_PER_MESSAGE or chars + size > MAX_EMBED_CHARS_PER_MESSAGE):
+            messages.append((batch_rows, batch_embeds))
+            batch_rows, batch_embeds, chars = [], [], 0
+        batch_rows.append(row)
+        batch_embeds.append(embed)
+        chars += size
+    if batch_embeds:
+        messages.append((batch_rows, batch_embeds))
+    return messages
+
+
+class ReminderDelivery:
+    """
+    Sends due reminders with as few API calls as possible.
+
+    Nothing is fetched: channels come from the cache or, failing that, a partial
+    messageable (sending to one needs only its id), and users are mentioned by id.
+    Due reminders are grouped per channel into messages of up to ten embeds, the
+    messages are sent with at most `concurrency` requests in flight, and transient
+    failures (5xx, timeouts) are retried with backoff. Delivered reminders, and those
+    whose channel is gone or forbidden, are deleted in batched statements; reminders
+    that still failed after the retries stay for the next run.
+    """
+
+    def __init__(self, bot: discord.Client, db: DatabaseManager, color: discord.Color, concurrency: int = 5, retries: int = 3,
+                 backoff: float = 1.0):
+        self.bot = bot
+        self.db = db
+        self.color = color
+        self.retries = retries
+        self.backoff = backoff
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    def _channel(self, channel_id: int) -> discord.abc.Messageable:
+        return self.bot.get_channel(channel_id) or self.bot.get_partial_messageable(channel_id)
+
+    async def _send(self, channel: discord.abc.Messageable, rows: List[Mapping[str, Any]], embeds: List[discord.Embed]) -> bool:
+        """Sends one combined message. Returns False on a permanent failure; raises after exhausting retries."""
+        mentions = " ".join(dict.fromkeys(f"<@{row['user_id']}>" for row in rows))
+        for attempt in range(self.retries + 1):
+            try:
+                async with self._semaphore:
+                    await channel.send(content=mentions, embeds=embeds, allowed_mentions=discord.AllowedMentions(users=True))
+                return True
+            except (discord.NotFound, discord.Forbidden) as e:
+                logger.warning(f"Dropping {len(rows)} reminder(s) for channel {rows[0]['channel_id']}: {e}")
+                return False
+            except (discord.HTTPException, asyncio.TimeoutError, OSError) as e:
+                if isinstance(e, discord.HTTPException) and e.status < 500:
+                    logger.warning(f"Dropping {len(rows)} reminder(s) for channel {rows[0]['channel_id']}: {e}")
+                    return False
+                if attempt == self.retries:
+                    raise
+                await asyncio.sleep(self.backoff * 2 ** attempt)
+        return False
+
+    async def deliver(self, rows: Iterable[Mapping[str, Any]]) -> Tuple[int, int, int]:
+        """
+        Delivers due reminder rows and deletes the finished ones.
+
+        Returns:
+            `(delivered, dropped, kept)` reminder counts.
+        """
+        by_channel: Dict[int, List[Mapping[str, Any]]] = defaultdict(list)
+        for row in rows:
+            by_channel[int(row['channel_id'])].append(row)
+
+        jobs = []
+        for channel_id, channel_rows in by_channel.items():
+            channel = self._channel(channel_id)
+            for batch_rows, embeds in pack_messages(channel_rows, self.color):
+                jobs.append((batch_rows, self._send(channel, batch_rows, embeds)))
+
+        results = await asyncio.gather(*(job for _, job in jobs), return_exceptions=True)
+        finished: List[int] = []
+        delivered = dropped = kept = 0
+        for (batch_rows, _), result in zip(jobs, results):
+            if isinstance(result, BaseException):
+                logger.error(f"Could not deliver {len(batch_rows)} reminder(s) to channel {batch_rows[0]['channel_id']}, will retry: {result}")
+                kept += len(batch_rows)
+                continue
+            finished.extend(row['reminder_id'] for row in batch_rows)
+            if result:
+                delivered += len(batch_rows)
+            else:
+                dropped += len(batch_rows)
+
+        for start in range(0, len(finished), DELETE_CHUNK):
+            chunk = finished[start:start + DELETE_CHUNK]
+            await self.db.execute(f"DELETE FROM reminders WHERE reminder_id IN ({', '.join('?' * len(chunk))})", chunk)
+        return delivered, dropped, kept
+
+
+# --- Benchmark against a stub HTTP client ---
+class _StubHTTP:
+    """Counts REST calls and simulates their latency; no network is used."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls: Dict[str, int] = defaultdict(int)
+
+    async def request(self, route: str) -> None:
+        self.calls[route] += 1
+        await asyncio.sleep(self.latency)
+
+
+class _StubChannel:
+    def __init__(self, channel_id: int, http: _StubHTTP):
+        self.id = channel_id
+        self.mention = f"<#{channel_id}>"
+        self._http = http
+
+    async def send(self, content=None, *, embed=None, embeds=None, allowed_mentions=None):
+        await self._http.request("POST /channels/{id}/messages")
+
+
+class _StubBot:
+    def __init__(self, http: _StubHTTP):
+        self.http = http
+
+    def get_channel(self, channel_id: int):
+        return None  # Worst case: nothing cached
+
+    def get_partial_messageable(self, channel_id: int):
+        return _StubChannel(channel_id, self.http)
+
+    async def fetch_user(self, user_id: int):
+        await self.http.request("GET /users/{id}")
+        return type("User", (), {"mention": f"<@{user_id}>"})()
+
+    async def fetch_channel(self, channel_id: int):
+        await self.http.request("GET /channels/{id}")
+        return _StubChannel(channel_id, self.http)
+
+
+class _StubDB:
+    def __init__(self):
+        self.statements = 0
+
+    async def execute(self, query: str, params: Iterable[Any] = ()) -> None:
+        self.statements += 1
+
+
+async def _legacy_deliver(bot: _StubBot, db: _StubDB, rows: List[Dict[str, Any]]) -> None:
+    # The previous loop: two fetches, one send and one delete per reminder, one at a time.
+    for r in rows:
+        await bot.fetch_user(r['user_id'])
+        channel = await bot.fetch_channel(r['channel_id'])
+        await channel.send(embed=reminder_embed(r, discord.Color.blurple()))
+        await db.execute("DELETE FROM reminders WHERE reminder_id = ?", (r['reminder_id'],))
+
+
+async def _benchmark(count: int, channels: int, latency: float) -> None:
+    now = time.time()
+    rows = [
+        {"reminder_id": i, "user_id": 10_000 + i % 3000, "channel_id": 500 + i % channels, "remind_content": f"reminder number {i}", "remind_timestamp": now}
+        for i in range(count)
+    ]
+    for label, run in (("legacy", _legacy_deliver), ("batched", None)):
+        http, db = _StubHTTP(latency), _StubDB()
+        bot = _StubBot(http)
+        start = time.perf_counter()
+        if run is not None:
+            await run(bot, db, rows)
+        else:
+            await ReminderDelivery(bot, db, discord.Color.blurple()).deliver(rows)
+        elapsed = time.perf_counter() - start
+        calls = ", ".join(f"{route}: {n}" for route, n in sorted(http.calls.items()))
+        print(f"{label:<8} {sum(http.calls.values()):6} API calls ({calls}), {db.statements} DELETE statements, {elapsed:.2f}s")
+
+
+def main() -> int:
+    """
+    Counts API calls for many simultaneous reminders against a stub HTTP client.
+
+    Run from the project root: `python -m utils.reminder_delivery --reminders 10000`
+    """
+    parser = argparse.ArgumentParser(description="Benchmark reminder delivery.")
+    parser.add_argument("--reminders", type=int, default=10_000)
+    parser.add_argument("--channels", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.002, help="Simulated seconds per API call.")
+    args = parser.parse_args()
+    asyncio.run(_benchmark(args.reminders, args.channels, args.latency))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+# Filename: utils/snipe_store.py
+
+import time
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+import discord
+
+
+class SnipeRecord:
+    """A compact copy of a deleted or edited message. Holds no references to discord.py objects."""
+
+    __slots__ = ("author_id", "author_name", "content", "after_content", "attachments", "created_at", "_expires")
+
+    def __init__(self, author_id: int, author_name: str, content: str, attachments: Tuple[str, ...] = (), after_content: Optional[str] = None):
+        self.author_id = author_id
+        self.author_name = author_name
+        self.content = content
+        self.after_content = after_content  # Only set for edits
+        self.attachments = attachments
+        self.created_at = time.time()
+        self._expires = 0.0
+
+    @classmethod
+    def from_message(cls, message: discord.Message, after: Optional[discord.Message] = None) -> "SnipeRecord":
+        return cls(
+            message.author.id,
+            message.author.display_name,
+            message.content,
+            tuple(att.url for att in message.attachments),
+            after.content if after is not None else None,
+        )
+
+
+class SnipeStore:
+    """
+    Keeps the last few deleted (or edited) messages per channel.
+
+    Each channel has a fixed-size ring buffer (a short list; at ten entries it is far
+    smaller than a deque for the common single-record channel). Records expire after `ttl` seconds, and
+    the total number of records across all channels is capped at `max_records`; when
+    the cap is hit, the oldest record of the least recently active channel is dropped.
+    """
+
+    def __init__(self, per_channel: int = 10, ttl: float = 3600.0, max_records: int = 50_000):
+        """
+        Initializes the SnipeStore.
+
+        Args:
+            per_channel: How many records each channel keeps.
+            ttl: Seconds after which a record can no longer be sniped.
+            max_records: The global cap on stored records across all channels.
+        """
+        self.per_channel = per_channel
+        self.ttl = ttl
+        self.max_records = max_records
+        # Ordered by last activity, least recently active channel first.
+        self._channels: "OrderedDict[int, List[SnipeRecord]]" = OrderedDict()
+        self._size = 0
+
+    def push(self, channel_id: int, record: SnipeRecord) -> None:
+        """Stores a record as the newest entry for a channel."""
+        record._expires = time.monotonic() + self.ttl
+        ring = self._channels.get(channel_id)
+        if ring is None:
+            self._channels[channel_id] = [record]
+        else:
+            self._channels.move_to_end(channel_id)
+            ring.append(record)
+            if len(ring) > self.per_channel:
+                del ring[0]
+                self._size -= 1
+        self._size += 1
+
+        self.prune()
+        while self._size > self.max_records:
+            oldest_channel, oldest_ring = next(iter(self._channels.items()))
+            del oldest_ring[0]
+            self._size -= 1
+            if not oldest_ring:
+                del self._channels[oldest_channel]
+
+    def get(self, channel_id: int, index: int = 1) -> Optional[SnipeRecord]:
+        """Returns the `index`-th most recent unexpired record of a channel (1 is the newest)."""
+        ring = self._channels.get(channel_id)
+        if not ring:
+            return None
+        now = time.monotonic()
+        expired = 0
+        while expired < len(ring) and ring[expired]._expires <= now:
+            expired += 1
+        if expired:
+            del ring[:expired]
+            self._size -= expired
+        if not ring:
+            del self._channels[channel_id]
+            return None
+        return ring[-index] if 1 <= index <= len(ring) else None
+
+    def count(self, channel_id: int) -> int:
+        ring = self._channels.get(channel_id)
+        return len(ring) if ring else 0
+
+    def prune(self) -> None:
+        """
+        Drops channels whose newest record has expired.
+
+        Channels are ordered by last activity, so the scan stops at the first channel
+        that is still live; this keeps the cost of a call proportional to what it removes.
+        """
+        now = time.monotonic()
+        while self._channels:
+            channel_id, ring = next(iter(self._channels.items()))
+            if ring and ring[-1]._expires > now:
+                break
+            self._size -= len(ring)
+            del self._channels[channel_id]
+
+    def __len__(self) -> int:
+        return self._size
@@ -0,0 +1,286 @@
+# Filename: utils/starboard.py
+
+from __future__ import annotations
+import sys
+import time
+import asyncio
+import logging
+import argparse
+from collections import OrderedDict, defaultdict
+from datetime import datetime, UTC
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Optional
+
+import discord
+
+if TYPE_CHECKING:
+    from .database import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+STAR = "⭐"
+
+
+class StarredMessage:
+    """A message being starred: its live count and what the starboard currently shows."""
+
+    __slots__ = ("guild_id", "channel_id", "message_id", "count", "shown", "post_id", "embed", "fetching", "stale", "dirty", "task")
+
+    def __init__(self, guild_id: int, channel_id: int, message_id: int, post_id: Optional[int]):
+        self.guild_id = guild_id
+        self.channel_id = channel_id
+        self.message_id = message_id
+        self.count = 0
+        self.shown: Optional[int] = None  # Count in the starboard post as last sent
+        self.post_id = post_id
+        self.embed: Optional[discord.Embed] = None  # Built from the first fetch; only needed to create the post
+        self.fetching = False
+        self.stale = False  # Reactions arrived during a fetch, so the fetched count may be off by them
+        self.dirty = False
+        self.task: Optional[asyncio.Task] = None
+
+
+class StarboardEngine:
+    """
+    Keeps star counts from raw reaction events and mirrors them to the starboard channel.
+
+    The first star on a message fetches it once, for the real count and the post's embed;
+    after that each event is a counter update. Reactions that arrive while a fetch is in
+    flight may or may not be in its result, so they mark the message stale and the next
+    update fetches it again instead of guessing.
+
+    Posts are created and edited by one task per message, at most once per `debounce`
+    seconds: a burst of stars becomes a handful of edits showing the latest count.
+    Later edits change only the header line, so they need no fetch. Post ids are kept
+    in the `starboard` table. Idle messages beyond `max_messages` are forgotten and
+    fetched again if they get another star.
+    """
+
+    def __init__(self, bot: Any, db: DatabaseManager, debounce: float = 2.0, max_messages: int = 5_000):
+        self.bot = bot
+        self.db = db
+        self.debounce = debounce
+        self.max_messages = max_messages
+        self._messages: "OrderedDict[int, StarredMessage]" = OrderedDict()  # message id -> state, least recent first
+        self._posts: Dict[int, int] = {}  # message id -> starboard post id
+
+    async def load(self) -> int:
+        """Loads the existing starboard posts. Returns how many there are."""
+        rows = await self.db.fetchall("SELECT original_message_id, starboard_message_id FROM starboard")
+        self._posts = {int(row['original_message_id']): int(row['starboard_message_id']) for row in rows}
+        return len(self._posts)
+
+    def close(self) -> None:
+        for message in self._messages.values():
+            if message.task is not None:
+                message.task.cancel()
+
+    # --- Events ---
+    def react(self, guild_id: int, channel_id: int, message_id: int, delta: int) -> None:
+        """Counts one star added (+1) or removed (-1)."""
+        message = self._get(guild_id, channel_id, message_id)
+        if message.fetching:
+            message.stale = True
+        else:
+            message.count = max(0, message.count + delta)
+        self._schedule(message)
+
+    def clear(self, guild_id: int, channel_id: int, message_id: int) -> None:
+        """All stars were removed at once."""
+        message = self._get(guild_id, channel_id, message_id)
+        message.count = 0
+        message.stale = message.stale or message.fetching
+        self._schedule(message)
+
+    def _get(self, guild_id: int, channel_id: int, message_id: int) -> StarredMessage:
+        message = self._messages.get(message_id)
+        if message is not None:
+            self._messages.move_to_end(message_id)
+            return message
+        if len(self._messages) >= self.max_messages:
+            idle = next((key for key, m in self._messages.items() if m.task is None), None)
+            if idle is not None:
+                del self._messages[idle]
+        message = self._messages[message_id] = StarredMessage(guild_id, channel_id, message_id, self._posts.get(message_id))
+        message.stale = True  # Not fetched yet
+        return message
+
+    def _schedule(self, message: StarredMessage) -> None:
+        message.dirty = True
+        if message.task is None:
+            message.task = asyncio.create_task(self._run(message))
+
+    # --- Updates ---
+    async def _run(self, message: StarredMessage) -> None:
+        try:
+            while message.dirty:
+                message.dirty = False
+                if message.stale:
+                    await self._fetch(message)
+                await self._render(message)
+                await asyncio.sleep(self.debounce)
+        except discord.NotFound:
+            self._messages.pop(message.message_id, None)  # The message or the starboard post is gone
+        except discord.HTTPException as e:
+            logger.warning(f"Could not update the starboard for message {message.message_id}: {e}")
+        finally:
+            message.task = None
+
+    def _channel(self, channel_id: int):
+        return self.bot.get_channel(channel_id) or self.bot.get_partial_messageable(channel_id)
+
+    async def _fetch(self, message: StarredMessage) -> None:
+        message.fetching, message.stale = True, False
+        try:
+            original = await self._channel(message.channel_id).fetch_message(message.message_id)
+        finally:
+            message.fetching = False
+        message.count = next((r.count for r in original.reactions if str(r.emoji) == STAR), 0)
+        if message.post_id is None and message.embed is None:
+            message.embed = self.build_embed(original)
+
+    async def _render(self, message: StarredMessage) -> None:
+        conf = self.bot.get_guild_config(message.guild_id)['starboard']
+        if not conf.get('enabled') or not conf.get('channel_id') or message.count == message.shown:
+            return
+        board = self._channel(conf['channel_id'])
+        header = f"{STAR} **{message.count}** | <#{message.channel_id}>"
+        if message.post_id is not None:
+            await board.get_partial_message(message.post_id).edit(content=header)
+        elif message.count >= conf.get('star_count', 5) and message.embed is not None:
+            post = await board.send(content=header, embed=message.embed)
+            message.post_id = self._posts[message.message_id] = post.id
+            message.embed = None
+            await self.db.execute(
+                "INSERT OR REPLACE INTO starboard (original_message_id, starboard_message_id, guild_id) VALUES (?, ?, ?)",
+                (message.message_id, post.id, message.guild_id)
+            )
+        else:
+            return  # Below the threshold and never posted
+        message.shown = message.count
+
+    @staticmethod
+    def build_embed(original: discord.Message) -> discord.Embed:
+        embed = discord.Embed(description=original.content or None, color=discord.Color.gold(), timestamp=original.created_at)
+        embed.set_author(name=original.author.display_name, icon_url=original.author.display_avatar.url)
+        image = next((a.url for a in original.attachments if (a.content_type or "").startswith("image/")), None)
+        if image:
+            embed.set_image(url=image)
+        embed.add_field(name="Source", value=f"[Jump to message]({original.jump_url})")
+        return embed
+
+
+# --- Load test against a stub HTTP client ---
+class _StubHTTP:
+    """Counts REST calls and simulates their latency; no network is used."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls: Dict[str, int] = defaultdict(int)
+        self.stars = 0  # The count as the API would report it
+        self.header = ""
+
+    async def request(self, route: str) -> None:
+        self.calls[route] += 1
+        await asyncio.sleep(self.latency)
+
+
+class _StubMessage:
+    def __init__(self, message_id: int, http: _StubHTTP):
+        author = type("User", (), {"display_name": "someone", "display_avatar": type("Asset", (), {"url": "https://cdn.example/a.png"})()})()
+        self.id, self.content, self.author, self.attachments = message_id, "a very good message", author, []
+        self.created_at, self.jump_url = datetime.now(UTC), f"https://discord.com/channels/1/2/{message_id}"
+        self.reactions = [type("Reaction", (), {"emoji": STAR, "count": http.stars})()]
+        self._http = http
+
+    async def edit(self, *, content: str) -> None:
+        await self._http.request("PATCH /channels/{id}/messages/{id}")
+        self._http.header = content
+
+
+class _StubChannel:
+    def __init__(self, http: _StubHTTP):
+        self._http = http
+
+    async def fetch_message(self, message_id: int) -> _StubMessage:
+        await self._http.request("GET /channels/{id}/messages/{id}")
+        return _StubMessage(message_id, self._http)
+
+    async def send(self, *, content: str, embed: discord.Embed) -> _StubMessage:
+        await self._http.request("POST /channels/{id}/messages")
+        self._http.header = content
+        return _StubMessage(999, self._http)
+
+    def get_partial_message(self, message_id: int) -> _StubMessage:
+        return _StubMessage(message_id, self._http)
+
+
+class _StubBot:
+    def __init__(self, http: _StubHTTP):
+        self.channel = _StubChannel(http)
+
+    def get_channel(self, channel_id: int):
+        return None
+
+    def get_partial_messageable(self, channel_id: int) -> _StubChannel:
+        return self.channel
+
+    def get_guild_config(self, guild_id: int) -> Dict[str, Any]:
+        return {"starboard": {"enabled": True, "channel_id": 3, "star_count": 5}}
+
+
+class _StubDB:
+    async def execute(self, query: str, params: Iterable[Any] = ()) -> None:
+        pass
+
+
+async def _naive(bot: _StubBot, http: _StubHTTP) -> None:
+    # Fetch on every event, then create or edit the post.
+    message = await bot.channel.fetch_message(1)
+    count = message.reactions[0].count
+    if count >= 5:
+        if http.header:
+            await bot.channel.get_partial_message(999).edit(content=f"{STAR} **{count}** | <#2>")
+        else:
+            await bot.channel.send(content=f"{STAR} **{count}** | <#2>", embed=None)
+
+
+async def _benchmark(stars: int, duration: float, latency: float, debounce: float) -> None:
+    for label in ("naive", "engine"):
+        http = _StubHTTP(latency)
+        bot = _StubBot(http)
+        engine = StarboardEngine(bot, _StubDB(), debounce=debounce)
+        tasks = []
+        start = time.perf_counter()
+        for _ in range(stars):
+            http.stars += 1  # The reaction lands, then its gateway event arrives
+            if label == "naive":
+                tasks.append(asyncio.create_task(_naive(bot, http)))
+            else:
+                engine.react(1, 2, 1, +1)
+            await asyncio.sleep(duration / stars)
+        await asyncio.gather(*tasks)
+        while any(m.task for m in engine._messages.values()):
+            await asyncio.sleep(0.01)
+        elapsed = time.perf_counter() - start
+        calls = ", ".join(f"{route}: {n}" for route, n in sorted(http.calls.items()))
+        print(f"{label:<7} {sum(http.calls.values()):4} API calls ({calls}) in {elapsed:.1f}s; post shows {http.header!r}")
+
+
+def main() -> int:
+    """
+    Counts API calls for a burst of stars on one message against a stub HTTP client.
+
+    Run from the project root: `python -m utils.starboard --stars 200 --duration 10`
+    """
+    parser = argparse.ArgumentParser(description="Load test the starboard engine.")
+    parser.add_argument("--stars", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds the burst is spread over.")
+    parser.add_argument("--latency", type=float, default=0.1, help="Simulated seconds per API call.")
+    parser.add_argument("--debounce", type=float, default=2.0)
+    args = parser.parse_args()
+    asyncio.run(_benchmark(args.stars, args.duration, args.latency, args.debounce))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,175 @@
+# Filename: utils/startup_profiler.py
+
+import sys
+import time
+import asyncio
+import logging
+import argparse
+import contextlib
+from importlib.abc import MetaPathFinder
+from typing import Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class _TimedLoader:
+    """Wraps a module loader so the import timer sees when the module's code runs."""
+
+    def __init__(self, loader, timer: "ImportTimer"):
+        self._loader = loader
+        self._timer = timer
+
+    def __getattr__(self, name: str):
+        return getattr(self._loader, name)
+
+    def create_module(self, spec):
+        # Extension modules do their real work here rather than in exec_module.
+        with self._timer.measure(spec.name):
+            return self._loader.create_module(spec)
+
+    def exec_module(self, module) -> None:
+        try:
+            with self._timer.measure(module.__name__):
+                self._loader.exec_module(module)
+        finally:
+            # Hand the module back its real loader; the wrapper only exists during import.
+            module.__loader__ = self._loader
+            if module.__spec__ is not None:
+                module.__spec__.loader = self._loader
+
+
+class ImportTimer(MetaPathFinder):
+    """
+    A `sys.meta_path` hook that times every module imported while it is installed.
+
+    For each module it records the inclusive time (including modules it imported) and
+    the self time (excluding them), like `python -X importtime`.
+    """
+
+    def __init__(self):
+        self.timings: Dict[str, List[float]] = {}  # name -> [self, inclusive]
+        self._stack: List[List] = []  # [name, start, time spent in nested imports]
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+            spec.loader = _TimedLoader(spec.loader, self)
+        return spec
+
+    @contextlib.contextmanager
+    def measure(self, name: str) -> Iterator[None]:
+        frame = [name, time.perf_counter(), 0.0]
+        self._stack.append(frame)
+        try:
+            yield
+        finally:
+            self._stack.pop()
+            inclusive = time.perf_counter() - frame[1]
+            entry = self.timings.setdefault(name, [0.0, 0.0])
+            entry[0] += inclusive - frame[2]
+            entry[1] += inclusive
+            if self._stack:
+                self._stack[-1][2] += inclusive
+
+    def install(self) -> None:
+        if self not in sys.meta_path:
+            sys.meta_path.insert(0, self)
+
+    def uninstall(self) -> None:
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+
+class StartupProfiler:
+    """Collects import times per module and load times per cog during startup."""
+
+    def __init__(self):
+        self.imports = ImportTimer()
+        self.cogs: Dict[str, float] = {}
+        self.phases: Dict[str, float] = {}
+
+    @contextlib.contextmanager
+    def track_imports(self) -> Iterator[None]:
+        """Times every module imported inside the block."""
+        self.imports.install()
+        try:
+            yield
+        finally:
+            self.imports.uninstall()
+
+    @contextlib.contextmanager
+    def phase(self, name: str, bucket: Optional[Dict[str, float]] = None) -> Iterator[None]:
+        """Times a block and stores it under `name` (in `phases` unless another bucket is given)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            (self.phases if bucket is None else bucket)[name] = time.perf_counter() - start
+
+    def cog(self, name: str):
+        """Times loading one cog."""
+        return self.phase(name, self.cogs)
+
+    def top_imports(self, limit: int = 15) -> List[Tuple[str, float, float]]:
+        """Returns `(module, self_time, inclusive_time)` for the slowest modules by self time."""
+        ranked = sorted(self.imports.timings.items(), key=lambda item: item[1][0], reverse=True)
+        return [(name, own, inclusive) for name, (own, inclusive) in ranked[:limit]]
+
+    def report(self, imports: int = 15, cogs: int = 10) -> str:
+        """Renders the collected timings as a plain-text report."""
+        lines = ["Startup profile:"]
+        for name, duration in self.phases.items():
+            lines.append(f"  {name:<32} {duration * 1000:9.1f} ms")
+        if self.cogs:
+            lines.append(f"  Slowest cogs ({len(self.cogs)} loaded, {sum(self.cogs.values()) * 1000:.1f} ms total):")
+            for name, duration in sorted(self.cogs.items(), key=lambda item: item[1], reverse=True)[:cogs]:
+                lines.append(f"    {name:<30} {duration * 1000:9.1f} ms")
+        if self.imports.timings:
+            lines.append(f"  Slowest imports ({len(self.imports.timings)} modules, self / inclusive):")
+            for name, own, inclusive in self.top_imports(imports):
+                lines.append(f"    {name:<30} {own * 1000:9.1f} ms / {inclusive * 1000:9.1f} ms")
+        return "\n".join(lines)
+
+
+# --- Regression benchmark ---
+async def _measure_setup_hook() -> Tuple[float, "StartupProfiler"]:
+    from bot import MaxyBot  # Imported here so the module itself stays cheap to import
+
+    bot = MaxyBot()
+    await bot.db.init()
+    async with bot:  # Sets up the loop like login() would, and closes the bot afterwards
+        start = time.perf_counter()
+        await bot.setup_hook()
+        return time.perf_counter() - start, bot.startup_profile
+
+
+def main() -> int:
+    """
+    Measures time-to-setup_hook-complete without connecting to Discord.
+
+    Run from the project root: `python -m utils.startup_profiler --budget 1.5`
+    Exits with status 1 when setup_hook takes longer than the budget.
+    """
+    parser = argparse.ArgumentParser(description="Measure MaxyBot's setup_hook time.")
+    parser.add_argument("--budget", type=float, default=None, help="Fail if setup_hook takes longer than this many seconds.")
+    args = parser.parse_args()
+
+    process_start = time.perf_counter()
+    duration, profile = asyncio.run(_measure_setup_hook())
+    print(profile.report())
+    print(f"setup_hook completed in {duration:.2f}s ({time.perf_counter() - process_start:.2f}s including imports and teardown)")
+    if args.budget is not None and duration > args.budget:
+        print(f"REGRESSION: setup_hook exceeded the {args.budget:.2f}s budget")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+# Filename: utils/ticket_store.py
+
+import asyncio
+import logging
+import weakref
+from typing import Dict, Optional, Tuple
+
+from .database import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+
+class TicketRecord:
+    """The state of one ticket channel."""
+
+    __slots__ = ("channel_id", "guild_id", "user_id", "status", "claimed_by")
+
+    def __init__(self, channel_id: int, guild_id: int, user_id: int, status: str = "open", claimed_by: Optional[int] = None):
+        self.channel_id = channel_id
+        self.guild_id = guild_id
+        self.user_id = user_id
+        self.status = status
+        self.claimed_by = claimed_by
+
+    @property
+    def is_open(self) -> bool:
+        return self.status == "open"
+
+
+class TicketStore:
+    """
+    Ticket state kept in the `tickets` table, with in-memory indexes for lookups.
+
+    `by_channel` maps every known ticket channel to its record, and `open_by_owner`
+    maps `(guild_id, user_id)` to the user's open ticket channel, so the duplicate
+    check on "create ticket" is a dict lookup instead of a scan of channel topics.
+    Creating, claiming, closing and reopening a ticket hold its owner's lock and re-check
+    the state under it, so concurrent clicks cannot open two tickets, claim one twice or
+    close it twice.
+    """
+
+    def __init__(self, db: DatabaseManager):
+        self.db = db
+        self.by_channel: Dict[int, TicketRecord] = {}
+        self.open_by_owner: Dict[Tuple[int, int], int] = {}
+        self._locks: "weakref.WeakValueDictionary[Tuple[int, int], asyncio.Lock]" = weakref.WeakValueDictionary()
+
+    async def load(self) -> int:
+        """Loads every ticket into memory. Returns how many were loaded."""
+        rows = await self.db.fetchall("SELECT channel_id, guild_id, user_id, status, claimed_by FROM tickets")
+        self.by_channel.clear()
+        self.open_by_owner.clear()
+        for row in rows:
+            self._index(TicketRecord(
+                int(row['channel_id']), int(row['guild_id']), int(row['user_id']), row['status'] or "open",
+                int(row['claimed_by']) if row['claimed_by'] else None,
+            ))
+        logger.info(f"Loaded {len(self.by_channel)} tickets ({len(self.open_by_owner)} open).")
+        return len(self.by_channel)
+
+    def _index(self, record: TicketRecord) -> None:
+        self.by_channel[record.channel_id] = record
+        if record.is_open:
+            self.open_by_owner[(record.guild_id, record.user_id)] = record.channel_id
+
+    def _unindex_owner(self, record: TicketRecord) -> None:
+        key = (record.guild_id, record.user_id)
+        if self.open_by_owner.get(key) == record.channel_id:
+            del self.open_by_owner[key]
+
+    # --- Lookups ---
+    def get(self, channel_id: int) -> Optional[TicketRecord]:
+        return self.by_channel.get(channel_id)
+
+    def open_ticket_of(self, guild_id: int, user_id: int) -> Optional[int]:
+        """Returns the channel id of the user's open ticket in a guild, if any."""
+        return self.open_by_owner.get((guild_id, user_id))
+
+    def lock(self, guild_id: int, user_id: int) -> asyncio.Lock:
+        """The lock to hold while checking for and creating a user's ticket."""
+        lock = self._locks.get((guild_id, user_id))
+        if lock is None:
+            lock = self._locks[(guild_id, user_id)] = asyncio.Lock()
+        return lock
+
+    # --- State changes ---
+    async def add(self, channel_id: int, guild_id: int, user_id: int) -> TicketRecord:
+        """Records a new open ticket."""
+        record = TicketRecord(channel_id, guild_id, user_id)
+        await self.db.execute(
+            "INSERT OR REPLACE INTO tickets (channel_id, guild_id, user_id, status, claimed_by) VALUES (?, ?, ?, 'open', NULL)",
+            (str(channel_id), str(guild_id), str(user_id))
+        )
+        self._index(record)
+        return record
+
+    async def claim(self, record: TicketRecord, staff_id: int) -> bool:
+        """Claims an unclaimed ticket. Returns False if someone else claimed it first."""
+        async with self.lock(record.guild_id, record.user_id):
+            if record.claimed_by is not None:
+                return False
+            record.claimed_by = staff_id
+            await self.db.execute(
+                "UPDATE tickets SET claimed_by = ? WHERE channel_id = ? AND claimed_by IS NULL",
+                (str(staff_id), str(record.channel_id))
+            )
+        return True
+
+    async def close(self, record: TicketRecord) -> bool:
+        """Closes an open ticket. Returns False if it was already closed."""
+        async with self.lock(record.guild_id, record.user_id):
+            if not record.is_open:
+                return False
+            record.status = "closed"
+            self._unindex_owner(record)
+            await self.db.execute("UPDATE tickets SET status = 'closed' WHERE channel_id = ?", (str(record.channel_id),))
+        return True
+
+    async def reopen(self, record: TicketRecord) -> bool:
+        """Reopens a closed ticket. Returns False if its owner already has another open ticket."""
+        async with self.lock(record.guild_id, record.user_id):
+            current = self.open_ticket_of(record.guild_id, record.user_id)
+            if current is not None and current != record.channel_id:
+                return False
+            await self.db.execute("UPDATE tickets SET status = 'open' WHERE channel_id = ?", (str(record.channel_id),))
+            record.status = "open"
+            self._index(record)
+            return True
+
+    async def remove(self, channel_id: int) -> None:
+        """Forgets a ticket, e.g. when its channel was deleted."""
+        record = self.by_channel.pop(channel_id, None)
+        if record is None:
+            return
+        self._unindex_owner(record)
+        await self.db.execute("DELETE FROM tickets WHERE channel_id = ?", (str(channel_id),))
@@ -0,0 +1,228 @@
+# Filename: utils/transcripts.py
+
+from __future__ import annotations
+import os
+import sys
+import html
+import time
+import zlib
+import asyncio
+import logging
+import weakref
+import argparse
+from pathlib import Path
+from datetime import datetime, UTC
+from typing import TYPE_CHECKING, AsyncIterator, List, NamedTuple
+
+import aiofiles
+import discord
+
+if TYPE_CHECKING:
+    from .database import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+
+def render_header(channel_name: str) -> str:
+    # </body></html> are optional in HTML5, which lets later exports simply append.
+    title = html.escape(f"Transcript for #{channel_name}")
+    return f'<!DOCTYPE html>\n<html><head><meta charset="utf-8"><title>{title}</title></head><body><h1>{title}</h1>\n'
+
+
+def render_message(message: discord.Message) -> str:
+    """Renders one message as an escaped HTML paragraph."""
+    author = html.escape(message.author.name)
+    timestamp = message.created_at.strftime('%Y-%m-%d %H:%M:%S')
+    content = html.escape(message.clean_content).replace("\n", "<br>")
+    attachments = "".join(
+        f' <a href="{html.escape(att.url)}">{html.escape(att.filename)}</a>' for att in message.attachments
+    )
+    return f"<p><b>{author}</b> ({timestamp}): {content}{attachments}</p>\n"
+
+
+class TranscriptResult(NamedTuple):
+    path: Path
+    new_messages: int
+    total_messages: int
+
+
+class TranscriptExporter:
+    """
+    Writes ticket transcripts to `data/transcripts/<guild_id>/<channel_id>.html[.gz]`.
+
+    Messages are rendered into an in-memory buffer and written in chunks of about
+    `flush_bytes`, so a long history costs a handful of file writes instead of one per
+    message. Every transcript keeps a cursor (the last exported message id) in the
+    `ticket_transcripts` table; exporting again only fetches and appends newer messages.
+    Gzipped transcripts get one gzip member per export, which every gzip reader
+    decompresses as a single file.
+    """
+
+    def __init__(self, db: DatabaseManager, root: Path, flush_bytes: int = 256 * 1024):
+        self.db = db
+        self.root = Path(root)
+        self.flush_bytes = flush_bytes
+        self._locks: "weakref.WeakValueDictionary[int, asyncio.Lock]" = weakref.WeakValueDictionary()  # One export per channel at a time
+
+    def path_for(self, channel: discord.abc.GuildChannel, gzip: bool) -> Path:
+        return self.root / str(channel.guild.id) / f"{channel.id}.html{'.gz' if gzip else ''}"
+
+    async def export(self, channel: discord.TextChannel, *, gzip: bool = False) -> TranscriptResult:
+        """Brings the channel's transcript up to date and returns where it is."""
+        lock = self._locks.get(channel.id)
+        if lock is None:
+            lock = self._locks[channel.id] = asyncio.Lock()
+        async with lock:
+            return await self._export(channel, gzip)
+
+    async def _export(self, channel: discord.TextChannel, gzip: bool) -> TranscriptResult:
+        path = self.path_for(channel, gzip)
+        row = await self.db.fetchone(
+            "SELECT last_message_id, message_count, path FROM ticket_transcripts WHERE channel_id = ?", (str(channel.id),)
+        )
+        if row and (row['path'] != str(path) or not path.exists()):
+            row = None  # The file is gone or the format changed: start over
+        after = discord.Object(id=int(row['last_message_id'])) if row and row['last_message_id'] else None
+        total = row['message_count'] if row else 0
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        start_size = path.stat().st_size if row else 0
+        compressor = zlib.compressobj(wbits=31) if gzip else None  # wbits=31 writes the gzip format
+        buffer: List[str] = [] if row else [render_header(channel.name)]
+        buffered = sum(map(len, buffer))
+        new, last_id = 0, None
+
+        async with aiofiles.open(path, 'ab' if row else 'wb') as f:
+            async def flush(final: bool = False) -> None:
+                nonlocal buffer, buffered
+                data = "".join(buffer).encode('utf-8')
+                buffer, buffered = [], 0
+                if compressor is not None:
+                    # zlib releases the GIL, so compressing in a thread keeps the loop responsive
+                    data = await asyncio.to_thread(lambda: compressor.compress(data) + (compressor.flush() if final else b""))
+                if data:
+                    await f.write(data)
+
+            try:
+                async for message in channel.history(limit=None, after=after, oldest_first=True):
+                    chunk = render_message(message)
+                    buffer.append(chunk)
+                    buffered += len(chunk)
+                    new += 1
+                    last_id = message.id
+                    if buffered >= self.flush_bytes:
+                        await flush()
+                if new or not row:
+                    await flush(final=True)
+            except BaseException:
+                # Roll back the partial append so the file still matches the stored cursor
+                await f.truncate(start_size)
+                raise
+
+        if last_id is not None or not row:
+            await self.db.execute(
+                '''INSERT INTO ticket_transcripts (channel_id, guild_id, last_message_id, message_count, path, updated_at)
+                   VALUES (?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(channel_id) DO UPDATE SET
+                       last_message_id = COALESCE(excluded.last_message_id, last_message_id),
+                       message_count = excluded.message_count, path = excluded.path, updated_at = excluded.updated_at''',
+                (str(channel.id), str(channel.guild.id), str(last_id) if last_id else None, total + new, str(path), time.time())
+            )
+        return TranscriptResult(path, new, total + new)
+
+    async def forget(self, channel_id: int) -> None:
+        """Deletes a channel's transcript file and cursor."""
+        row = await self.db.fetchone("SELECT path FROM ticket_transcripts WHERE channel_id = ?", (str(channel_id),))
+        if row:
+            Path(row['path']).unlink(missing_ok=True)
+            await self.db.execute("DELETE FROM ticket_transcripts WHERE channel_id = ?", (str(channel_id),))
+
+
+# --- Benchmark with a stubbed history ---
+class _StubAuthor:
+    def __init__(self, name: str):
+        self.name = name
+
+
+class _StubMessage:
+    def __init__(self, message_id: int, author: _StubAuthor, content: str):
+        self.id = message_id
+        self.author = author
+        self.clean_content = content
+        self.created_at = datetime.fromtimestamp(1_700_000_000 + message_id, UTC)
+        self.attachments = ()
+
+
+class _StubChannel:
+    """Yields a fake history in pages of 100, like the API, without any network."""
+
+    def __init__(self, count: int, channel_id: int = 1, guild_id: int = 1):
+        self.id = channel_id
+        self.name = "ticket-bench"
+        self.guild = discord.Object(id=guild_id)
+        authors = [_StubAuthor(f"user<{i}>") for i in range(8)]
+        self.messages = [
+            _StubMessage(i, authors[i % 8], f"message {i}: <b>not bold</b> & some ordinary ticket chatter " * 2)
+            for i in range(1, count + 1)
+        ]
+
+    async def history(self, limit=None, after=None, oldest_first=True) -> AsyncIterator[_StubMessage]:
+        start = after.id if after else 0
+        for index, message in enumerate(self.messages[start:]):
+            if index % 100 == 0:
+                await asyncio.sleep(0)  # One "request" per page
+            yield message
+
+
+async def _legacy_export(channel: _StubChannel, path: Path) -> None:
+    # The previous implementation: one awaited write per message.
+    async with aiofiles.open(path, 'w', encoding='utf-8') as f:
+        await f.write(f"<html><body><h1>Transcript for #{channel.name}</h1>")
+        async for msg in channel.history(limit=None, oldest_first=True):
+            await f.write(f"<p><b>{msg.author.name}</b> ({msg.created_at.strftime('%Y-%m-%d %H:%M:%S')}): {msg.clean_content}</p>")
+        await f.write("</body></html>")
+
+
+async def _benchmark(count: int, workdir: Path) -> None:
+    from .database import DatabaseManager
+
+    workdir.mkdir(parents=True, exist_ok=True)
+    db = DatabaseManager(workdir / "bench.db")
+    await db.init()
+    exporter = TranscriptExporter(db, workdir / "transcripts")
+    channel = _StubChannel(count)
+
+    start = time.perf_counter()
+    await _legacy_export(channel, workdir / "legacy.html")
+    print(f"legacy (write per message):  {time.perf_counter() - start:7.2f}s  {(workdir / 'legacy.html').stat().st_size / 1024**2:6.1f} MB")
+
+    for gzip in (False, True):
+        await exporter.forget(channel.id)
+        start = time.perf_counter()
+        result = await exporter.export(channel, gzip=gzip)
+        label = "buffered, gzip" if gzip else "buffered"
+        print(f"{label + ':':<28} {time.perf_counter() - start:7.2f}s  {result.path.stat().st_size / 1024**2:6.1f} MB")
+
+    channel.messages.extend(_StubMessage(count + i, channel.messages[0].author, "follow-up") for i in range(1, 51))
+    start = time.perf_counter()
+    result = await exporter.export(channel, gzip=True)
+    print(f"re-export, 50 new messages:  {time.perf_counter() - start:7.2f}s  ({result.new_messages} appended, {result.total_messages} total)")
+    await db.close()
+
+
+def main() -> int:
+    """
+    Compares the buffered exporter with per-message writes on a stubbed history.
+
+    Run from the project root: `python -m utils.transcripts --messages 50000`
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the ticket transcript exporter.")
+    parser.add_argument("--messages", type=int, default=50_000)
+    parser.add_argument("--workdir", type=Path, default=Path(os.getenv("TMPDIR", "/tmp")) / "maxy-transcript-bench")
+    args = parser.parse_args()
+    asyncio.run(_benchmark(args.messages, args.workdir))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())